@@ -0,0 +1,5 @@
+"""
+Бенчмарки ресторанного бота
+
+Запуск из корня проекта: python -m benchmarks.<имя_модуля>
+"""
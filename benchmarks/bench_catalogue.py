@@ -0,0 +1,31 @@
+"""
+Микро-бенчмарк поиска блюда по ID
+
+Показывает, что стоимость get_item не зависит от размера каталога.
+"""
+
+import random
+import timeit
+
+from benchmarks.menu_factory import make_menu
+from utils.data_manager import DataManager
+
+SIZES = [100, 1_000, 10_000, 50_000]
+LOOKUPS = 10_000
+
+def bench_get_item(size: int) -> float:
+    """Среднее время одного get_item в микросекундах"""
+    manager = DataManager(data_file="")
+    manager.set_menu(make_menu(size))
+
+    ids = [f"item_{random.randrange(size)}" for _ in range(LOOKUPS)]
+    elapsed = timeit.timeit(lambda: [manager.get_item(i) for i in ids], number=5)
+    return elapsed / (5 * LOOKUPS) * 1e6
+
+def main():
+    print(f"{'items':>8} | {'get_item, мкс':>14}")
+    for size in SIZES:
+        print(f"{size:>8} | {bench_get_item(size):>14.3f}")
+
+if __name__ == "__main__":
+    main()
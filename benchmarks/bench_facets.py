@@ -0,0 +1,44 @@
+"""
+Бенчмарк фасетного подбора против прохода по всем блюдам
+
+Запрос: «не дороже 400₽, без двух ингредиентов, сначала дешевле»,
+первая страница из 5 блюд и общее число найденных.
+"""
+
+import timeit
+
+from benchmarks.menu_factory import VOCABULARY, make_menu
+from utils.menu_snapshot import MenuSnapshot
+
+SIZES = [1_000, 10_000, 50_000]
+MAX_PRICE = 400
+EXCLUDE = VOCABULARY[:2]
+PAGE = 5
+
+def linear(snapshot: MenuSnapshot):
+    excluded = set(EXCLUDE)
+    found = [
+        item for item in snapshot.items_by_id.values()
+        if item.price <= MAX_PRICE and not excluded.intersection(item.ingredients)
+    ]
+    found.sort(key=lambda item: item.price)
+    return len(found), found[:PAGE]
+
+def faceted(snapshot: MenuSnapshot):
+    result = snapshot.facets.filter(max_price=MAX_PRICE, exclude=EXCLUDE)
+    return len(result), result.page(0, PAGE)
+
+def main():
+    print(f"{'items':>8} | {'найдено':>8} | {'проход, мкс':>11} | {'фасеты, мкс':>11}")
+    for size in SIZES:
+        snapshot = MenuSnapshot(make_menu(size))
+        count, page = faceted(snapshot)
+        assert (count, page) == linear(snapshot)
+
+        number = max(10, 200_000 // size)
+        plain = timeit.timeit(lambda: linear(snapshot), number=number) / number * 1e6
+        facets = timeit.timeit(lambda: faceted(snapshot), number=number * 10) / (number * 10) * 1e6
+        print(f"{size:>8} | {count:>8} | {plain:>11.1f} | {facets:>11.1f}")
+
+if __name__ == "__main__":
+    main()
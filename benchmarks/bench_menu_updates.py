@@ -0,0 +1,141 @@
+"""
+Бенчмарк правок цен и наличия
+
+Пакет правок применяется к снимку меню частично (MenuSnapshot.patched)
+против полной пересборки снимка из JSON с теми же изменениями:
+
+- наличие: N блюд закончились — фасеты и поисковый индекс не
+  перестраиваются, меняются только маски и список блюд;
+- цены: N блюд подорожали — фасеты строятся заново, текстовый
+  индекс остается общим.
+
+Результат частичной правки сверяется с пересобранным меню: блюда
+категорий, поиск и подбор должны совпасть. Отдельно проверяется, что
+правка меню другого заведения, примененная вне его обновлений (как
+это делает MenuWatcher), сбрасывает кэшированные клавиатуры именно
+этого заведения, а новое меню заведения целиком не трогает клавиатуры
+основного меню.
+
+Запуск: python -m benchmarks.bench_menu_updates [блюд в меню] [блюд в пакете]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.menu_factory import make_menu
+from keyboards.menu_keyboards import cuisines_keyboard, items_keyboard
+from utils.data_manager import data_manager
+from utils.menu_snapshot import MenuSnapshot
+from utils.menu_updates import ItemUpdate, resolve_updates
+from utils.tenants import current_tenant
+
+ROUNDS = 3
+
+def timed(func) -> float:
+    """Лучшее время из ROUNDS запусков, мс"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def applied_to_json(menu_data, updates):
+    """Тот же пакет правок, внесенный в словарь меню"""
+    by_id = {update.item_id: update for update in updates}
+    for cuisine in menu_data["cuisines"].values():
+        for category in cuisine["categories"].values():
+            for item in category["items"]:
+                update = by_id.get(item["id"])
+                if update is None:
+                    continue
+                if update.price is not None:
+                    item["price"] = update.price
+                if update.available is not None:
+                    item["available"] = update.available
+    return menu_data
+
+def check_same(patched: MenuSnapshot, rebuilt: MenuSnapshot):
+    for cuisine_id, cuisine in rebuilt.cuisines.items():
+        for category_id, category in cuisine.categories.items():
+            expected = rebuilt.visible_items.get((cuisine_id, category_id), category.items)
+            actual = patched.visible_items.get((cuisine_id, category_id), patched.cuisines[cuisine_id].categories[category_id].items)
+            assert [(item.id, item.price) for item in actual] == [(item.id, item.price) for item in expected]
+
+    for query in ("пицца", "соус", "ролл"):
+        assert [item.id for item in patched.search_index.search(query)] == [item.id for item in rebuilt.search_index.search(query)]
+
+    result_patched = patched.facets.filter(max_price=500)
+    result_rebuilt = rebuilt.facets.filter(max_price=500)
+    assert len(result_patched) == len(result_rebuilt)
+    assert sorted(item.id for item in result_patched.page(0, len(result_patched))) == \
+        sorted(item.id for item in result_rebuilt.page(0, len(result_rebuilt)))
+
+def keyboard_text(markup) -> str:
+    return " ".join(button.text for row in markup.inline_keyboard for button in row)
+
+def check_tenant_keyboards():
+    """Правка меню заведения из фоновой задачи сбрасывает его клавиатуры, а не клавиатуры основного меню"""
+    tenant = "bench_venue"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{tenant}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(make_menu(200), f, ensure_ascii=False)
+        manager = data_manager.for_tenant(tenant)
+        manager.data_file = path
+
+        token = current_tenant.set(tenant)
+        try:
+            item = next(iter(data_manager.snapshot.items_by_id.values()))
+            location = data_manager.get_item_location(item.id)
+            before = items_keyboard(*location)
+        finally:
+            current_tenant.reset(token)
+
+        # Как MenuWatcher: заведение обновления не выставлено
+        manager.apply_updates([ItemUpdate(item.id, price=item.price + 1)])
+
+        token = current_tenant.set(tenant)
+        try:
+            after = items_keyboard(*location)
+        finally:
+            current_tenant.reset(token)
+        assert after is not before, "клавиатура заведения осталась в кэше после правки его меню"
+        assert f"{item.price + 1}₽" in keyboard_text(after)
+
+        main_keyboard = cuisines_keyboard()
+        manager.set_menu(make_menu(300))
+        assert cuisines_keyboard() is main_keyboard, "новое меню заведения сбросило клавиатуры основного меню"
+
+def main(size: int = 50_000, batch: int = 50):
+    menu_data = make_menu(size)
+    snapshot = MenuSnapshot(menu_data)
+    print(f"меню: {len(snapshot.items_by_id)} блюд, пакет: {batch} блюд")
+
+    rnd = random.Random(1)
+    ids = rnd.sample(list(snapshot.items_by_id), batch)
+    batches = {
+        "наличие": [ItemUpdate(item_id, available=False) for item_id in ids],
+        "цены": [ItemUpdate(item_id, price=snapshot.items_by_id[item_id].price + 10) for item_id in ids],
+    }
+
+    for name, updates in batches.items():
+        changes = resolve_updates(snapshot.items_by_id, updates)
+        updated_data = applied_to_json(make_menu(size), updates)
+        patch = timed(lambda: snapshot.patched(changes))
+        rebuild = timed(lambda: MenuSnapshot(updated_data))
+        print(f"\n{name}:")
+        print(f"  частичная правка: {patch:.1f} мс, пересборка снимка: {rebuild:.1f} мс")
+
+        check_same(snapshot.patched(changes), MenuSnapshot(updated_data))
+    print("\nрезультаты правки совпадают с пересобранным меню")
+
+    check_tenant_keyboards()
+    print("правка и новое меню заведения сбрасывают только его клавиатуры")
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
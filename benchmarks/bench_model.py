@@ -0,0 +1,118 @@
+"""
+Бенчмарк модели каталога: вложенные словари против объектов со __slots__
+
+Сравнивает память, занятую каталогом, и время отрисовки корзины:
+прежний get_order_items_list копировал словарь каждого блюда,
+теперь строки корзины ссылаются на блюда без копирования.
+"""
+
+import gc
+import json
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.menu_factory import make_menu
+from config import MAX_ORDER_ITEMS
+from utils.catalogue import CartLine, build_catalogue
+
+SIZE = 50_000
+RENDERS = 2_000
+
+def traced_size(build: Callable[[], object]) -> int:
+    """Сколько байт остается занято объектом, который вернул build"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def items_by_id_dicts(menu_data: Dict) -> Dict[str, Dict]:
+    return {
+        item["id"]: item
+        for cuisine in menu_data["cuisines"].values()
+        for category in cuisine["categories"].values()
+        for item in category["items"]
+    }
+
+def lines_dicts(order: Dict, items_by_id: Dict[str, Dict]) -> List[Dict]:
+    """Прежний get_order_items_list: копия словаря на каждую строку"""
+    lines = []
+    for item_id, quantity in order["items"].items():
+        item_copy = items_by_id[item_id].copy()
+        item_copy["quantity"] = quantity
+        item_copy["price"] = order["prices"].get(item_id, item_copy["price"])
+        item_copy["subtotal"] = item_copy["price"] * quantity
+        lines.append(item_copy)
+    return lines
+
+def lines_objects(order: Dict, items_by_id: Dict) -> List[CartLine]:
+    """Текущий get_order_items_list"""
+    prices = order["prices"]
+    return [
+        CartLine(items_by_id[item_id], quantity, prices[item_id])
+        for item_id, quantity in order["items"].items()
+    ]
+
+def render_dicts(order: Dict, items_by_id: Dict[str, Dict]) -> str:
+    """Прежняя отрисовка корзины"""
+    lines = lines_dicts(order, items_by_id)
+
+    text = ""
+    for i, item in enumerate(lines, 1):
+        text += f"{i}. {item.get('image', '🍽️')} {item.get('name', 'Блюдо')}\n"
+        text += f"   Количество: {item.get('quantity', 1)} × {item.get('price', 0)}₽ = {item.get('subtotal', 0)}₽\n\n"
+    return text
+
+def render_lines(order: Dict, items_by_id: Dict) -> str:
+    """Текущая отрисовка через CartLine"""
+    lines = lines_objects(order, items_by_id)
+
+    text = ""
+    for i, line in enumerate(lines, 1):
+        text += f"{i}. {line.image} {line.name}\n"
+        text += f"   Количество: {line.quantity} × {line.price}₽ = {line.subtotal}₽\n\n"
+    return text
+
+def main():
+    raw = json.dumps(make_menu(SIZE), ensure_ascii=False)
+
+    dict_size = traced_size(lambda: json.loads(raw))
+    model_size = traced_size(lambda: build_catalogue(json.loads(raw)))
+
+    print(f"Каталог из {SIZE} блюд")
+    print(f"{'модель':<10} | {'память, МБ':>10} | {'байт на блюдо':>13}")
+    for label, size in (("словари", dict_size), ("__slots__", model_size)):
+        print(f"{label:<10} | {size / 2 ** 20:>10.1f} | {size / SIZE:>13.0f}")
+
+    menu_data = json.loads(raw)
+    dicts = items_by_id_dicts(menu_data)
+    objects = {
+        item.id: item
+        for cuisine in build_catalogue(menu_data).values()
+        for category in cuisine.categories.values()
+        for item in category.items
+    }
+
+    # Полная корзина: максимум позиций
+    ids = list(dicts)[::SIZE // MAX_ORDER_ITEMS][:MAX_ORDER_ITEMS]
+    order = {"items": {item_id: 2 for item_id in ids}, "prices": {item_id: dicts[item_id]["price"] for item_id in ids}}
+    assert render_dicts(order, dicts) == render_lines(order, objects)
+
+    print(f"\nКорзина из {len(ids)} позиций")
+    print(f"{'модель':<10} | {'строки, мкс':>11} | {'строки, байт':>12} | {'отрисовка, мкс':>14}")
+    cases = (
+        ("словари", lines_dicts, render_dicts, dicts),
+        ("CartLine", lines_objects, render_lines, objects)
+    )
+    for label, build_lines, render, index in cases:
+        lines = timeit.timeit(lambda: build_lines(order, index), number=RENDERS) / RENDERS * 1e6
+        size = traced_size(lambda: build_lines(order, index))
+        elapsed = timeit.timeit(lambda: render(order, index), number=RENDERS) / RENDERS * 1e6
+        print(f"{label:<10} | {lines:>11.1f} | {size:>12} | {elapsed:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Бенчмарк журнала заказов
+
+- пропускная способность оформления: CONCURRENT обработчиков одновременно
+  ждут подтверждения записи, fsync общий на пачку;
+- несколько процессов пишут в один журнал, как воркеры вебхука:
+  номера заказов не повторяются, индекс каждого процесса указывает
+  на свои строки, история видит заказы других процессов;
+- журнал на N заказов: открытие с индексом и без него (восстановление
+  по журналу), чтение страницы истории.
+
+Запуск: python -m benchmarks.bench_order_log [заказов в большом журнале]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils.catalogue import CartLine, MenuItem
+from utils.order_log import OrderLog
+
+CONCURRENT = 200
+CONFIRMS = 5_000
+USERS = 100_000
+PAGE = 5
+PROCESSES = 4
+PROCESS_CONFIRMS = 500
+
+LINES = [CartLine(MenuItem(f"item_{i}", name=f"Блюдо {i}", price=100 + i), 1 + i % 3, 100 + i) for i in range(3)]
+TOTAL = sum(line.subtotal for line in LINES)
+
+async def confirm_throughput(path: str):
+    """Оформление заказов с ожиданием fsync, как в confirm_order"""
+    log = OrderLog(path)
+    queue = iter(range(CONFIRMS))
+
+    async def worker():
+        for user_id in queue:
+            await log.write(user_id % USERS, LINES, TOTAL)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENT)))
+    elapsed = time.perf_counter() - started
+    log.close()
+    print(f"оформление: {CONFIRMS / elapsed:.0f} заказов/с при {CONCURRENT} одновременных, "
+          f"{elapsed / CONFIRMS * 1e3:.2f} мс на заказ в среднем")
+
+def process_worker(path: str, worker: int):
+    """Воркер: оформляет заказы пользователей worker, worker + PROCESSES, ..."""
+    async def confirm_all():
+        log = OrderLog(path)
+        await asyncio.gather(*(
+            log.write(worker + PROCESSES * i, LINES, TOTAL) for i in range(PROCESS_CONFIRMS)
+        ))
+        log.close()
+    asyncio.run(confirm_all())
+
+def multiprocess_writes(path: str):
+    """PROCESSES процессов одновременно пишут в один журнал"""
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=process_worker, args=(path, worker)) for worker in range(PROCESSES)]
+    # Журнал, открытый до записи других процессов, должен увидеть их заказы
+    log = OrderLog(path)
+
+    started = time.perf_counter()
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+    elapsed = time.perf_counter() - started
+
+    total = PROCESSES * PROCESS_CONFIRMS
+    assert len(log) == total
+    # У каждого пользователя один заказ: запись индекса указывает на строку этого заказа
+    records = [log.history(user_id)[0] for user_id in range(total)]
+    assert all(record.user_id == user_id for user_id, record in enumerate(records))
+    assert sorted(record.id for record in records) == list(range(1, total + 1)), "номера заказов повторяются или пропущены"
+    log.close()
+
+    with open(path, "rb") as f:
+        assert sum(1 for _ in f) == total
+    print(f"{PROCESSES} процесса: {total / elapsed:.0f} заказов/с, номера 1..{total} без повторов, "
+          f"индекс сходится с журналом")
+
+def fill(path: str, count: int):
+    """Большой журнал: пишется крупными пачками, чтобы не ждать fsync"""
+    log = OrderLog(path, batch_size=10_000)
+    rnd = random.Random(1)
+    futures = [log.append(rnd.randrange(USERS), LINES, TOTAL) for _ in range(count)]
+    futures[-1].result()
+    log.close()
+
+def timed_open(path: str) -> float:
+    started = time.perf_counter()
+    OrderLog(path).close()
+    return (time.perf_counter() - started) * 1e3
+
+def history_reads(path: str) -> float:
+    """Среднее время страницы истории случайного пользователя, мкс"""
+    log = OrderLog(path)
+    rnd = random.Random(2)
+    users = [rnd.randrange(USERS) for _ in range(10_000)]
+
+    started = time.perf_counter()
+    for user_id in users:
+        log.history(user_id, 0, PAGE)
+    elapsed = time.perf_counter() - started
+    log.close()
+    return elapsed / len(users) * 1e6
+
+def main(count: int = 1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(confirm_throughput(os.path.join(tmp, "confirm.log")))
+        multiprocess_writes(os.path.join(tmp, "workers.log"))
+
+        path = os.path.join(tmp, "orders.log")
+        started = time.perf_counter()
+        fill(path, count)
+        print(f"\nжурнал на {count} заказов: {os.path.getsize(path) / 2 ** 20:.0f} МБ, "
+              f"записан за {time.perf_counter() - started:.1f} с")
+
+        print(f"открытие по индексу: {timed_open(path):.0f} мс")
+        os.remove(path + ".idx")
+        print(f"открытие без индекса (восстановление по журналу): {timed_open(path):.0f} мс")
+        print(f"страница истории ({PAGE} заказов): {history_reads(path):.1f} мкс")
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,65 @@
+"""
+Проверка OutboundScheduler против поддельного Bot API
+
+Имитирует «час пик»: быстрые нажатия ➕ в одном чате (десятки правок
+одного сообщения) и рассылку по многим чатам. Сравнивает число
+запросов и ответов 429 с планировщиком и без него.
+"""
+
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiohttp.test_utils import TestServer
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from utils.outbound import OutboundScheduler
+
+TOKEN = "42:TEST"
+RAPID_EDITS = 30
+CHATS = 40
+
+async def run(use_scheduler: bool):
+    api = FakeBotAPI()
+    server = TestServer(api.app)
+    await server.start_server()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(str(server.make_url(""))))
+    scheduler = OutboundScheduler(global_rate=30, chat_rate=1, chat_burst=3)
+    if use_scheduler:
+        session.middleware(scheduler)
+    bot = Bot(TOKEN, session=session)
+
+    async def call(coro):
+        try:
+            await coro
+            return True
+        except TelegramRetryAfter:
+            return False
+
+    started = time.perf_counter()
+    calls = [call(bot.edit_message_text(text=f"🛒 Мой заказ: {n}", chat_id=1, message_id=1)) for n in range(RAPID_EDITS)]
+    calls += [call(bot.send_message(chat_id=chat_id, text="Заказ принят")) for chat_id in range(2, CHATS + 2)]
+    results = await asyncio.gather(*calls)
+    elapsed = time.perf_counter() - started
+
+    await session.close()
+    await server.close()
+
+    title = "с планировщиком" if use_scheduler else "без планировщика"
+    print(f"{title}: успешно {sum(results)}/{len(results)}, HTTP-запросов {sum(api.requests.values())}, "
+          f"ответов 429: {api.rejected}, время {elapsed:.2f} с")
+    if use_scheduler:
+        print(f"  статистика: {scheduler.stats}")
+
+async def main():
+    logging.getLogger("utils.outbound").setLevel(logging.ERROR)
+    await run(use_scheduler=False)
+    await run(use_scheduler=True)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+"""
+Бенчмарк поиска: триграммный индекс против линейного перебора
+"""
+
+import timeit
+from typing import Dict, List
+
+from benchmarks.menu_factory import make_menu
+from utils.data_manager import DataManager
+
+SIZES = [1_000, 10_000, 50_000]
+QUERIES = ["паста", "пармезан", "борщ", "лососсь", "креветки соус", "xyz"]
+
+def linear_search(menu_data: Dict, query: str) -> List[Dict]:
+    """Прежняя реализация search_items: подстрока в названии"""
+    results = []
+    query_lower = query.lower()
+    for cuisine in menu_data.get("cuisines", {}).values():
+        for category in cuisine.get("categories", {}).values():
+            for item in category.get("items", []):
+                if query_lower in item.get("name", "").lower():
+                    results.append(item)
+    return results
+
+def main():
+    print(f"{'items':>8} | {'query':<16} | {'scan, мс':>9} | {'index, мс':>9} | {'hits':>6}")
+    for size in SIZES:
+        menu_data = make_menu(size)
+        manager = DataManager(data_file="")
+        manager.set_menu(menu_data)
+
+        for query in QUERIES:
+            scan = timeit.timeit(lambda: linear_search(menu_data, query), number=20) / 20 * 1e3
+            # Сам индекс, без кэша результатов
+            index = timeit.timeit(lambda: manager.snapshot.search_index.search(query), number=20) / 20 * 1e3
+            hits = len(manager.snapshot.search_index.search(query))
+            print(f"{size:>8} | {query:<16} | {scan:>9.3f} | {index:>9.3f} | {hits:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Бенчмарк кэша поиска
+
+- популярные запросы: поток, в котором несколько запросов повторяются
+  чаще остальных (распределение Ципфа), — индекс на каждый запрос
+  против кэша;
+- поиск по мере набора: каждое начало слова от 2 букв — индекс
+  на каждую букву против кэша, где следующая буква ищется среди
+  результатов предыдущей.
+
+Результаты из кэша сверяются с поиском по индексу.
+
+Запуск: python -m benchmarks.bench_search_cache [блюд в меню]
+"""
+
+import random
+import sys
+import time
+
+from benchmarks.menu_factory import WORDS, make_menu
+from utils.menu_snapshot import MenuSnapshot
+from utils.search_cache import SearchCache
+
+STREAM = 20_000
+TYPED = WORDS + ["креветки соус", "острый рамен", "лососсь"]
+
+def timed(search, queries) -> float:
+    """Среднее время запроса, мкс"""
+    started = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+def popular_stream(size: int):
+    rnd = random.Random(1)
+    weights = [1 / rank for rank in range(1, len(TYPED) + 1)]
+    return rnd.choices(TYPED, weights=weights, k=size)
+
+def typed_prefixes():
+    """Начала запросов от 2 букв: первое нажатие и все следующие"""
+    first = [query[:2] for query in TYPED]
+    following = [query[:end] for query in TYPED for end in range(3, len(query) + 1)]
+    return first, following
+
+def main(size: int = 50_000):
+    index = MenuSnapshot(make_menu(size)).search_index
+    print(f"меню: {len(index.items)} блюд")
+
+    stream = popular_stream(STREAM)
+    cache = SearchCache()
+    uncached = timed(index.search, stream)
+    cached = timed(lambda query: cache.search(index, query), stream)
+    print(f"\nпопулярные запросы ({len(stream)}, {len(set(stream))} разных):")
+    print(f"  индекс: {uncached:.1f} мкс, кэш: {cached:.1f} мкс, {cache.stats}")
+
+    first, following = typed_prefixes()
+    cache = SearchCache()
+    uncached = timed(index.search, first), timed(index.search, following)
+    cached = timed(lambda query: cache.search(index, query), first), timed(lambda query: cache.search(index, query), following)
+    print(f"\nпо мере набора ({len(TYPED)} запросов, каждое начало впервые):")
+    print(f"  первые 2 буквы — индекс: {uncached[0]:.1f} мкс, кэш: {cached[0]:.1f} мкс")
+    print(f"  следующие буквы — индекс: {uncached[1]:.1f} мкс, с сужением по началу: {cached[1]:.1f} мкс")
+    print(f"  {cache.stats}")
+
+    for query in first + following:
+        assert cache.search(index, query) == index.search(query), query
+    print("\nрезультаты кэша совпадают с индексом")
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,97 @@
+"""
+Бенчмарк общего состояния нескольких реплик бота
+
+- несколько «реплик» (свои DataManager и SharedUserStorage над одними шардами)
+  одновременно добавляют блюда в одни и те же корзины: ни одно изменение
+  не должно потеряться, считаются конфликты compare-and-set;
+- стоимость is_in_favorites с локальным кэшем и без него при задержке
+  сети ROUND_TRIP_MS на каждое обращение к хранилищу.
+
+Запуск: python -m benchmarks.bench_shared_state
+"""
+
+import threading
+import time
+import timeit
+from typing import List
+
+from benchmarks.menu_factory import make_menu
+from utils.data_manager import DataManager
+from utils.kv_store import KeyValueStore, LocalKeyValueStore
+from utils.user_storage import SharedUserStorage
+
+MENU_SIZE = 1_000
+REPLICAS = 4
+USERS = 20
+ADDS_PER_REPLICA = 500
+ROUND_TRIP_MS = 0.2
+LOOKUPS = 2_000
+
+class SlowStore(KeyValueStore):
+    """Хранилище с задержкой сетевого вызова на каждое обращение"""
+
+    def __init__(self, store: KeyValueStore, delay: float):
+        self.store = store
+        self.delay = delay
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.store.get(key)
+
+    def compare_and_set(self, key, value, version):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.store.compare_and_set(key, value, version)
+
+def replica(shards: List[KeyValueStore], menu: dict, cache_ttl: float = 2.0) -> DataManager:
+    manager = DataManager(data_file="", storage=SharedUserStorage(shards, cache_ttl=cache_ttl))
+    manager.set_menu(menu)
+    return manager
+
+def concurrent_carts(menu: dict):
+    # С задержкой между чтением и записью реплики действительно пересекаются
+    shards = [SlowStore(LocalKeyValueStore(), ROUND_TRIP_MS / 1e3) for _ in range(2)]
+    replicas = [replica(shards, menu) for _ in range(REPLICAS)]
+    item_ids = list(replicas[0].snapshot.items_by_id)[:10]
+
+    def work(manager: DataManager, seed: int):
+        for step in range(ADDS_PER_REPLICA):
+            manager.add_to_order((seed + step) % USERS, item_ids[step % len(item_ids)])
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=work, args=(manager, index)) for index, manager in enumerate(replicas)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    quantities = sum(sum(replicas[0].get_order(user_id).quantities) for user_id in range(USERS))
+    conflicts = sum(manager.storage.conflicts for manager in replicas)
+    expected = REPLICAS * ADDS_PER_REPLICA
+    print(f"реплик: {REPLICAS}, пользователей: {USERS}, добавлений: {expected}")
+    print(f"в корзинах: {quantities} ({'без потерь' if quantities == expected else 'ПОТЕРИ'}), "
+          f"конфликтов: {conflicts}, {expected / elapsed:.0f} изменений/с")
+
+def favorites_cache(menu: dict):
+    print(f"\nis_in_favorites при задержке {ROUND_TRIP_MS} мс на обращение к хранилищу")
+    print(f"{'кэш':<12} | {'мкс на вызов':>12} | {'обращений':>9}")
+    for label, ttl in (("без кэша", 0.0), ("TTL 2 с", 2.0)):
+        store = SlowStore(LocalKeyValueStore(), ROUND_TRIP_MS / 1e3)
+        manager = replica([store], menu, cache_ttl=ttl)
+        item_id = next(iter(manager.snapshot.items_by_id))
+        manager.add_to_favorites(1, item_id)
+        store.calls = 0
+
+        per_call = timeit.timeit(lambda: manager.is_in_favorites(1, item_id), number=LOOKUPS) / LOOKUPS * 1e6
+        print(f"{label:<12} | {per_call:>12.1f} | {store.calls:>9}")
+
+def main():
+    menu = make_menu(MENU_SIZE)
+    concurrent_carts(menu)
+    favorites_cache(menu)
+
+if __name__ == "__main__":
+    main()
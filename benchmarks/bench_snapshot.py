@@ -0,0 +1,39 @@
+"""
+Бенчмарк загрузки меню: разбор JSON с построением индексов против бинарного снимка
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.menu_factory import make_menu
+from utils.menu_snapshot import compiled_path, load_snapshot, save_compiled
+
+SIZES = [1_000, 10_000, 50_000]
+
+def timed_load(path: str) -> float:
+    """Время load_snapshot в миллисекундах"""
+    started = time.perf_counter()
+    snapshot = load_snapshot(path)
+    elapsed = (time.perf_counter() - started) * 1e3
+    assert snapshot is not None
+    return elapsed
+
+def main():
+    print(f"{'items':>8} | {'JSON, мс':>9} | {'снимок, мс':>10} | {'снимок, МБ':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            path = os.path.join(tmp, f"menu_{size}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(make_menu(size), f, ensure_ascii=False)
+
+            from_json = timed_load(path)
+            save_compiled(load_snapshot(path), compiled_path(path))
+            from_compiled = timed_load(path)
+            compiled_size = os.path.getsize(compiled_path(path)) / 2 ** 20
+
+            print(f"{size:>8} | {from_json:>9.1f} | {from_compiled:>10.1f} | {compiled_size:>10.1f}")
+
+if __name__ == "__main__":
+    main()
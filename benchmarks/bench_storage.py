@@ -0,0 +1,64 @@
+"""
+Бенчмарк хранилищ избранного и корзин
+
+Средняя задержка одного обновления (с учетом пакетной записи) на 100k пользователей.
+Обе серии обновлений одинаковые, поэтому корзины SQLite после «перезапуска»
+должны совпасть с корзинами в памяти.
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from utils.data_manager import DataManager
+from utils.user_storage import MemoryUserStorage, SqliteUserStorage
+
+USERS = 100_000
+UPDATES = 200_000
+ITEMS = 5
+
+def bench(manager: DataManager) -> float:
+    """Средняя задержка add_to_order/add_to_favorites в микросекундах"""
+    rnd = random.Random(1)
+    # Блюда из меню: несуществующие add_to_order отклоняет, и замер был бы пустым
+    item_ids = list(manager.snapshot.items_by_id)[:ITEMS]
+    started = time.perf_counter()
+
+    for _ in range(UPDATES):
+        user_id = rnd.randrange(USERS)
+        item_id = rnd.choice(item_ids)
+        if rnd.random() < 0.8:
+            manager.add_to_order(user_id, item_id)
+        else:
+            manager.add_to_favorites(user_id, item_id)
+
+    manager.storage.flush()
+    return (time.perf_counter() - started) / UPDATES * 1e6
+
+def main():
+    memory = DataManager(storage=MemoryUserStorage())
+    print(f"memory: {bench(memory):.2f} мкс/обновление")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        storage = SqliteUserStorage(path)
+        print(f"sqlite: {bench(DataManager(storage=storage)):.2f} мкс/обновление")
+        storage.close()
+
+        # После «перезапуска» данные на месте
+        reopened = DataManager(storage=SqliteUserStorage(path))
+        users_with_orders = 0
+        for user_id in range(USERS):
+            expected, restored = memory.get_order(user_id), reopened.get_order(user_id)
+            assert bool(expected) == bool(restored), f"корзина пользователя {user_id} не сохранилась"
+            if expected:
+                # menu_version у менеджеров свой: сравниваются позиции, цены и сумма
+                restored_data, expected_data = restored.to_dict(reopened.ordinals), expected.to_dict(memory.ordinals)
+                assert all(restored_data[key] == expected_data[key] for key in ("items", "prices", "total"))
+                users_with_orders += 1
+        print(f"пользователей с корзиной после перезапуска: {users_with_orders}, все совпадают с памятью")
+        reopened.storage.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Бенчмарк нескольких заведений в одном процессе
+
+- память на заведение, когда у сети заведений во многом одинаковое меню
+  (общие строки хранятся один раз);
+- стоимость обращения к data_manager через выбор заведения
+  в зависимости от числа заведений.
+"""
+
+import gc
+import json
+import os
+import random
+import tempfile
+import timeit
+import tracemalloc
+
+from benchmarks.menu_factory import make_menu
+from utils.data_manager import DataManager, TenantDataManager
+from utils.tenants import current_tenant
+from utils.user_storage import MemoryUserStorage
+
+TENANTS = [1, 10, 50]
+MENU_SIZE = 2_000
+CHAINS = 3          # столько разных базовых меню у заведений
+LOOKUPS = 100_000
+
+def write_menus(menu_dir: str, count: int):
+    """Меню заведений: каждое — одно из CHAINS базовых меню со своими ценами"""
+    bases = [make_menu(MENU_SIZE, seed=chain) for chain in range(CHAINS)]
+    for index in range(count):
+        menu = json.loads(json.dumps(bases[index % CHAINS]))
+        rnd = random.Random(index)
+        for cuisine in menu["cuisines"].values():
+            for category in cuisine["categories"].values():
+                for item in category["items"]:
+                    item["price"] = rnd.randrange(100, 2000, 10)
+        with open(os.path.join(menu_dir, f"venue{index}.json"), "w", encoding="utf-8") as f:
+            json.dump(menu, f, ensure_ascii=False)
+
+def main():
+    print(f"{'заведений':>9} | {'МБ на заведение':>15} | {'get_item напрямую, нс':>21} | {'через заведение, нс':>19}")
+    for count in TENANTS:
+        with tempfile.TemporaryDirectory() as menu_dir:
+            write_menus(menu_dir, count)
+            manager = TenantDataManager(
+                default_file=os.path.join(menu_dir, "missing.json"),
+                menu_dir=menu_dir,
+                storage_factory=lambda tenant: MemoryUserStorage()
+            )
+
+            gc.collect()
+            tracemalloc.start()
+            manager.load()
+            gc.collect()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            tenant = f"venue{count - 1}"
+            direct: DataManager = manager.for_tenant(tenant)
+            item_id = f"item_{MENU_SIZE // 2}"
+            current_tenant.set(tenant)
+
+            plain = timeit.timeit(lambda: direct.get_item(item_id), number=LOOKUPS) / LOOKUPS * 1e9
+            routed = timeit.timeit(lambda: manager.get_item(item_id), number=LOOKUPS) / LOOKUPS * 1e9
+            print(f"{count:>9} | {size / count / 2 ** 20:>15.2f} | {plain:>21.0f} | {routed:>19.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк памяти на пользователя: избранное и корзина
+
+Сравнивает прежнее представление (список item_id и словарь словарей)
+с массивами номеров блюд в MemoryUserStorage.
+"""
+
+import gc
+import random
+import tracemalloc
+from typing import Callable
+
+from benchmarks.menu_factory import make_menu
+from utils.data_manager import DataManager
+from utils.user_storage import MemoryUserStorage
+
+USERS = 100_000
+MENU_SIZE = 10_000
+FAVORITES = 5
+CART_LINES = 3
+
+def measure(fill: Callable[[], object]) -> float:
+    """Байт на пользователя, которые остаются заняты после fill"""
+    gc.collect()
+    tracemalloc.start()
+    state = fill()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del state
+    return size / USERS
+
+def fill_dicts():
+    """Прежнее представление из DataManager до перехода на номера блюд"""
+    rnd = random.Random(1)
+    favorites = {}
+    orders = {}
+    for user_id in range(USERS):
+        favorites[user_id] = [f"item_{rnd.randrange(MENU_SIZE)}" for _ in range(FAVORITES)]
+        items, prices = {}, {}
+        for _ in range(CART_LINES):
+            item_id = f"item_{rnd.randrange(MENU_SIZE)}"
+            items[item_id] = items.get(item_id, 0) + 1
+            prices[item_id] = 500
+        orders[user_id] = {"items": items, "prices": prices, "total": 500 * CART_LINES, "menu_version": 1}
+    return favorites, orders
+
+def fill_compact(manager: DataManager):
+    rnd = random.Random(1)
+    manager.storage = MemoryUserStorage()
+    for user_id in range(USERS):
+        for _ in range(FAVORITES):
+            manager.add_to_favorites(user_id, f"item_{rnd.randrange(MENU_SIZE)}")
+        for _ in range(CART_LINES):
+            manager.add_to_order(user_id, f"item_{rnd.randrange(MENU_SIZE)}")
+    return manager.storage
+
+def main():
+    manager = DataManager(data_file="")
+    manager.set_menu(make_menu(MENU_SIZE))
+    # Номера всех блюд назначаются заранее: реестр общий и не зависит от числа пользователей
+    for item_id in manager.snapshot.items_by_id:
+        manager.ordinals.ordinal(item_id)
+
+    print(f"{USERS} пользователей, {FAVORITES} блюд в избранном, {CART_LINES} позиции в корзине")
+    print(f"{'представление':<16} | {'байт на пользователя':>20}")
+    print(f"{'списки и dict':<16} | {measure(fill_dicts):>20.0f}")
+    print(f"{'массивы номеров':<16} | {measure(lambda: fill_compact(manager)):>20.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Локальный стенд для режима вебхука
+
+Поднимает aiohttp-приложение из main.create_webhook_app на localhost,
+отправляет синтетические обновления и измеряет задержку обработки
+от POST до ответа. Запросы к Bot API подменены FakeSession.
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+
+from benchmarks.fake_telegram import configure_for_benchmarks
+
+configure_for_benchmarks()
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from benchmarks.fake_telegram import FakeSession, message_update, callback_update
+from config import WEBHOOK_PATH, WEBHOOK_SECRET
+from main import create_bot, create_dispatcher, create_webhook_app
+from utils.callback_data import MenuCallback, NavigationCallback, OrderCallback
+
+ROUNDS = 500
+
+def scenario(user_id: int):
+    """Типичная последовательность действий одного пользователя"""
+    yield message_update(user_id, "/start")
+    yield callback_update(user_id, MenuCallback(action="cuisines").pack())
+    yield callback_update(user_id, MenuCallback(action="categories", cuisine_id="italian").pack())
+    yield callback_update(user_id, MenuCallback(action="items", cuisine_id="italian", category_id="pasta").pack())
+    yield callback_update(user_id, OrderCallback(action="add", item_id="pasta_carbonara").pack())
+    yield callback_update(user_id, NavigationCallback(action="order").pack(), message_text="🛒 Мой заказ")
+
+async def main():
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+
+    session = FakeSession()
+    bot = create_bot(session=session)
+    dp = create_dispatcher()
+    app = create_webhook_app(dp, bot, handle_in_background=False)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET} if WEBHOOK_SECRET else {}
+
+    latencies = []
+    async with TestClient(TestServer(app)) as client:
+        for user_id in range(1, ROUNDS + 1):
+            for update in scenario(user_id):
+                started = time.perf_counter()
+                response = await client.post(WEBHOOK_PATH, json=update, headers=headers)
+                await response.read()
+                latencies.append(time.perf_counter() - started)
+                assert response.status == 200, response.status
+
+    latencies.sort()
+    print(f"обновлений: {len(latencies)}, вызовов Bot API: {len(session.calls)}")
+    print(f"p50: {statistics.median(latencies) * 1e3:.2f} мс")
+    print(f"p95: {latencies[int(len(latencies) * 0.95)] * 1e3:.2f} мс")
+    print(f"p99: {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} мс")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Локальный поддельный сервер Bot API с лимитами как у Telegram
+
+Отвечает на /bot<token>/<method> и возвращает 429, если в один чат
+шлют чаще chat_rate в секунду (с запасом chat_burst сообщений подряд). Нужен, чтобы проверять OutboundScheduler
+без обращения к настоящему Telegram.
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from aiohttp import web
+
+from benchmarks.fake_telegram import BOT_USER
+
+class FakeBotAPI:
+    """Поддельный Bot API со счетчиками запросов и отказов"""
+
+    def __init__(self, chat_rate: float = 1.0, chat_burst: int = 3):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.rejected = 0
+        self._chat_tokens: Dict[str, Tuple[float, float]] = {}
+        self._message_id = 1000
+
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+
+    def _flooded(self, chat_id: str) -> bool:
+        """Проверить ведро токенов чата"""
+        now = time.monotonic()
+        tokens, updated = self._chat_tokens.get(chat_id, (self.chat_burst, now))
+        tokens = min(self.chat_burst, tokens + (now - updated) * self.chat_rate)
+
+        # Небольшой допуск на неточность таймеров клиента
+        if tokens < 0.95:
+            self._chat_tokens[chat_id] = (tokens, now)
+            return True
+        self._chat_tokens[chat_id] = (tokens - 1, now)
+        return False
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        data = await request.post()
+        self.requests[method] += 1
+
+        chat_id = data.get("chat_id")
+        if chat_id and method != "answerCallbackQuery" and self._flooded(chat_id):
+            self.rejected += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            }, status=429)
+
+        if method in ("sendMessage", "editMessageText"):
+            self._message_id += 1
+            result = {
+                "message_id": int(data.get("message_id") or self._message_id),
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "private"},
+                "from": BOT_USER,
+                "text": data.get("text", ""),
+            }
+        elif method == "getMe":
+            result = BOT_USER
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
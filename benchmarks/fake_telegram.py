@@ -0,0 +1,117 @@
+"""
+Поддельная сессия Bot API и генератор синтетических обновлений
+"""
+
+import asyncio
+import itertools
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod, SendMessage, EditMessageText, GetMe
+from aiogram.types import Chat, Message, User
+
+import config
+
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "CulRest"}
+
+def configure_for_benchmarks():
+    """
+    Настройки для прогона бота в бенчмарке
+
+    Хранилища в памяти, журнал заказов во временном каталоге — бенчмарк
+    не пишет в рабочие базы в data/; лимиты отправки сняты, чтобы мерились
+    обработчики, а не лимиты Telegram. Вызывается до импорта main.
+    """
+    config.STORAGE_BACKEND = "memory"
+    config.FSM_STORAGE = "memory"
+    config.ORDER_LOG_PATH = os.path.join(tempfile.mkdtemp(), "orders.log")
+    config.OUTBOUND_GLOBAL_RATE = config.OUTBOUND_CHAT_RATE = config.OUTBOUND_CHAT_BURST = 1e9
+
+class FakeSession(BaseSession):
+    """Сессия, которая не ходит в сеть, а сразу отвечает успехом и запоминает вызовы"""
+
+    def __init__(self, latency: float = 0.0, record: bool = True):
+        super().__init__()
+        self.latency = latency
+        self.record = record
+        self.calls: List[TelegramMethod] = []
+        self.calls_count = 0
+        self._message_ids = itertools.count(1000)
+
+    async def close(self) -> None:
+        pass
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        self.calls_count += 1
+        if self.record:
+            self.calls.append(method)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if isinstance(method, (SendMessage, EditMessageText)):
+            return Message(
+                message_id=getattr(method, "message_id", None) or next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id or 0, type="private"),
+                text=method.text,
+            )
+        if isinstance(method, GetMe):
+            return User(**BOT_USER)
+        return True
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+_update_ids = itertools.count(1)
+
+def _user(user_id: int) -> Dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+def message_update(user_id: int, text: str) -> Dict:
+    """Обновление с текстовым сообщением от пользователя"""
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": next(_update_ids),
+            "date": int(datetime.now().timestamp()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": _user(user_id),
+            "text": text,
+        },
+    }
+
+def callback_update(user_id: int, data: str, message_text: str = "🍽️ Меню", message_id: int = 1) -> Dict:
+    """Обновление с нажатием inline-кнопки под сообщением бота"""
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(datetime.now().timestamp()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": BOT_USER,
+                "text": message_text,
+            },
+        },
+    }
+
+def inline_query_update(user_id: int, query: str, offset: str = "") -> Dict:
+    """Обновление с инлайн-запросом «@бот запрос»"""
+    return {
+        "update_id": next(_update_ids),
+        "inline_query": {
+            "id": str(next(_update_ids)),
+            "from": _user(user_id),
+            "query": query,
+            "offset": offset,
+        },
+    }
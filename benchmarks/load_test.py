@@ -0,0 +1,120 @@
+"""
+Нагрузочный тест диспетчера на синтетических обновлениях
+
+Прогоняет через настоящий Dispatcher со всеми роутерами сценарии
+пользователей (старт, кухня → категория → блюдо, поиск и его вторая
+страница, инлайн-запрос, корзина, оформление) с подмененной сессией
+Bot API и печатает задержки обработчиков, пропускную способность
+и память на пользователя.
+Задержка включает ожидание в цикле событий, пока обрабатываются
+обновления других одновременно активных пользователей.
+
+Запуск: python -m benchmarks.load_test [пользователей] [одновременно]
+"""
+
+import asyncio
+import gc
+import logging
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.fake_telegram import configure_for_benchmarks
+
+configure_for_benchmarks()
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from benchmarks.fake_telegram import FakeSession, callback_update, inline_query_update, message_update
+from main import create_bot, create_dispatcher
+from utils.callback_data import ItemCallback, MenuCallback, NavigationCallback, OrderCallback, SearchCallback
+from utils.data_manager import data_manager
+from utils.pagination import result_token
+
+SEARCH_QUERIES = ["пицца", "суши", "борщ", "паста", "рамен", "карбанара"]
+
+def user_scenario(user_id: int, rnd: random.Random) -> List[Dict]:
+    """Обновления одного пользователя от /start до оформления заказа"""
+    cuisine_id = rnd.choice(list(data_manager.get_cuisines()))
+    category_id = rnd.choice(list(data_manager.get_categories(cuisine_id)))
+    items = data_manager.get_items(cuisine_id, category_id)
+    item_id = rnd.choice(items).id
+    query = rnd.choice(SEARCH_QUERIES)
+
+    updates = [
+        message_update(user_id, "/start"),
+        callback_update(user_id, MenuCallback(action="cuisines").pack()),
+        callback_update(user_id, MenuCallback(action="categories", cuisine_id=cuisine_id).pack()),
+        callback_update(user_id, MenuCallback(action="items", cuisine_id=cuisine_id, category_id=category_id).pack()),
+        callback_update(user_id, ItemCallback(action="view", item_id=item_id).pack()),
+        callback_update(user_id, OrderCallback(action="add", item_id=item_id).pack()),
+        callback_update(user_id, NavigationCallback(action="search").pack()),
+        message_update(user_id, query),
+        callback_update(user_id, SearchCallback(action="page", token=result_token(query), page=1).pack()),
+        inline_query_update(user_id, query[:3]),
+        callback_update(user_id, NavigationCallback(action="order").pack()),
+    ]
+    for _ in range(rnd.randint(0, 3)):
+        updates.append(callback_update(user_id, OrderCallback(action="add", item_id=item_id).pack(), "🛒 Мой заказ"))
+    updates.append(callback_update(user_id, OrderCallback(action="confirm").pack(), "🛒 Мой заказ"))
+    return updates
+
+async def run_user(dp: Dispatcher, bot: Bot, updates: List[Dict], latencies: List[float]):
+    """Отправить обновления пользователя последовательно, как это делает Telegram"""
+    for raw in updates:
+        update = Update.model_validate(raw, context={"bot": bot})
+        started = time.perf_counter()
+        await dp.feed_update(bot, update)
+        latencies.append(time.perf_counter() - started)
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+async def run_users(dp: Dispatcher, bot: Bot, scenarios: List[List[Dict]], concurrency: int) -> List[float]:
+    """Прогнать сценарии пачками по concurrency пользователей, вернуть задержки"""
+    latencies: List[float] = []
+    for offset in range(0, len(scenarios), concurrency):
+        batch = scenarios[offset:offset + concurrency]
+        await asyncio.gather(*(run_user(dp, bot, updates, latencies) for updates in batch))
+    return latencies
+
+async def main(users: int = 2000, concurrency: int = 100):
+    logging.disable(logging.INFO)
+
+    session = FakeSession(record=False)
+    bot = create_bot(session=session)
+    dp = create_dispatcher()
+    rnd = random.Random(1)
+
+    # Замер скорости
+    scenarios = [user_scenario(user_id, rnd) for user_id in range(1, users + 1)]
+    started = time.perf_counter()
+    latencies = await run_users(dp, bot, scenarios, concurrency)
+    elapsed = time.perf_counter() - started
+
+    # Замер памяти на новых пользователях: прирост после прогона, поделенный на их число
+    scenarios = [user_scenario(user_id, rnd) for user_id in range(users + 1, 2 * users + 1)]
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    await run_users(dp, bot, scenarios, concurrency)
+    del scenarios
+    gc.collect()
+    grown = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+    tracemalloc.stop()
+
+    latencies.sort()
+    print(f"пользователей: {users}, одновременно: {concurrency}, обновлений: {len(latencies)}")
+    print(f"обновлений в секунду: {len(latencies) / elapsed:.0f}")
+    print(f"p50: {statistics.median(latencies) * 1e3:.2f} мс, "
+          f"p95: {percentile(latencies, 0.95) * 1e3:.2f} мс, "
+          f"p99: {percentile(latencies, 0.99) * 1e3:.2f} мс")
+    print(f"память на активного пользователя: {grown / users:.0f} байт")
+    print(f"вызовов Bot API: {session.calls_count}")
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -0,0 +1,52 @@
+"""
+Генератор синтетического меню для бенчмарков
+"""
+
+import random
+from typing import Dict, List
+
+WORDS = [
+    "паста", "пицца", "суши", "ролл", "борщ", "пельмени", "рамен", "лапша",
+    "салат", "стейк", "курица", "говядина", "лосось", "тунец", "сыр", "томаты",
+    "грибы", "бекон", "креветки", "рис", "картофель", "соус", "сливки", "базилик",
+    "ёжик", "щавель", "пармезан", "моцарелла", "острый", "запеченный",
+]
+
+SYLLABLES = ["ка", "ро", "ми", "ту", "ле", "са", "по", "ни", "ва", "зо", "ре", "шу", "да", "фи", "го"]
+
+def _make_vocabulary(size: int, seed: int) -> List[str]:
+    """Словарь из реальных и псевдослов, чтобы доля совпадений была близка к реальному меню"""
+    rnd = random.Random(seed)
+    vocabulary = set(WORDS)
+    while len(vocabulary) < size:
+        vocabulary.add("".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))))
+    return sorted(vocabulary)
+
+VOCABULARY = _make_vocabulary(3000, seed=7)
+
+def make_menu(total_items: int, cuisines: int = 10, categories: int = 10, seed: int = 42) -> Dict:
+    """Сгенерировать меню заданного размера в формате data/menu.json"""
+    rnd = random.Random(seed)
+    per_category = max(1, total_items // (cuisines * categories))
+    menu = {"cuisines": {}}
+    counter = 0
+
+    for c in range(cuisines):
+        cuisine = {"name": f"Кухня {c}", "emoji": "🍽️", "categories": {}}
+        for k in range(categories):
+            items = []
+            for _ in range(per_category):
+                name_words = rnd.sample(VOCABULARY, 2)
+                items.append({
+                    "id": f"item_{counter}",
+                    "name": " ".join(name_words).capitalize(),
+                    "description": " ".join(rnd.sample(VOCABULARY, 6)),
+                    "price": rnd.randrange(100, 1500, 10),
+                    "image": "🍽️",
+                    "ingredients": rnd.sample(VOCABULARY, 4),
+                })
+                counter += 1
+            cuisine["categories"][f"cat_{c}_{k}"] = {"name": f"Категория {k}", "emoji": "🍴", "items": items}
+        menu["cuisines"][f"cuisine_{c}"] = cuisine
+
+    return menu
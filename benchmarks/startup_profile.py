@@ -0,0 +1,96 @@
+"""
+Профиль холодного старта бота
+
+- время импорта модулей (python -X importtime), самые дорогие первыми;
+- время от запуска процесса до обработки первого обновления по этапам:
+  импорт main, create_app, загрузка меню, первое обновление.
+
+Каждый замер идет в отдельном процессе, чтобы кэш модулей не искажал результат.
+
+Запуск: python -m benchmarks.startup_profile [сколько модулей показать]
+"""
+
+import json
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+def import_times() -> List[Tuple[str, int, int]]:
+    """(модуль, собственное время, суммарное время) в микросекундах для import main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True
+    )
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+def first_update_phases() -> Dict[str, float]:
+    """Запустить дочерний процесс и получить отметки времени его этапов"""
+    spawned = time.time()
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_profile", "--child"],
+        capture_output=True, text=True, check=True
+    )
+    marks = json.loads(result.stdout.strip().splitlines()[-1])
+    return {phase: (stamp - spawned) * 1e3 for phase, stamp in marks.items()}
+
+def child():
+    """Дочерний процесс: пройти весь путь до первого обработанного обновления"""
+    import asyncio
+    import logging
+
+    marks = {"interpreter": time.time()}
+
+    from benchmarks.fake_telegram import FakeSession, configure_for_benchmarks, message_update
+    configure_for_benchmarks()
+
+    from aiogram.types import Update
+
+    import main
+    marks["import main"] = time.time()
+
+    logging.disable(logging.INFO)
+    bot, dp = main.create_app(session=FakeSession())
+    marks["create_app"] = time.time()
+
+    main.data_manager.load()
+    marks["menu loaded"] = time.time()
+
+    update = Update.model_validate(message_update(1, "/start"), context={"bot": bot})
+    asyncio.run(dp.feed_update(bot, update))
+    marks["first update"] = time.time()
+
+    print(json.dumps(marks))
+
+def main(top: int = 15):
+    times = import_times()
+    total = max(cumulative for _, _, cumulative in times)
+
+    print(f"Импорт main: {total / 1e3:.0f} мс")
+    print(f"{'модуль':<48} | {'свое, мс':>9} | {'всего, мс':>9}")
+    for name, self_us, cumulative_us in sorted(times, key=lambda row: row[2], reverse=True)[:top]:
+        print(f"{name:<48} | {self_us / 1e3:>9.1f} | {cumulative_us / 1e3:>9.1f}")
+
+    own = [row for row in times if row[0].split(".")[0] in ("main", "config", "handlers", "keyboards", "middlewares", "states", "utils")]
+    print("\nМодули бота")
+    for name, self_us, cumulative_us in sorted(own, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"{name:<48} | {self_us / 1e3:>9.1f} | {cumulative_us / 1e3:>9.1f}")
+
+    print("\nОт запуска процесса до первого обновления")
+    previous = 0.0
+    for phase, elapsed in first_update_phases().items():
+        print(f"{phase:<16} | {elapsed:>8.0f} мс | +{elapsed - previous:.0f} мс")
+        previous = elapsed
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main(*(int(arg) for arg in sys.argv[1:2]))
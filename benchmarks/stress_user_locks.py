@@ -0,0 +1,138 @@
+"""
+Стресс-тест очередности обработчиков одного пользователя
+
+Один пользователь очень быстро нажимает «➕» и «Оформить заказ» под
+сообщением с корзиной; все нажатия обрабатываются одновременно, а Bot API
+отвечает со случайной задержкой. После каждой серии проверяется:
+
+- сумма в каждом показанном чеке равна сумме его строк;
+- ни одна добавленная порция не потерялась и не попала в два заказа:
+  порций в новых заказах журнала и в корзине столько же, сколько
+  успешных добавлений (чек, который до отправки подменила более новая
+  правка того же сообщения, на экран не попадает, поэтому порции
+  считаются по журналу);
+- последним на экране осталось текущее состояние корзины.
+
+Запуск: python -m benchmarks.stress_user_locks [--no-locks]
+С --no-locks тот же сценарий идет без блокировок пользователей для сравнения.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import sys
+from typing import Any, List, Optional
+
+import config
+from benchmarks.fake_telegram import configure_for_benchmarks
+
+configure_for_benchmarks()
+if "--no-locks" in sys.argv:
+    config.USER_LOCK_SHARDS = 0
+
+from aiogram import Bot
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, TelegramMethod
+from aiogram.types import Update
+
+from benchmarks.fake_telegram import FakeSession, callback_update
+from main import create_bot, create_dispatcher
+from utils.callback_data import OrderCallback
+from utils.data_manager import data_manager
+from utils.user_locks import user_locks
+
+USER_ID = 1
+ROUNDS = 50
+BURST = 20            # одновременных нажатий в серии
+CONFIRM_SHARE = 0.2   # доля нажатий «Оформить заказ»
+MAX_LATENCY = 0.005   # секунд, максимальная задержка ответа Bot API
+
+LINE = re.compile(r"(\d+) × (\d+(?:\.\d+)?)₽ = (\d+(?:\.\d+)?)₽")
+RECEIPT_TOTAL = re.compile(r"К оплате: (\d+(?:\.\d+)?)₽")
+
+class JitterSession(FakeSession):
+    """
+    Поддельная сессия со случайной задержкой каждого вызова
+
+    Вызов запоминается, когда «доходит до Telegram», то есть после задержки:
+    одновременные правки сообщения применяются не в том порядке, в котором отправлены.
+    """
+
+    def __init__(self, seed: int = 0):
+        super().__init__()
+        self.rnd = random.Random(seed)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        await asyncio.sleep(self.rnd.uniform(0, MAX_LATENCY))
+        return await super().make_request(bot, method, timeout)
+
+def check_round(calls: List[TelegramMethod], quantity_before: int, orders_before: int) -> List[str]:
+    """Нарушения за одну серию нажатий"""
+    errors = []
+
+    added = sum(1 for call in calls if isinstance(call, AnswerCallbackQuery) and "добавлено в заказ" in (call.text or ""))
+    edits = [call.text for call in calls if isinstance(call, EditMessageText)]
+
+    for text in edits:
+        if "Чек заказа" not in text:
+            continue
+        lines = LINE.findall(text)
+        total = float(RECEIPT_TOTAL.search(text).group(1))
+        if abs(sum(float(subtotal) for _, _, subtotal in lines) - total) > 1e-6:
+            errors.append(f"сумма чека {total} не равна сумме строк")
+
+    order_log = data_manager.order_log
+    new_orders = order_log.history(USER_ID, 0, order_log.count(USER_ID) - orders_before)
+    receipted = sum(line.quantity for record in new_orders for line in record.lines)
+
+    order = data_manager.get_order(USER_ID)
+    in_cart = sum(order.quantities)
+    if quantity_before + added != receipted + in_cart:
+        errors.append(f"порций было {quantity_before}, добавлено {added}, в заказах {receipted}, в корзине {in_cart}")
+
+    if edits and in_cart and f"Итого: {order.total}₽" not in edits[-1]:
+        errors.append("на экране осталась устаревшая корзина")
+    return errors
+
+async def run(seed: int = 0) -> int:
+    session = JitterSession(seed)
+    bot = create_bot(session=session)
+    dp = create_dispatcher()
+    data_manager.load()
+
+    rnd = random.Random(seed)
+    item_ids = list(data_manager.snapshot.items_by_id)[:5]
+    violations = 0
+
+    for _ in range(ROUNDS):
+        quantity_before = sum(data_manager.get_order(USER_ID).quantities)
+        orders_before = data_manager.order_log.count(USER_ID)
+        session.calls.clear()
+
+        updates = []
+        for _ in range(BURST):
+            if rnd.random() < CONFIRM_SHARE:
+                data = OrderCallback(action="confirm").pack()
+            else:
+                data = OrderCallback(action="add", item_id=rnd.choice(item_ids)).pack()
+            raw = callback_update(USER_ID, data, "🛒 Мой заказ")
+            updates.append(Update.model_validate(raw, context={"bot": bot}))
+
+        await asyncio.gather(*(dp.feed_update(bot, update) for update in updates))
+
+        for error in check_round(session.calls, quantity_before, orders_before):
+            violations += 1
+            print(f"  ✗ {error}")
+
+    locks = "включены" if config.USER_LOCK_SHARDS else "выключены"
+    print(f"блокировки {locks}: серий {ROUNDS} по {BURST} нажатий, нарушений {violations}, "
+          f"ожиданий блокировки {user_locks.contended}, блокировок в таблице после теста {len(user_locks)}")
+    return violations
+
+def main():
+    logging.disable(logging.WARNING)
+    violations = asyncio.run(run())
+    assert config.USER_LOCK_SHARDS == 0 or violations == 0, "состояние корзины разошлось с чеками"
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,110 @@
 # Токен бота
 BOT_TOKEN = "7982074469:AAFFh-TSzQqNWYB-ze9-5T965AW0CPzqlwc"
 
+# Режим получения обновлений: "polling" или "webhook"
+RUN_MODE = "polling"
+
+# Настройки вебхука
+WEBHOOK_URL = "https://example.com"  # внешний адрес, на который Telegram шлет обновления
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_PORT = 8080
+WEBHOOK_SECRET = ""                  # проверяется в заголовке X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_WORKERS = 1                  # процессов за одним портом; больше одного — только с общим хранилищем (см. ниже)
+
+# Лимиты исходящих запросов к Bot API
+OUTBOUND_GLOBAL_RATE = 30   # запросов в секунду на весь бот
+OUTBOUND_CHAT_RATE = 1      # сообщений в секунду в один чат
+OUTBOUND_CHAT_BURST = 3     # сколько сообщений в чат можно отправить подряд без ожидания
+OUTBOUND_MAX_RETRIES = 3
+
 # Настройки
 MAX_ITEMS_PER_PAGE = 5
 MAX_FAVORITES = 20
 MAX_ORDER_ITEMS = 50
+RESULT_CACHE_SIZE = 1000    # наборов результатов поиска, которые листаются без пересчета
+
+# Кэш результатов поиска по запросу
+SEARCH_CACHE_SIZE = 1_000_000           # номеров найденных блюд во всех записях вместе
+SEARCH_CACHE_TTL = 30 * 60              # секунд жизни записи
+SEARCH_CACHE_LOG_INTERVAL = 10 * 60     # секунд между записями статистики в лог
+
+# Инлайн-режим (@бот запрос); включается у @BotFather командой /setinline
+INLINE_RESULTS_PER_PAGE = 20    # результатов в ответе, до 50; остальные догружаются при прокрутке
+INLINE_CACHE_TIME = 300         # секунд, сколько Telegram хранит ответ на запрос
+
+# Администраторы: правка цен и наличия блюд без перезапуска (/admin)
+ADMIN_IDS = []                      # user_id администраторов
+ADMIN_IMPORT_MAX_SIZE = 1024 * 1024 # байт в файле правок CSV/JSON
+
+# Подбор блюд по фильтрам
+FILTER_PRICE_STEPS = [300, 400, 500, 800]   # варианты «не дороже», ₽
+FILTER_EXCLUSIONS = [                        # до 30 групп: выбранные хранятся битами в callback
+    ("🐷 Без свинины", ["свинина", "бекон", "пепперони", "колбаса", "свиная кость"]),
+    ("🥩 Без мяса", ["мясо", "говядина", "свинина", "бекон", "пепперони", "колбаса", "свиная кость"]),
+    ("🦐 Без морепродуктов", ["креветки", "краб", "лосось", "икра тобико"]),
+    ("🥛 Без молочного", ["сливки", "сливочное масло", "сливочный сыр", "сметана", "моцарелла", "пармезан", "горгонзола", "рикотта"]),
+    ("🥜 Без орехов", ["арахис"]),
+]
+
+# Ключ подписи бинарных снимков меню (data/*.snapshot); пусто — выводится из BOT_TOKEN.
+# Снимок без верной подписи не загружается, так что запись в data/ не дает выполнить код
+MENU_SNAPSHOT_KEY = ""
+
+# Интервал проверки data/menu.json на изменения, секунд
+MENU_RELOAD_INTERVAL = 5
+
+# Несколько заведений в одном процессе: меню заведения лежит в MENU_DIR/<заведение>.json,
+# data/menu.json — меню заведения DEFAULT_TENANT
+MENU_DIR = "data/menus"
+DEFAULT_TENANT = "default"
+TENANT_BOTS = {}    # токен бота → заведение; боты из этого списка запускаются вместе с основным (long polling)
+TENANT_CHATS = {}   # chat_id → заведение, если один бот обслуживает несколько заведений
+
+# Обработчики корзины и избранного одного пользователя выполняются по очереди
+USER_LOCK_SHARDS = 64   # шардов таблицы блокировок; 0 — без блокировок
+
+# Кэш готовых клавиатур
+KEYBOARD_CACHE_SIZE = 1024
+KEYBOARD_CACHE_LOG_INTERVAL = 10 * 60  # секунд между записями статистики в лог
+
+# Пропуск правок сообщений, которые ничего не меняют
+RENDER_CACHE_SIZE = 50000               # сообщений, для которых помним последнее содержимое
+RENDER_STATS_LOG_INTERVAL = 60 * 60     # секунд между записями статистики в лог
+
+# Метрики в формате Prometheus
+METRICS_HOST = "0.0.0.0"
+METRICS_PORT = 9100                     # в режиме long polling; 0 — не поднимать сервер
+METRICS_PATH = "/metrics"               # в режиме вебхука отдается тем же сервером
+METRICS_LOG_INTERVAL = 60               # секунд между сводками в логе
+
+# Хранилище избранного и корзин: "memory", "sqlite" или "shared" (общее для нескольких процессов бота)
+STORAGE_BACKEND = "sqlite"
+STORAGE_PATH = "data/users.db"
+STORAGE_BATCH_SIZE = 500      # записей в одной транзакции
+STORAGE_CACHE_SIZE = 10000    # пользователей в кэше SQLite-хранилища
+STORAGE_FLUSH_INTERVAL = 1    # секунд между сбросами изменений на диск
+
+# Общее состояние нескольких процессов бота (STORAGE_BACKEND = "shared")
+SHARED_STATE_URLS = ["local"]   # адрес на каждый шард, например "redis://redis:6379/0"; "local" — в памяти процесса
+SHARED_STATE_PREFIX = "culrest" # префикс ключей
+SHARED_CAS_RETRIES = 10         # попыток записи, если запись успел изменить другой процесс
+SHARED_CACHE_TTL = 2.0          # секунд, сколько избранное читается из локального кэша
+SHARED_CACHE_SIZE = 10000       # пользователей в локальном кэше избранного
+
+# Журнал оформленных заказов: дописывается в конец, рядом лежит индекс <журнал>.idx
+ORDER_LOG_PATH = "data/orders.log"
+ORDER_LOG_BATCH_SIZE = 256    # заказов в одной записи на диск (один fsync на пачку)
+
+# Хранилище состояний FSM: "memory", "sqlite" или "redis" (общее для нескольких процессов бота)
+FSM_STORAGE = "sqlite"
+FSM_STORAGE_PATH = "data/fsm.db"
+FSM_REDIS_URL = "redis://localhost:6379/0"  # для FSM_STORAGE = "redis"
+FSM_STATE_TTL = 24 * 60 * 60  # секунд до сброса неактивного состояния
+FSM_BATCH_SIZE = 500
+FSM_CACHE_SIZE = 10000
+FSM_FLUSH_INTERVAL = 1        # секунд между сбросами состояний на диск
+FSM_EXPIRE_INTERVAL = 10 * 60 # секунд между очистками устаревших состояний
 
 # Эмодзи для интерфейса
 EMOJI = {
@@ -24,5 +124,7 @@ EMOJI = {
     "delete": "🗑️",
     "edit": "✏️",
     "confirm": "✅",
-    "cancel": "❌"
+    "cancel": "❌",
+    "history": "📜",
+    "filter": "🎛"
 }
@@ -1,15 +1,24 @@
 """
 Обработчики для ресторанного бота
+
+Модули роутеров импортируются при первом обращении:
+`from handlers import menu_handlers` загружает только menu_handlers.
 """
 
-from . import menu_handlers
-from . import search_handlers  
-from . import order_handlers
-from . import favorites_handlers
+import importlib
 
 __all__ = [
     "menu_handlers",
-    "search_handlers", 
+    "search_handlers",
     "order_handlers",
-    "favorites_handlers"
+    "favorites_handlers",
+    "history_handlers",
+    "filter_handlers",
+    "inline_handlers",
+    "admin_handlers"
 ]
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
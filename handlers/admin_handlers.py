@@ -0,0 +1,112 @@
+"""
+Обработчики администратора: цены и наличие блюд без перезапуска бота
+
+Доступны только пользователям из ADMIN_IDS, остальным эти команды
+не отвечают. Правки применяются к меню заведения, в чьем боте или чате
+отправлена команда, и действуют до следующего изменения файла меню.
+"""
+
+import asyncio
+from typing import List
+
+from aiogram import Bot, Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from utils.catalogue import MenuItem
+from utils.data_manager import data_manager
+from utils.menu_updates import ItemUpdate, MenuUpdateError, parse_price, parse_updates
+from config import ADMIN_IDS, ADMIN_IMPORT_MAX_SIZE
+
+router = Router(name="admin")
+router.message.filter(F.from_user.id.in_(set(ADMIN_IDS)))
+
+# Сколько измененных блюд перечислять в ответе
+SUMMARY_ITEMS = 10
+
+# Пакеты применяются по одному: следующий строится от снимка с предыдущим
+_apply_lock = asyncio.Lock()
+
+ADMIN_HELP = """🛠 <b>Управление меню</b>
+
+/soldout <i>id [id ...]</i> — блюда закончились
+/instock <i>id [id ...]</i> — блюда снова в наличии
+/price <i>id цена [id цена ...]</i> — новые цены
+
+Пакет правок можно прислать файлом CSV с колонками <code>id,price,available</code> \
+или JSON — списком объектов с теми же полями. Пакет применяется целиком \
+или не применяется вовсе, если в нем есть ошибка или неизвестное блюдо."""
+
+def updates_summary(changed: List[MenuItem], requested: int) -> str:
+    """Ответ на пакет правок: сколько блюд изменилось и какие"""
+    if not changed:
+        return f"ℹ️ Правок: {requested}, меню уже в таком состоянии"
+
+    lines = [f"✅ Изменено блюд: {len(changed)} из {requested}"]
+    for item in changed[:SUMMARY_ITEMS]:
+        state = "в наличии" if item.available else "нет в наличии"
+        lines.append(f"{item.image} {item.name} — {item.price}₽, {state}")
+    if len(changed) > SUMMARY_ITEMS:
+        lines.append(f"… и еще {len(changed) - SUMMARY_ITEMS}")
+    return "\n".join(lines)
+
+async def apply_updates(message: Message, updates: List[ItemUpdate]):
+    """Применить пакет и ответить итогом или ошибкой"""
+    manager = data_manager.current()
+    async with _apply_lock:
+        try:
+            # Запись файла правок и пересборка фасетов при смене цен — в потоке,
+            # снимок подменяется здесь, в цикле событий, как при перезагрузке меню
+            base, patched, changed = await asyncio.to_thread(manager.prepare_updates, updates)
+        except MenuUpdateError as e:
+            await message.answer(f"❌ Правки не применены: {e}")
+            return
+        manager.swap_patched(base, patched)
+    await message.answer(updates_summary(changed, len(updates)))
+
+@router.message(Command("admin"))
+async def admin_help(message: Message):
+    """Список команд администратора"""
+    await message.answer(ADMIN_HELP)
+
+@router.message(Command("soldout", "instock"))
+async def set_availability(message: Message, command: CommandObject):
+    """Отметить блюда закончившимися или снова доступными"""
+    item_ids = (command.args or "").split()
+    if not item_ids:
+        await message.answer(f"⚠️ Укажите ID блюд: /{command.command} <i>id [id ...]</i>")
+        return
+
+    available = command.command == "instock"
+    await apply_updates(message, [ItemUpdate(item_id, available=available) for item_id in item_ids])
+
+@router.message(Command("price"))
+async def set_price(message: Message, command: CommandObject):
+    """Поменять цены блюд"""
+    args = (command.args or "").split()
+    if not args or len(args) % 2:
+        await message.answer("⚠️ Укажите пары ID и цены: /price <i>id цена [id цена ...]</i>")
+        return
+
+    try:
+        updates = [ItemUpdate(item_id, price=parse_price(price)) for item_id, price in zip(args[::2], args[1::2])]
+    except ValueError as e:
+        await message.answer(f"❌ Правки не применены: {e}")
+        return
+    await apply_updates(message, updates)
+
+@router.message(F.document)
+async def import_updates(message: Message, bot: Bot):
+    """Пакет правок из файла CSV или JSON"""
+    document = message.document
+    if document.file_size and document.file_size > ADMIN_IMPORT_MAX_SIZE:
+        await message.answer(f"❌ Файл больше {ADMIN_IMPORT_MAX_SIZE // 1024} КБ")
+        return
+
+    data = await bot.download(document)
+    try:
+        updates = parse_updates(data.read(), document.file_name or "")
+    except MenuUpdateError as e:
+        await message.answer(f"❌ Правки не применены: {e}")
+        return
+    await apply_updates(message, updates)
@@ -8,102 +8,92 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from utils.callback_data import NavigationCallback, FavoritesCallback, ItemCallback
 from utils.data_manager import data_manager
-from keyboards.navigation_keyboards import back_to_main_keyboard
-from config import EMOJI, MAX_ITEMS_PER_PAGE
+from utils.pagination import SequenceSource, paginate
+from utils.render import renderer
+from utils.user_locks import user_lock
+from keyboards.navigation_keyboards import back_to_main_keyboard, pagination_buttons
+from keyboards.menu_keyboards import item_keyboard
+from config import EMOJI, MAX_FAVORITES
 
-router = Router()
+router = Router(name="favorites")
 
 @router.callback_query(NavigationCallback.filter(F.action == "favorites"))
 async def show_favorites(callback: CallbackQuery):
     """Показать избранные блюда"""
+    await show_favorites_page(callback, 0)
+    await callback.answer()
+
+@router.callback_query(FavoritesCallback.filter(F.action == "page"))
+async def show_favorites_page_callback(callback: CallbackQuery, callback_data: FavoritesCallback):
+    """Показать страницу избранного"""
+    await show_favorites_page(callback, callback_data.page)
+    await callback.answer()
+
+async def show_favorites_page(callback: CallbackQuery, page: int = 0):
+    """Показать страницу избранного"""
     user_id = callback.from_user.id
-    favorites = data_manager.get_user_favorites(user_id)
+    # Избранное ограничено MAX_FAVORITES, блюда по номерам достаются целиком
+    async with user_lock(user_id):
+        items = await data_manager.offload(data_manager.get_user_favorites, user_id)
+    favorites = paginate(SequenceSource(items), page)
 
-    if not favorites:
+    if not favorites.total:
         text = f"""
 {EMOJI['favorites']} <b>Избранное</b>
 
 У вас пока нет избранных блюд.
 Добавляйте блюда в избранное через меню!
 """
-        await callback.message.edit_text(
+        await renderer.edit_text(
+            callback.message,
             text,
             reply_markup=back_to_main_keyboard()
         )
-    else:
-        await show_favorites_page(callback, favorites, 0)
-
-    await callback.answer()
-
-@router.callback_query(FavoritesCallback.filter(F.action == "page"))
-async def show_favorites_page_callback(callback: CallbackQuery, callback_data: FavoritesCallback):
-    """Показать страницу избранного"""
-    user_id = callback.from_user.id
-    favorites = data_manager.get_user_favorites(user_id)
-    page = callback_data.page
-
-    await show_favorites_page(callback, favorites, page)
-    await callback.answer()
+        return
 
-async def show_favorites_page(callback: CallbackQuery, favorites: list, page: int = 0):
-    """Показать страницу избранного"""
     builder = InlineKeyboardBuilder()
 
-    # Пагинация
-    start_idx = page * MAX_ITEMS_PER_PAGE
-    end_idx = start_idx + MAX_ITEMS_PER_PAGE
-    page_favorites = favorites[start_idx:end_idx]
-
-    text = f"{EMOJI['favorites']} <b>Избранное ({len(favorites)} блюд)</b>\n\n"
+    text = f"{EMOJI['favorites']} <b>Избранное ({favorites.total} блюд)</b>\n\n"
 
-    for i, item in enumerate(page_favorites, start_idx + 1):
-        emoji = item.get("image", "🍽️")
-        name = item.get("name", "Блюдо")
-        price = item.get("price", 0)
+    for i, item in enumerate(favorites.items, favorites.start):
+        emoji = item.image
+        name = item.name
+        price = item.price
 
         text += f"{i}. {emoji} {name} - {price}₽\n"
 
         builder.button(
             text=f"{emoji} {name}",
-            callback_data=ItemCallback(action="view", item_id=item["id"], page=page)
+            callback_data=ItemCallback(action="view", item_id=item.id, page=favorites.number)
         )
+    sizes = [1] * len(favorites.items)
 
     # Пагинация
-    total_pages = (len(favorites) + MAX_ITEMS_PER_PAGE - 1) // MAX_ITEMS_PER_PAGE
-    if total_pages > 1:
-        pagination_row = []
-
-        if page > 0:
-            pagination_row.append(
-                builder.button(
-                    text="◀️",
-                    callback_data=FavoritesCallback(action="page", page=page - 1)
-                )
-            )
-
-        pagination_row.append(
-            builder.button(
-                text=f"{page + 1}/{total_pages}",
-                callback_data="ignore"
-            )
-        )
-
-        if page < total_pages - 1:
-            pagination_row.append(
-                builder.button(
-                    text="▶️", 
-                    callback_data=FavoritesCallback(action="page", page=page + 1)
-                )
-            )
+    pagination = pagination_buttons(builder, favorites, FavoritesCallback(action="page", page=favorites.number))
+    if pagination:
+        sizes.append(pagination)
 
     builder.button(
         text=f"{EMOJI['home']} Главное меню",
         callback_data=NavigationCallback(action="main")
     )
 
-    builder.adjust(1)
+    builder.adjust(*sizes, 1)
 
-    await callback.message.edit_text(text, reply_markup=builder.as_markup())
+    await renderer.edit_text(callback.message, text, reply_markup=builder.as_markup())
+
+async def update_item_keyboard(callback: CallbackQuery, item_id: str, page: int):
+    """
+    Перерисовать клавиатуру блюда по текущему избранному
+
+    Избранное читается под блокировкой пользователя, а правка уходит в очередь
+    сразу после чтения: при быстрых нажатиях последней остается клавиатура
+    по последнему состоянию.
+    """
+    user_id = callback.from_user.id
+    async with user_lock(user_id):
+        keyboard = await data_manager.offload(item_keyboard, item_id, user_id, page)
+    await renderer.edit_reply_markup(callback.message, keyboard)
 
 @router.callback_query(FavoritesCallback.filter(F.action == "add"))
 async def add_to_favorites(callback: CallbackQuery, callback_data: FavoritesCallback):
@@ -116,17 +106,20 @@ async def add_to_favorites(callback: CallbackQuery, callback_data: FavoritesCall
         await callback.answer("❌ Блюдо не найдено")
         return
 
-    if data_manager.add_to_favorites(user_id, item_id):
-        name = item.get("name", "Блюдо")
+    async with user_lock(user_id):
+        added = await data_manager.offload(data_manager.add_to_favorites, user_id, item_id)
+        in_favorites = added or await data_manager.offload(data_manager.is_in_favorites, user_id, item_id)
+
+    if added:
+        name = item.name
         await callback.answer(f"⭐ {name} добавлено в избранное!")
 
         # Обновляем клавиатуру блюда
-        page = callback_data.page
-        from keyboards.menu_keyboards import item_keyboard
-        new_keyboard = item_keyboard(item_id, user_id, page)
-        await callback.message.edit_reply_markup(reply_markup=new_keyboard)
-    else:
+        await update_item_keyboard(callback, item_id, callback_data.page)
+    elif in_favorites:
         await callback.answer("⚠️ Блюдо уже в избранном")
+    else:
+        await callback.answer(f"⚠️ В избранном не может быть больше {MAX_FAVORITES} блюд")
 
 @router.callback_query(FavoritesCallback.filter(F.action == "remove"))
 async def remove_from_favorites(callback: CallbackQuery, callback_data: FavoritesCallback):
@@ -139,14 +132,14 @@ async def remove_from_favorites(callback: CallbackQuery, callback_data: Favorite
         await callback.answer("❌ Блюдо не найдено")
         return
 
-    if data_manager.remove_from_favorites(user_id, item_id):
-        name = item.get("name", "Блюдо")
+    async with user_lock(user_id):
+        removed = await data_manager.offload(data_manager.remove_from_favorites, user_id, item_id)
+
+    if removed:
+        name = item.name
         await callback.answer(f"🗑️ {name} удалено из избранного")
 
         # Обновляем клавиатуру блюда
-        page = callback_data.page
-        from keyboards.menu_keyboards import item_keyboard
-        new_keyboard = item_keyboard(item_id, user_id, page)
-        await callback.message.edit_reply_markup(reply_markup=new_keyboard)
+        await update_item_keyboard(callback, item_id, callback_data.page)
     else:
         await callback.answer("⚠️ Блюдо не найдено в избранном")
@@ -0,0 +1,139 @@
+"""
+Обработчики подбора блюд по цене и составу
+"""
+
+from typing import List
+
+from aiogram import Router, F
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from utils.callback_data import FilterCallback, ItemCallback, NavigationCallback
+from utils.data_manager import data_manager
+from utils.facets import FacetResult
+from utils.pagination import paginate
+from utils.render import renderer
+from keyboards.navigation_keyboards import pagination_buttons
+from config import EMOJI, FILTER_EXCLUSIONS, FILTER_PRICE_STEPS
+
+router = Router(name="filter")
+
+def excluded_ingredients(exclude: int) -> List[str]:
+    """Ингредиенты выбранных групп исключений"""
+    ingredients = []
+    for bit, (_, names) in enumerate(FILTER_EXCLUSIONS):
+        if exclude >> bit & 1:
+            ingredients.extend(names)
+    return ingredients
+
+def apply_filters(filters: FilterCallback) -> FacetResult:
+    """Блюда под фильтры из кнопки"""
+    return data_manager.filter_items(
+        max_price=filters.price or None,
+        exclude=excluded_ingredients(filters.exclude),
+        descending=filters.desc
+    )
+
+def describe_filters(filters: FilterCallback) -> str:
+    """Выбранные фильтры текстом"""
+    price = f"до {filters.price}₽" if filters.price else "любая"
+    groups = [label for bit, (label, _) in enumerate(FILTER_EXCLUSIONS) if filters.exclude >> bit & 1]
+    order = "сначала дороже" if filters.desc else "сначала дешевле"
+
+    text = f"💰 Цена: {price}\n"
+    if groups:
+        text += f"🚫 {', '.join(groups)}\n"
+    text += f"↕️ Сортировка: {order}"
+    return text
+
+def filters_keyboard(filters: FilterCallback, found: int) -> InlineKeyboardMarkup:
+    """Переключатели фильтров: каждая кнопка несет состояние после нажатия"""
+    builder = InlineKeyboardBuilder()
+    sizes = []
+
+    for price in FILTER_PRICE_STEPS + [0]:
+        label = f"до {price}₽" if price else "любая"
+        mark = "✅ " if filters.price == price else ""
+        builder.button(
+            text=f"{mark}{label}",
+            callback_data=filters.model_copy(update={"action": "show", "price": price})
+        )
+    sizes.append(len(FILTER_PRICE_STEPS) + 1)
+
+    for bit, (label, _) in enumerate(FILTER_EXCLUSIONS):
+        mark = "✅ " if filters.exclude >> bit & 1 else ""
+        builder.button(
+            text=f"{mark}{label}",
+            callback_data=filters.model_copy(update={"action": "show", "exclude": filters.exclude ^ (1 << bit)})
+        )
+        sizes.append(1)
+
+    builder.button(
+        text="↕️ Сначала дешевле" if filters.desc else "↕️ Сначала дороже",
+        callback_data=filters.model_copy(update={"action": "show", "desc": not filters.desc})
+    )
+    builder.button(
+        text=f"{EMOJI['search']} Показать ({found})",
+        callback_data=filters.model_copy(update={"action": "results", "page": 0})
+    )
+    builder.button(
+        text=f"{EMOJI['home']} Главное меню",
+        callback_data=NavigationCallback(action="main")
+    )
+    sizes.extend([1, 1, 1])
+
+    builder.adjust(*sizes)
+    return builder.as_markup()
+
+@router.callback_query(FilterCallback.filter(F.action == "show"))
+async def show_filters(callback: CallbackQuery, callback_data: FilterCallback):
+    """Показать фильтры и число подходящих блюд"""
+    found = len(apply_filters(callback_data))
+
+    text = f"{EMOJI['filter']} <b>Подбор блюд</b>\n\n"
+    text += describe_filters(callback_data)
+    text += f"\n\nНайдено блюд: <b>{found}</b>"
+
+    await renderer.edit_text(callback.message, text, reply_markup=filters_keyboard(callback_data, found))
+    await callback.answer()
+
+@router.callback_query(FilterCallback.filter(F.action == "results"))
+async def show_results(callback: CallbackQuery, callback_data: FilterCallback):
+    """Показать страницу подобранных блюд"""
+    found = paginate(apply_filters(callback_data), callback_data.page)
+
+    builder = InlineKeyboardBuilder()
+    sizes = []
+
+    text = f"{EMOJI['filter']} <b>Подбор блюд ({found.total})</b>\n"
+    text += describe_filters(callback_data) + "\n\n"
+
+    if not found.items:
+        text += "😔 Под эти условия ничего не подходит"
+
+    for i, item in enumerate(found.items, found.start):
+        text += f"{i}. {item.image} {item.name} - {item.price}₽\n"
+        builder.button(
+            text=f"{item.image} {item.name}",
+            callback_data=ItemCallback(action="view", item_id=item.id)
+        )
+        sizes.append(1)
+
+    # Пагинация
+    pagination = pagination_buttons(builder, found, callback_data.model_copy(update={"page": found.number}))
+    if pagination:
+        sizes.append(pagination)
+
+    builder.button(
+        text=f"{EMOJI['filter']} Изменить фильтры",
+        callback_data=callback_data.model_copy(update={"action": "show", "page": 0})
+    )
+    builder.button(
+        text=f"{EMOJI['home']} Главное меню",
+        callback_data=NavigationCallback(action="main")
+    )
+    sizes.extend([1, 1])
+    builder.adjust(*sizes)
+
+    await renderer.edit_text(callback.message, text, reply_markup=builder.as_markup())
+    await callback.answer()
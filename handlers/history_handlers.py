@@ -0,0 +1,113 @@
+"""
+Обработчики истории заказов
+"""
+
+import asyncio
+import time
+
+from aiogram import Router, F
+from aiogram.types import CallbackQuery
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from utils.callback_data import HistoryCallback, NavigationCallback
+from utils.data_manager import data_manager
+from utils.order_log import OrderRecord
+from utils.pagination import LazySource, paginate
+from utils.render import renderer
+from keyboards.navigation_keyboards import back_to_main_keyboard, pagination_buttons
+from config import EMOJI
+
+router = Router(name="history")
+
+def order_date(record: OrderRecord) -> str:
+    return time.strftime("%d.%m.%Y %H:%M", time.localtime(record.created))
+
+@router.callback_query(NavigationCallback.filter(F.action == "history"))
+async def show_history(callback: CallbackQuery):
+    """Показать прошлые заказы"""
+    await show_history_page(callback, 0)
+    await callback.answer()
+
+@router.callback_query(HistoryCallback.filter(F.action == "page"))
+async def show_history_page_callback(callback: CallbackQuery, callback_data: HistoryCallback):
+    """Показать страницу истории заказов"""
+    await show_history_page(callback, callback_data.page)
+    await callback.answer()
+
+async def show_history_page(callback: CallbackQuery, page: int = 0):
+    """Показать страницу истории: новые заказы первыми"""
+    user_id = callback.from_user.id
+    order_log = data_manager.order_log
+
+    total = order_log.count(user_id)
+    if not total:
+        text = f"""
+{EMOJI['history']} <b>Мои заказы</b>
+
+Вы еще ничего не заказывали.
+"""
+        await renderer.edit_text(callback.message, text, reply_markup=back_to_main_keyboard())
+        return
+
+    # Чтение с диска — в отдельном потоке, чтобы не задерживать других пользователей
+    source = LazySource(total, lambda offset, limit: order_log.history(user_id, offset // limit, limit))
+    records = await asyncio.to_thread(paginate, source, page)
+
+    builder = InlineKeyboardBuilder()
+    text = f"{EMOJI['history']} <b>Мои заказы ({total})</b>\n\n"
+
+    for record in records.items:
+        text += f"№{record.id} от {order_date(record)} — {record.total}₽\n"
+        builder.button(
+            text=f"🧾 №{record.id} — {record.total}₽",
+            callback_data=HistoryCallback(action="view", order_id=record.id, page=records.number)
+        )
+
+    sizes = [1] * len(records.items)
+
+    # Пагинация
+    pagination = pagination_buttons(builder, records, HistoryCallback(action="page", page=records.number))
+    if pagination:
+        sizes.append(pagination)
+
+    builder.button(
+        text=f"{EMOJI['home']} Главное меню",
+        callback_data=NavigationCallback(action="main")
+    )
+    sizes.append(1)
+    builder.adjust(*sizes)
+
+    await renderer.edit_text(callback.message, text, reply_markup=builder.as_markup())
+
+@router.callback_query(HistoryCallback.filter(F.action == "view"))
+async def view_order(callback: CallbackQuery, callback_data: HistoryCallback):
+    """Показать прошлый заказ"""
+    user_id = callback.from_user.id
+    record = await asyncio.to_thread(data_manager.order_log.get, user_id, callback_data.order_id)
+
+    if record is None:
+        await callback.answer("❌ Заказ не найден")
+        return
+
+    text = f"🧾 <b>Заказ №{record.id}</b>\n"
+    text += f"📅 {order_date(record)}\n\n"
+
+    for i, line in enumerate(record.lines, 1):
+        text += f"{i}. {line.image} {line.name}\n"
+        text += f"   {line.quantity} × {line.price}₽ = {line.subtotal}₽\n"
+
+    text += f"\n💰 <b>Итого: {record.total}₽</b>"
+
+    builder = InlineKeyboardBuilder()
+    builder.button(
+        text=f"{EMOJI['back']} К заказам",
+        callback_data=HistoryCallback(action="page", page=callback_data.page)
+    )
+    builder.button(
+        text=f"{EMOJI['home']} Главное меню",
+        callback_data=NavigationCallback(action="main")
+    )
+    builder.adjust(1)
+
+    await renderer.edit_text(callback.message, text, reply_markup=builder.as_markup())
+    await callback.answer()
@@ -0,0 +1,67 @@
+"""
+Обработчики инлайн-режима: поиск блюд через @бот запрос в любом чате
+
+Ответ зависит только от запроса и меню, поэтому Telegram кэширует его
+для всех пользователей (is_personal=False) и на повторный запрос
+не присылает обновление вовсе. Состояние FSM не читается и не пишется.
+Заведение определяется по боту: чатов у инлайн-запроса нет.
+"""
+
+from typing import List
+
+from aiogram import Router
+from aiogram.types import (
+    InlineQuery,
+    InlineQueryResultArticle,
+    InlineQueryResultsButton,
+    InputTextMessageContent
+)
+
+from utils.catalogue import MenuItem
+from utils.data_manager import data_manager
+from config import INLINE_CACHE_TIME, INLINE_RESULTS_PER_PAGE
+
+router = Router(name="inline")
+
+def item_article(item: MenuItem) -> InlineQueryResultArticle:
+    """Карточка блюда, которая отправляется в чат при выборе результата"""
+    text = f"{item.image} <b>{item.name}</b>\n\n"
+    if item.description:
+        text += f"📋 {item.description}\n\n"
+    text += f"💰 Цена: <b>{item.price}₽</b>"
+    if item.ingredients:
+        text += f"\n\n🍽️ Состав: {', '.join(item.ingredients)}"
+
+    return InlineQueryResultArticle(
+        id=item.id,
+        title=f"{item.image} {item.name} — {item.price}₽",
+        description=item.description or None,
+        input_message_content=InputTextMessageContent(message_text=text)
+    )
+
+def open_bot_button() -> InlineQueryResultsButton:
+    """Кнопка над результатами: перейти в бота к полному меню"""
+    return InlineQueryResultsButton(text="🍽️ Открыть меню", start_parameter="inline")
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery):
+    """Страница результатов поиска; следующая запрашивается клиентом по next_offset"""
+    query = inline_query.query.strip()
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+
+    articles: List[InlineQueryResultArticle] = []
+    next_offset = ""
+
+    if len(query) >= 2:
+        results = data_manager.search_result(query)
+        articles = [item_article(item) for item in results.page(offset, INLINE_RESULTS_PER_PAGE)]
+        if offset + len(articles) < len(results):
+            next_offset = str(offset + len(articles))
+
+    await inline_query.answer(
+        articles,
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=False,
+        next_offset=next_offset,
+        button=open_bot_button()
+    )
@@ -9,6 +9,7 @@ from aiogram.fsm.context import FSMContext
 
 from utils.callback_data import MenuCallback, NavigationCallback
 from utils.data_manager import data_manager
+from utils.render import renderer
 from keyboards.navigation_keyboards import main_menu_keyboard
 from keyboards.menu_keyboards import (
     cuisines_keyboard, 
@@ -18,7 +19,7 @@ from keyboards.menu_keyboards import (
 )
 from config import EMOJI
 
-router = Router()
+router = Router(name="menu")
 
 @router.message(Command("start"))
 async def start_command(message: Message, state: FSMContext):
@@ -54,7 +55,8 @@ async def show_main_menu(callback: CallbackQuery, state: FSMContext):
 Выберите действие:
 """
 
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         welcome_text,
         reply_markup=main_menu_keyboard()
     )
@@ -65,7 +67,8 @@ async def show_cuisines(callback: CallbackQuery):
     """Показать список кухонь"""
     text = f"{EMOJI['menu']} <b>Выберите кухню:</b>"
 
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         text,
         reply_markup=cuisines_keyboard()
     )
@@ -75,12 +78,13 @@ async def show_cuisines(callback: CallbackQuery):
 async def show_categories(callback: CallbackQuery, callback_data: MenuCallback):
     """Показать категории для выбранной кухни"""
     cuisine_id = callback_data.cuisine_id
-    cuisines = data_manager.get_cuisines()
-    cuisine_name = cuisines.get(cuisine_id, {}).get("name", "Кухня")
+    cuisine = data_manager.get_cuisine(cuisine_id)
+    cuisine_name = cuisine.name if cuisine else "Кухня"
 
     text = f"🍽️ <b>{cuisine_name}</b>\n\nВыберите категорию:"
 
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         text,
         reply_markup=categories_keyboard(cuisine_id)
     )
@@ -91,7 +95,8 @@ async def show_all_categories(callback: CallbackQuery):
     """Показать все категории всех кухонь"""
     text = "🌍 <b>Все категории</b>\n\nВыберите категорию:"
 
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         text,
         reply_markup=all_categories_keyboard()
     )
@@ -104,10 +109,10 @@ async def show_items(callback: CallbackQuery, callback_data: MenuCallback):
     category_id = callback_data.category_id
     page = callback_data.page
 
-    cuisines = data_manager.get_cuisines()
-    cuisine_name = cuisines.get(cuisine_id, {}).get("name", "Кухня")
-    categories = data_manager.get_categories(cuisine_id)
-    category_name = categories.get(category_id, {}).get("name", "Категория")
+    cuisine = data_manager.get_cuisine(cuisine_id)
+    cuisine_name = cuisine.name if cuisine else "Кухня"
+    category = data_manager.get_category(cuisine_id, category_id)
+    category_name = category.name if category else "Категория"
 
     items = data_manager.get_items(cuisine_id, category_id)
 
@@ -116,7 +121,8 @@ async def show_items(callback: CallbackQuery, callback_data: MenuCallback):
     else:
         text = f"🍽️ <b>{cuisine_name} → {category_name}</b>\n\nВыберите блюдо:"
 
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         text,
         reply_markup=items_keyboard(cuisine_id, category_id, page)
     )
@@ -2,23 +2,35 @@
 Обработчики для заказов
 """
 
+from typing import List, Tuple
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from utils.callback_data import NavigationCallback, OrderCallback, ItemCallback
+from utils.catalogue import CartLine
 from utils.data_manager import data_manager
+from utils.render import renderer
+from utils.user_locks import user_lock
+from utils.user_state import Cart
 from keyboards.navigation_keyboards import back_to_main_keyboard
-from config import EMOJI
+from keyboards.menu_keyboards import item_keyboard
+from config import EMOJI, MAX_ORDER_ITEMS
+
+router = Router(name="order")
 
-router = Router()
+def read_order(user_id: int, sync_prices: bool = False) -> Tuple[List[str], Cart, List[CartLine]]:
+    """Заказ и его позиции; при sync_prices заказ сначала сверяется с текущим меню"""
+    price_changes = data_manager.sync_order_prices(user_id) if sync_prices else []
+    return price_changes, data_manager.get_order(user_id), data_manager.get_order_items_list(user_id)
 
 @router.callback_query(NavigationCallback.filter(F.action == "order"))
 async def show_order(callback: CallbackQuery):
     """Показать текущий заказ"""
     user_id = callback.from_user.id
-    order = data_manager.get_order(user_id)
-    order_items = data_manager.get_order_items_list(user_id)
+    async with user_lock(user_id):
+        price_changes, order, order_items = await data_manager.offload(read_order, user_id, True)
 
     if not order_items:
         text = f"""
@@ -27,7 +39,8 @@ async def show_order(callback: CallbackQuery):
 Ваш заказ пуст.
 Добавляйте блюда через меню!
 """
-        await callback.message.edit_text(
+        await renderer.edit_text(
+            callback.message,
             text,
             reply_markup=back_to_main_keyboard()
         )
@@ -35,26 +48,29 @@ async def show_order(callback: CallbackQuery):
         text = f"{EMOJI['cart']} <b>Мой заказ</b>\n\n"
 
         for i, item in enumerate(order_items, 1):
-            emoji = item.get("image", "🍽️")
-            name = item.get("name", "Блюдо")
-            quantity = item.get("quantity", 1)
-            price = item.get("price", 0)
-            subtotal = item.get("subtotal", 0)
+            emoji = item.image
+            name = item.name
+            quantity = item.quantity
+            price = item.price
+            subtotal = item.subtotal
 
             text += f"{i}. {emoji} {name}\n"
             text += f"   Количество: {quantity} × {price}₽ = {subtotal}₽\n\n"
 
-        total = order.get("total", 0)
+        total = order.total
         text += f"💰 <b>Итого: {total}₽</b>"
 
+        if price_changes:
+            text += "\n\n⚠️ Меню обновилось: цены или состав заказа изменились"
+
         # Создаем клавиатуру для управления заказом
         builder = InlineKeyboardBuilder()
 
         # Кнопки для изменения количества каждого товара
         for item in order_items:
-            emoji = item.get("image", "🍽️")
-            name = item.get("name", "Блюдо")
-            item_id = item.get("id")
+            emoji = item.image
+            name = item.name
+            item_id = item.id
 
             builder.button(
                 text=f"➖ {emoji} {name}",
@@ -80,7 +96,7 @@ async def show_order(callback: CallbackQuery):
 
         builder.adjust(2)
 
-        await callback.message.edit_text(text, reply_markup=builder.as_markup())
+        await renderer.edit_text(callback.message, text, reply_markup=builder.as_markup())
 
     await callback.answer()
 
@@ -94,10 +110,17 @@ async def add_to_order(callback: CallbackQuery, callback_data: OrderCallback):
     if not item:
         await callback.answer("❌ Блюдо не найдено")
         return
+    if not item.available:
+        await callback.answer("😔 Этого блюда сейчас нет в наличии")
+        return
 
-    data_manager.add_to_order(user_id, item_id)
+    async with user_lock(user_id):
+        added = await data_manager.offload(data_manager.add_to_order, user_id, item_id)
+    if not added:
+        await callback.answer(f"⚠️ В заказе не может быть больше {MAX_ORDER_ITEMS} позиций")
+        return
 
-    name = item.get("name", "Блюдо")
+    name = item.name
     await callback.answer(f"➕ {name} добавлено в заказ!")
 
     # Обновляем отображение заказа если мы на странице заказа
@@ -115,9 +138,10 @@ async def remove_from_order(callback: CallbackQuery, callback_data: OrderCallbac
         await callback.answer("❌ Блюдо не найдено")
         return
 
-    data_manager.remove_from_order(user_id, item_id)
+    async with user_lock(user_id):
+        await data_manager.offload(data_manager.remove_from_order, user_id, item_id)
 
-    name = item.get("name", "Блюдо")
+    name = item.name
     await callback.answer(f"➖ {name} убрано из заказа")
 
     # Обновляем отображение заказа
@@ -127,7 +151,8 @@ async def remove_from_order(callback: CallbackQuery, callback_data: OrderCallbac
 async def clear_order(callback: CallbackQuery):
     """Очистить весь заказ"""
     user_id = callback.from_user.id
-    data_manager.clear_order(user_id)
+    async with user_lock(user_id):
+        await data_manager.offload(data_manager.clear_order, user_id)
 
     await callback.answer("🗑️ Заказ очищен")
     await show_order(callback)
@@ -136,8 +161,12 @@ async def clear_order(callback: CallbackQuery):
 async def confirm_order(callback: CallbackQuery):
     """Подтвердить заказ"""
     user_id = callback.from_user.id
-    order = data_manager.get_order(user_id)
-    order_items = data_manager.get_order_items_list(user_id)
+    async with user_lock(user_id):
+        _, order, order_items = await data_manager.offload(read_order, user_id)
+        if order_items:
+            # Заказ сохраняется в журнал до очистки корзины: если запись не удалась, корзина остается
+            record = await data_manager.order_log.write(user_id, order_items, order.total)
+            await data_manager.offload(data_manager.clear_order, user_id)
 
     if not order_items:
         await callback.answer("❌ Заказ пуст")
@@ -146,27 +175,25 @@ async def confirm_order(callback: CallbackQuery):
     # Формируем чек
     receipt_text = f"🧾 <b>Чек заказа</b>\n\n"
     receipt_text += f"👤 Пользователь: {callback.from_user.first_name or 'Клиент'}\n"
-    receipt_text += f"🆔 ID заказа: {user_id}{len(order_items):03d}\n\n"
+    receipt_text += f"🆔 Номер заказа: {record.id}\n\n"
 
     for i, item in enumerate(order_items, 1):
-        name = item.get("name", "Блюдо")
-        quantity = item.get("quantity", 1)
-        price = item.get("price", 0)
-        subtotal = item.get("subtotal", 0)
+        name = item.name
+        quantity = item.quantity
+        price = item.price
+        subtotal = item.subtotal
 
         receipt_text += f"{i}. {name}\n"
         receipt_text += f"   {quantity} × {price}₽ = {subtotal}₽\n"
 
-    total = order.get("total", 0)
+    total = order.total
     receipt_text += f"\n💰 <b>К оплате: {total}₽</b>\n\n"
     receipt_text += "✅ <b>Заказ принят!</b>\n"
     receipt_text += "⏰ Время приготовления: 15-30 минут\n"
     receipt_text += "📞 Мы свяжемся с вами для уточнения деталей"
 
-    # Очищаем заказ после оформления
-    data_manager.clear_order(user_id)
-
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         receipt_text,
         reply_markup=back_to_main_keyboard()
     )
@@ -185,33 +212,34 @@ async def view_item(callback: CallbackQuery, callback_data: ItemCallback):
         await callback.answer("❌ Блюдо не найдено")
         return
 
-    emoji = item.get("image", "🍽️")
-    name = item.get("name", "Блюдо")
-    description = item.get("description", "Описание отсутствует")
-    price = item.get("price", 0)
-    ingredients = item.get("ingredients", [])
+    emoji = item.image
+    name = item.name
+    description = item.description or "Описание отсутствует"
+    price = item.price
+    ingredients = item.ingredients
 
     text = f"{emoji} <b>{name}</b>\n\n"
     text += f"📋 {description}\n\n"
     text += f"💰 Цена: <b>{price}₽</b>\n\n"
+    if not item.available:
+        text += "😔 <b>Сейчас нет в наличии</b>\n\n"
 
     if ingredients:
         text += f"🍽️ Состав: {', '.join(ingredients)}"
 
-    from keyboards.menu_keyboards import item_keyboard
-    keyboard = item_keyboard(item_id, user_id, page)
+    async with user_lock(user_id):
+        keyboard = await data_manager.offload(item_keyboard, item_id, user_id, page)
 
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await renderer.edit_text(callback.message, text, reply_markup=keyboard)
     await callback.answer()
 
 @router.callback_query(ItemCallback.filter(F.action == "back"))
 async def back_from_item(callback: CallbackQuery, callback_data: ItemCallback):
     """Вернуться назад из просмотра блюда"""
     # Это заглушка - в реальной реализации нужно запомнить, откуда пришли
-    from utils.callback_data import NavigationCallback
-
     back_callback = NavigationCallback(action="main")
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         "🏠 Возвращаемся в главное меню...",
         reply_markup=back_to_main_keyboard()
     )
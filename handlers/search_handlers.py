@@ -2,18 +2,23 @@
 Обработчики для поиска блюд
 """
 
+from typing import Tuple
+
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from utils.callback_data import NavigationCallback, ItemCallback
+from utils.callback_data import NavigationCallback, ItemCallback, SearchCallback
 from utils.data_manager import data_manager
-from keyboards.navigation_keyboards import back_to_main_keyboard
-from keyboards.menu_keyboards import item_keyboard
+from utils.pagination import paginate, result_token, search_results
+from utils.search_cache import SearchResult
+from utils.render import renderer
+from keyboards.navigation_keyboards import back_to_main_keyboard, pagination_buttons
 from states.order_states import SearchStates
 from config import EMOJI
 
-router = Router()
+router = Router(name="search")
 
 @router.callback_query(NavigationCallback.filter(F.action == "search"))
 async def start_search(callback: CallbackQuery, state: FSMContext):
@@ -26,7 +31,8 @@ async def start_search(callback: CallbackQuery, state: FSMContext):
 Введите название блюда или его часть:
 """
 
-    await callback.message.edit_text(
+    await renderer.edit_text(
+        callback.message,
         text,
         reply_markup=back_to_main_keyboard()
     )
@@ -41,48 +47,74 @@ async def process_search_query(message: Message, state: FSMContext):
         await message.answer("❌ Поисковый запрос должен содержать минимум 2 символа")
         return
 
-    results = data_manager.search_items(query)
+    token = result_token(query)
+    entry = search_results.get(token)
+    results = entry[1] if entry is not None else search(token, query)
 
     if not results:
         text = f"😔 По запросу <b>'{query}'</b> ничего не найдено\n\nПопробуйте другой запрос:"
         await message.answer(text)
         return
 
-    await state.clear()
-
-    text = f"{EMOJI['search']} <b>Результаты поиска по '{query}':</b>\n\n"
-
-    for i, item in enumerate(results[:10], 1):  # Показываем максимум 10 результатов
-        emoji = item.get("image", "🍽️")
-        name = item.get("name", "Блюдо")
-        price = item.get("price", 0)
-        text += f"{i}. {emoji} {name} - {price}₽\n"
+    # Запрос остается в данных FSM: по нему страницы пересчитываются,
+    # если набор результатов вытеснен из кэша или меню обновилось
+    await state.set_state(None)
+    await state.set_data({"search_query": query})
 
-    if len(results) > 10:
-        text += f"\n... и еще {len(results) - 10} блюд"
+    text, keyboard = results_page(token, query, results, 0)
+    await message.answer(text, reply_markup=keyboard)
 
-    keyboard = back_to_main_keyboard()
+@router.callback_query(SearchCallback.filter(F.action == "page"))
+async def show_results_page(callback: CallbackQuery, callback_data: SearchCallback, state: FSMContext):
+    """Показать страницу результатов поиска"""
+    token = callback_data.token
+    entry = search_results.get(token)
+
+    if entry is not None:
+        query, results = entry
+    else:
+        query = (await state.get_data()).get("search_query")
+        if not query or result_token(query) != token:
+            await callback.answer("⌛ Результаты устарели, повторите поиск", show_alert=True)
+            return
+        results = search(token, query)
+
+    text, keyboard = results_page(token, query, results, callback_data.page)
+    await renderer.edit_text(callback.message, text, reply_markup=keyboard)
+    await callback.answer()
 
-    # Добавляем кнопки для первых 5 результатов
-    if results:
-        from aiogram.utils.keyboard import InlineKeyboardBuilder
-        builder = InlineKeyboardBuilder()
+def search(token: str, query: str) -> SearchResult:
+    """Выполнить поиск и сохранить набор результатов для перелистывания"""
+    return search_results.put(token, query, data_manager.search_result(query))
 
-        for item in results[:5]:
-            emoji = item.get("image", "🍽️")
-            name = item.get("name", "Блюдо")
+def results_page(token: str, query: str, results: SearchResult, page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    """Текст и клавиатура страницы результатов"""
+    found = paginate(results, page)
 
-            builder.button(
-                text=f"{emoji} {name}",
-                callback_data=ItemCallback(action="view", item_id=item["id"])
-            )
+    text = f"{EMOJI['search']} <b>Результаты поиска по '{query}' ({found.total}):</b>\n\n"
+    builder = InlineKeyboardBuilder()
 
+    for i, item in enumerate(found.items, found.start):
+        text += f"{i}. {item.image} {item.name} - {item.price}₽\n"
         builder.button(
-            text=f"{EMOJI['home']} Главное меню",
-            callback_data=NavigationCallback(action="main")
+            text=f"{item.image} {item.name}",
+            callback_data=ItemCallback(action="view", item_id=item.id)
         )
+    sizes = [1] * len(found.items)
 
-        builder.adjust(1)
-        keyboard = builder.as_markup()
+    # Пагинация
+    pagination = pagination_buttons(builder, found, SearchCallback(action="page", token=token, page=found.number))
+    if pagination:
+        sizes.append(pagination)
 
-    await message.answer(text, reply_markup=keyboard)
+    builder.button(
+        text=f"{EMOJI['search']} Новый поиск",
+        callback_data=NavigationCallback(action="search")
+    )
+    builder.button(
+        text=f"{EMOJI['home']} Главное меню",
+        callback_data=NavigationCallback(action="main")
+    )
+
+    builder.adjust(*sizes, 1)
+    return text, builder.as_markup()
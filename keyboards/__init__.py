@@ -1,30 +1,27 @@
 """
 Клавиатуры для ресторанного бота
+
+Модули клавиатур импортируются при первом обращении к их функциям.
 """
 
-from .navigation_keyboards import (
-    main_menu_keyboard,
-    back_to_main_keyboard,
-    back_keyboard,
-    pagination_keyboard
-)
+import importlib
+
+_EXPORTS = {
+    "main_menu_keyboard": ".navigation_keyboards",
+    "back_to_main_keyboard": ".navigation_keyboards",
+    "back_keyboard": ".navigation_keyboards",
+    "pagination_buttons": ".navigation_keyboards",
+    "cuisines_keyboard": ".menu_keyboards",
+    "categories_keyboard": ".menu_keyboards",
+    "all_categories_keyboard": ".menu_keyboards",
+    "items_keyboard": ".menu_keyboards",
+    "item_keyboard": ".menu_keyboards"
+}
 
-from .menu_keyboards import (
-    cuisines_keyboard,
-    categories_keyboard,
-    all_categories_keyboard,
-    items_keyboard,
-    item_keyboard
-)
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    "main_menu_keyboard",
-    "back_to_main_keyboard", 
-    "back_keyboard",
-    "pagination_keyboard",
-    "cuisines_keyboard",
-    "categories_keyboard",
-    "all_categories_keyboard",
-    "items_keyboard",
-    "item_keyboard"
-]
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
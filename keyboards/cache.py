@@ -0,0 +1,112 @@
+"""
+Кэш готовых клавиатур
+"""
+
+import functools
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Set
+
+from aiogram.types import InlineKeyboardMarkup
+
+from utils.data_manager import data_manager
+from utils.tenants import current_tenant
+from config import KEYBOARD_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+class KeyboardCache:
+    """
+    LRU-кэш клавиатур, зависящих только от аргументов, заведения и версии каталога
+
+    Клавиатуры aiogram неизменяемы, поэтому один и тот же объект
+    можно безопасно отдавать во все обработчики.
+
+    Правка цен и наличия не меняет версию каталога: сбрасываются только
+    клавиатуры с блюдами затронутых категорий (per_category), остальные
+    остаются в кэше.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, InlineKeyboardMarkup]" = OrderedDict()
+        self._per_category: Set[str] = set()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def cached(self, func: Callable[..., InlineKeyboardMarkup] = None, *, per_category: bool = False):
+        """
+        Декоратор для функций, строящих клавиатуру
+
+        per_category — клавиатура показывает блюда категории, переданной
+        первыми двумя аргументами (cuisine_id, category_id), и сбрасывается
+        при правке цен и наличия в ней.
+        """
+        if func is None:
+            return functools.partial(self.cached, per_category=per_category)
+
+        name = func.__name__
+        if per_category:
+            self._per_category.add(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())), current_tenant.get(), data_manager.catalogue_version)
+
+            markup = self._entries.get(key)
+            if markup is not None:
+                self._entries.move_to_end(key)
+                self.hits[name] = self.hits.get(name, 0) + 1
+                return markup
+
+            self.misses[name] = self.misses.get(name, 0) + 1
+            markup = func(*args, **kwargs)
+            self._entries[key] = markup
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return markup
+
+        return wrapper
+
+    def clear(self, *_):
+        """Сбросить все клавиатуры (например, после перезагрузки меню)"""
+        self._entries.clear()
+
+    def menu_swapped(self, tenant: str, snapshot):
+        """
+        Сбросить клавиатуры заведения после замены его меню
+
+        Новое меню целиком сбрасывает все клавиатуры заведения, правка —
+        только клавиатуры затронутых категорий. Клавиатуры других
+        заведений остаются в кэше.
+        """
+        changed = snapshot.changed_categories
+        if changed is None:
+            stale = [key for key in self._entries if key[3] == tenant]
+        else:
+            stale = [
+                key for key in self._entries
+                if key[0] in self._per_category and key[3] == tenant and key[1][:2] in changed
+            ]
+        for key in stale:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Попадания, промахи и доля попаданий по каждой клавиатуре"""
+        result = {}
+        for name in sorted(set(self.hits) | set(self.misses)):
+            hits = self.hits.get(name, 0)
+            misses = self.misses.get(name, 0)
+            result[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+        return result
+
+    async def log_stats(self):
+        """Записать статистику кэша в лог (в цикле событий: счетчики меняют обработчики)"""
+        for name, stat in self.stats().items():
+            logger.info(
+                f"Кэш клавиатур {name}: попаданий {stat['hits']}, "
+                f"промахов {stat['misses']}, hit rate {stat['hit_rate']:.1%}"
+            )
+
+keyboard_cache = KeyboardCache(KEYBOARD_CACHE_SIZE)
+data_manager.add_reload_listener(keyboard_cache.menu_swapped)
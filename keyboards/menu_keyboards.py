@@ -7,8 +7,12 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from utils.callback_data import MenuCallback, ItemCallback, FavoritesCallback, OrderCallback, NavigationCallback
 from utils.data_manager import data_manager
-from config import EMOJI, MAX_ITEMS_PER_PAGE
+from utils.pagination import SequenceSource, paginate
+from keyboards.cache import keyboard_cache
+from keyboards.navigation_keyboards import pagination_buttons
+from config import EMOJI
 
+@keyboard_cache.cached
 def cuisines_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора кухни"""
     builder = InlineKeyboardBuilder()
@@ -23,8 +27,8 @@ def cuisines_keyboard() -> InlineKeyboardMarkup:
 
     # Добавляем кнопки кухонь
     for cuisine_id, cuisine_data in cuisines.items():
-        emoji = cuisine_data.get("emoji", "🍽️")
-        name = cuisine_data.get("name", "Кухня")
+        emoji = cuisine_data.emoji
+        name = cuisine_data.name
 
         builder.button(
             text=f"{emoji} {name}",
@@ -39,6 +43,7 @@ def cuisines_keyboard() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@keyboard_cache.cached
 def categories_keyboard(cuisine_id: str) -> InlineKeyboardMarkup:
     """Клавиатура категорий для кухни"""
     builder = InlineKeyboardBuilder()
@@ -46,8 +51,8 @@ def categories_keyboard(cuisine_id: str) -> InlineKeyboardMarkup:
     categories = data_manager.get_categories(cuisine_id)
 
     for category_id, category_data in categories.items():
-        emoji = category_data.get("emoji", "🍽️")
-        name = category_data.get("name", "Категория")
+        emoji = category_data.emoji
+        name = category_data.name
 
         builder.button(
             text=f"{emoji} {name}",
@@ -66,6 +71,7 @@ def categories_keyboard(cuisine_id: str) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@keyboard_cache.cached
 def all_categories_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура всех категорий"""
     builder = InlineKeyboardBuilder()
@@ -73,12 +79,12 @@ def all_categories_keyboard() -> InlineKeyboardMarkup:
     cuisines = data_manager.get_cuisines()
 
     for cuisine_id, cuisine_data in cuisines.items():
-        categories = cuisine_data.get("categories", {})
+        categories = cuisine_data.categories
 
         for category_id, category_data in categories.items():
-            emoji = category_data.get("emoji", "🍽️")
-            name = category_data.get("name", "Категория")
-            cuisine_name = cuisine_data.get("name", "")
+            emoji = category_data.emoji
+            name = category_data.name
+            cuisine_name = cuisine_data.name
 
             builder.button(
                 text=f"{emoji} {name} ({cuisine_name})",
@@ -97,58 +103,31 @@ def all_categories_keyboard() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@keyboard_cache.cached(per_category=True)
 def items_keyboard(cuisine_id: str, category_id: str, page: int = 0) -> InlineKeyboardMarkup:
     """Клавиатура блюд в категории"""
     builder = InlineKeyboardBuilder()
 
-    items = data_manager.get_items(cuisine_id, category_id)
+    items = paginate(SequenceSource(data_manager.get_items(cuisine_id, category_id)), page)
 
-    # Пагинация
-    start_idx = page * MAX_ITEMS_PER_PAGE
-    end_idx = start_idx + MAX_ITEMS_PER_PAGE
-    page_items = items[start_idx:end_idx]
-
-    for item in page_items:
-        emoji = item.get("image", "🍽️")
-        name = item.get("name", "Блюдо")
-        price = item.get("price", 0)
+    for item in items.items:
+        emoji = item.image
+        name = item.name
+        price = item.price
 
         builder.button(
             text=f"{emoji} {name} - {price}₽",
-            callback_data=ItemCallback(action="view", item_id=item["id"], page=page)
+            callback_data=ItemCallback(action="view", item_id=item.id, page=items.number)
         )
+    sizes = [1] * len(items.items)
 
     # Пагинация
-    total_pages = (len(items) + MAX_ITEMS_PER_PAGE - 1) // MAX_ITEMS_PER_PAGE
-    if total_pages > 1:
-        pagination_row = []
-
-        if page > 0:
-            pagination_row.append(builder.button(
-                text="◀️",
-                callback_data=MenuCallback(
-                    action="items", 
-                    cuisine_id=cuisine_id, 
-                    category_id=category_id,
-                    page=page - 1
-                )
-            ))
-
-        pagination_row.append(builder.button(
-            text=f"{page + 1}/{total_pages}",
-            callback_data="ignore"
-        ))
-
-        if page < total_pages - 1:
-            pagination_row.append(builder.button(
-                text="▶️",
-                callback_data=MenuCallback(
-                    action="items",
-                    cuisine_id=cuisine_id,
-                    category_id=category_id, 
-                    page=page + 1
-                )
-            ))
+    pagination = pagination_buttons(
+        builder, items,
+        MenuCallback(action="items", cuisine_id=cuisine_id, category_id=category_id, page=items.number)
+    )
+    if pagination:
+        sizes.append(pagination)
 
     builder.button(
         text=f"{EMOJI['back']} Назад",
@@ -159,7 +138,7 @@ def items_keyboard(cuisine_id: str, category_id: str, page: int = 0) -> InlineKe
         callback_data=NavigationCallback(action="main")
     )
 
-    builder.adjust(1)
+    builder.adjust(*sizes, 1)
     return builder.as_markup()
 
 def item_keyboard(item_id: str, user_id: int, page: int = 0) -> InlineKeyboardMarkup:
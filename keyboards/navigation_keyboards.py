@@ -2,12 +2,16 @@
 Клавиатуры для навигации
 """
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from utils.callback_data import NavigationCallback, MenuCallback
+from utils.callback_data import NavigationCallback, MenuCallback, FilterCallback
+from utils.pagination import Page
+from keyboards.cache import keyboard_cache
 from config import EMOJI
 
+@keyboard_cache.cached
 def main_menu_keyboard() -> InlineKeyboardMarkup:
     """Главное меню бота"""
     builder = InlineKeyboardBuilder()
@@ -28,8 +32,16 @@ def main_menu_keyboard() -> InlineKeyboardMarkup:
         text=f"{EMOJI['cart']} Мой заказ",
         callback_data=NavigationCallback(action="order")
     )
+    builder.button(
+        text=f"{EMOJI['filter']} Подбор блюд",
+        callback_data=FilterCallback(action="show")
+    )
+    builder.button(
+        text=f"{EMOJI['history']} Мои заказы",
+        callback_data=NavigationCallback(action="history")
+    )
 
-    builder.adjust(2, 2)
+    builder.adjust(2, 2, 2)
     return builder.as_markup()
 
 def back_to_main_keyboard() -> InlineKeyboardMarkup:
@@ -59,41 +71,26 @@ def back_keyboard(callback_data) -> InlineKeyboardMarkup:
     builder.adjust(1, 1)
     return builder.as_markup()
 
-def pagination_keyboard(current_page: int, total_pages: int, callback_prefix: str, **kwargs) -> InlineKeyboardMarkup:
-    """Клавиатура с пагинацией"""
-    builder = InlineKeyboardBuilder()
+def pagination_buttons(builder: InlineKeyboardBuilder, page: Page, callback: CallbackData) -> int:
+    """
+    Добавить ряд ◀️ 2/5 ▶️ к клавиатуре
 
-    # Кнопки пагинации
-    pagination_row = []
+    callback — callback текущей страницы с полем page; у соседних страниц
+    меняется только номер. Возвращает число добавленных кнопок
+    (0, если страница одна), чтобы вызывающий мог передать его в adjust.
+    """
+    if page.total_pages <= 1:
+        return 0
 
-    if current_page > 0:
-        if callback_prefix == "menu":
-            prev_callback = MenuCallback(action="page", page=current_page - 1, **kwargs)
-        elif callback_prefix == "fav":
-            from utils.callback_data import FavoritesCallback
-            prev_callback = FavoritesCallback(action="page", page=current_page - 1)
-        else:
-            prev_callback = NavigationCallback(action="page", target=str(current_page - 1))
+    count = 1
+    if page.has_prev:
+        builder.button(text="◀️", callback_data=callback.model_copy(update={"page": page.number - 1}))
+        count += 1
 
-        pagination_row.append(InlineKeyboardButton(text="◀️", callback_data=prev_callback.pack()))
+    builder.button(text=f"{page.number + 1}/{page.total_pages}", callback_data="ignore")
 
-    pagination_row.append(InlineKeyboardButton(
-        text=f"{current_page + 1}/{total_pages}",
-        callback_data="ignore"
-    ))
+    if page.has_next:
+        builder.button(text="▶️", callback_data=callback.model_copy(update={"page": page.number + 1}))
+        count += 1
 
-    if current_page < total_pages - 1:
-        if callback_prefix == "menu":
-            next_callback = MenuCallback(action="page", page=current_page + 1, **kwargs)
-        elif callback_prefix == "fav":
-            from utils.callback_data import FavoritesCallback
-            next_callback = FavoritesCallback(action="page", page=current_page + 1)
-        else:
-            next_callback = NavigationCallback(action="page", target=str(current_page + 1))
-
-        pagination_row.append(InlineKeyboardButton(text="▶️", callback_data=next_callback.pack()))
-
-    for btn in pagination_row:
-        builder.row(btn)
-
-    return builder.as_markup()
+    return count
@@ -9,14 +9,68 @@
 
 import asyncio
 import logging
+import multiprocessing
+import sys
+from typing import Optional, Tuple
+
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from config import BOT_TOKEN
-from handlers import menu_handlers, search_handlers, order_handlers, favorites_handlers
+from config import (
+    BOT_TOKEN,
+    RUN_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_WORKERS,
+    STORAGE_BACKEND,
+    FSM_STORAGE,
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_MAX_RETRIES,
+    MENU_RELOAD_INTERVAL,
+    KEYBOARD_CACHE_LOG_INTERVAL,
+    SEARCH_CACHE_LOG_INTERVAL,
+    RENDER_STATS_LOG_INTERVAL,
+    METRICS_HOST,
+    METRICS_PORT,
+    METRICS_PATH,
+    METRICS_LOG_INTERVAL,
+    STORAGE_FLUSH_INTERVAL,
+    FSM_FLUSH_INTERVAL,
+    FSM_EXPIRE_INTERVAL,
+    TENANT_BOTS,
+    TENANT_CHATS
+)
+from handlers import (
+    menu_handlers,
+    search_handlers,
+    order_handlers,
+    favorites_handlers,
+    history_handlers,
+    filter_handlers,
+    inline_handlers,
+    admin_handlers
+)
+from keyboards.cache import keyboard_cache
+from middlewares import MetricsMiddleware, HandlerLabelMiddleware, ApiTimingMiddleware, TenantMiddleware, registered_commands
+from utils.data_manager import data_manager
+from utils.fsm_storage import SqliteFSMStorage, create_fsm_storage
+from utils.menu_snapshot import ensure_compiled
+from utils.menu_watcher import MenuWatcher
+from utils.outbound import OutboundScheduler
+from utils.render import renderer
+from utils.search_cache import search_cache
+from utils.metrics import metrics, instrument_methods
+from utils.tenants import TenantResolver
 
 # Настройка логирования
 logging.basicConfig(
@@ -25,37 +79,219 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def main():
-    """Основная функция запуска бота"""
-    # Инициализация бота и диспетчера
+def create_bot(session: Optional[BaseSession] = None, token: str = BOT_TOKEN) -> Bot:
+    """Создать экземпляр бота"""
     bot = Bot(
-        token=BOT_TOKEN,
+        token=token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
 
+    # Время ожидания Bot API, включая очередь лимитов
+    bot.session.middleware(ApiTimingMiddleware())
+
+    # Все исходящие запросы проходят через лимиты Telegram
+    bot.session.middleware(OutboundScheduler(
+        global_rate=OUTBOUND_GLOBAL_RATE,
+        chat_rate=OUTBOUND_CHAT_RATE,
+        chat_burst=OUTBOUND_CHAT_BURST,
+        max_retries=OUTBOUND_MAX_RETRIES
+    ))
+
+    return bot
+
+def create_scheduler(storage) -> AsyncIOScheduler:
+    """Планировщик фоновых задач"""
+    scheduler = AsyncIOScheduler()
+
+    # Горячая перезагрузка меню каждого заведения
+    for tenant in data_manager.tenants:
+        menu_watcher = MenuWatcher(data_manager.for_tenant(tenant))
+        scheduler.add_job(menu_watcher.check, "interval", seconds=MENU_RELOAD_INTERVAL)
+
+    # Статистика кэша клавиатур
+    scheduler.add_job(keyboard_cache.log_stats, "interval", seconds=KEYBOARD_CACHE_LOG_INTERVAL)
+
+    # Статистика кэша поиска
+    scheduler.add_job(search_cache.log_stats, "interval", seconds=SEARCH_CACHE_LOG_INTERVAL)
+
+    # Сводка метрик обработчиков
+    scheduler.add_job(metrics.log_summary, "interval", seconds=METRICS_LOG_INTERVAL)
+
+    # Сколько правок сообщений сэкономлено
+    scheduler.add_job(renderer.log_stats, "interval", seconds=RENDER_STATS_LOG_INTERVAL)
+
+    # Периодический сброс избранного и корзин в хранилище
+    scheduler.add_job(data_manager.flush, "interval", seconds=STORAGE_FLUSH_INTERVAL)
+
+    if isinstance(storage, SqliteFSMStorage):
+        scheduler.add_job(storage.flush, "interval", seconds=FSM_FLUSH_INTERVAL)
+        scheduler.add_job(storage.expire, "interval", seconds=FSM_EXPIRE_INTERVAL)
+
+    return scheduler
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Метрики для Prometheus"""
+    return web.Response(text=metrics.render_prometheus(), content_type="text/plain")
+
+async def start_metrics_server() -> web.AppRunner:
+    """Отдельный HTTP-сервер метрик для режима long polling"""
+    app = web.Application()
+    app.router.add_get(METRICS_PATH, metrics_handler)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    return runner
+
+async def on_startup(dispatcher: Dispatcher):
+    """Загрузка меню и запуск фоновых задач"""
+    # Меню грузится здесь, а не при импорте, и не блокирует цикл событий
+    await asyncio.to_thread(data_manager.load)
+    await asyncio.to_thread(data_manager.open_order_logs)
+    dispatcher["scheduler"].start()
+    logger.info("Бот запущен")
+
+async def on_polling_startup(dispatcher: Dispatcher):
+    """Запуск сервера метрик в режиме long polling"""
+    if METRICS_PORT:
+        dispatcher["metrics_runner"] = await start_metrics_server()
+
+async def on_shutdown(dispatcher: Dispatcher):
+    """Остановка фоновых задач и сброс хранилищ"""
+    if "metrics_runner" in dispatcher.workflow_data:
+        await dispatcher["metrics_runner"].cleanup()
+    dispatcher["scheduler"].shutdown()
+    await dispatcher.storage.close()
+    data_manager.close()
+
+def create_dispatcher() -> Dispatcher:
+    """Создать диспетчер со всеми роутерами и фоновыми задачами"""
     # Хранилище для FSM
-    storage = MemoryStorage()
+    storage = create_fsm_storage()
     dp = Dispatcher(storage=storage)
 
+    # Подключение роутеров
+    # Команды администратора — первыми, чтобы их не перехватило состояние FSM
+    routers = [
+        admin_handlers.router,
+        menu_handlers.router,
+        search_handlers.router,
+        order_handlers.router,
+        favorites_handlers.router,
+        history_handlers.router,
+        filter_handlers.router,
+        inline_handlers.router
+    ]
+    for router in routers:
+        dp.include_router(router)
+        router.message.middleware(HandlerLabelMiddleware(router.name))
+        router.callback_query.middleware(HandlerLabelMiddleware(router.name))
+        router.inline_query.middleware(HandlerLabelMiddleware(router.name))
+
+    # Заведение определяется до всех обработчиков по боту или чату
+    dp.update.outer_middleware(TenantMiddleware(TenantResolver(TENANT_BOTS, TENANT_CHATS)))
+
+    # Метрики: время обработки обновлений и время внутри data_manager каждого заведения
+    dp.update.outer_middleware(MetricsMiddleware(registered_commands(routers)))
+    data_manager.each_manager(lambda manager: instrument_methods(manager, "data_manager"))
+
     # Планировщик задач
-    scheduler = AsyncIOScheduler()
+    dp["scheduler"] = create_scheduler(storage)
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
 
-    # Подключение роутеров
-    dp.include_router(menu_handlers.router)
-    dp.include_router(search_handlers.router)
-    dp.include_router(order_handlers.router)
-    dp.include_router(favorites_handlers.router)
+    return dp
 
-    # Запуск планировщика
-    scheduler.start()
+def create_app(session: Optional[BaseSession] = None) -> Tuple[Bot, Dispatcher]:
+    """
+    Фабрика приложения: бот и диспетчер со всеми роутерами
 
-    logger.info("Бот запущен")
+    Данные не загружаются: меню читается в on_startup
+    или при первом обращении к data_manager.
+    """
+    return create_bot(session=session), create_dispatcher()
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, handle_in_background: bool = True) -> web.Application:
+    """aiohttp-приложение, принимающее обновления от Telegram"""
+    app = web.Application()
+
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET or None,
+        handle_in_background=handle_in_background
+    ).register(app, path=WEBHOOK_PATH)
+    app.router.add_get(METRICS_PATH, metrics_handler)
+    setup_application(app, dp, bot=bot)
+
+    return app
+
+async def set_webhook(bot: Bot):
+    """Сообщить Telegram адрес вебхука"""
+    await bot.set_webhook(
+        f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET or None,
+        drop_pending_updates=False
+    )
+
+def run_webhook_worker(register_webhook: bool):
+    """Запустить один процесс веб-сервера"""
+    bot, dp = create_app()
+
+    if register_webhook:
+        dp.startup.register(set_webhook)
+
+    # reuse_port позволяет нескольким процессам слушать один порт
+    web.run_app(
+        create_webhook_app(dp, bot),
+        host=WEBHOOK_HOST,
+        port=WEBHOOK_PORT,
+        reuse_port=WEBHOOK_WORKERS > 1
+    )
+
+def run_webhook():
+    """Режим вебхука: один или несколько процессов за одним портом"""
+    if WEBHOOK_WORKERS <= 1:
+        run_webhook_worker(register_webhook=True)
+        return
+
+    # Обновления одного пользователя попадают в разные процессы: корзины и
+    # состояния FSM в памяти или SQLite каждого воркера затирали бы друг друга
+    if STORAGE_BACKEND != "shared" or FSM_STORAGE != "redis":
+        sys.exit(
+            f"WEBHOOK_WORKERS={WEBHOOK_WORKERS} требует общего хранилища: "
+            f"STORAGE_BACKEND = \"shared\" и FSM_STORAGE = \"redis\" "
+            f"(сейчас {STORAGE_BACKEND!r} и {FSM_STORAGE!r})"
+        )
+
+    # Воркеры загрузят готовый бинарный снимок вместо разбора JSON каждый по отдельности
+    for tenant, menu_file in data_manager.menu_files.items():
+        if ensure_compiled(menu_file):
+            logger.info(f"Собран бинарный снимок меню заведения {tenant} для воркеров")
+
+    # spawn, чтобы воркеры не унаследовали открытые соединения SQLite родителя
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_webhook_worker, args=(index == 0,), name=f"webhook-{index}")
+        for index in range(WEBHOOK_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+async def main():
+    """Основная функция запуска бота в режиме long polling"""
+    bot, dp = create_app()
+    dp.startup.register(on_polling_startup)
 
-    try:
-        await dp.start_polling(bot)
-    finally:
-        await bot.session.close()
-        scheduler.shutdown()
+    # Боты других заведений обслуживаются тем же диспетчером
+    bots = [bot] + [create_bot(token=token) for token in TENANT_BOTS if token != BOT_TOKEN]
+    await dp.start_polling(*bots)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if RUN_MODE == "webhook":
+        run_webhook()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,14 @@
+"""
+Middleware для ресторанного бота
+"""
+
+from .metrics_middleware import MetricsMiddleware, HandlerLabelMiddleware, ApiTimingMiddleware, registered_commands
+from .tenant_middleware import TenantMiddleware
+
+__all__ = [
+    "MetricsMiddleware",
+    "HandlerLabelMiddleware",
+    "ApiTimingMiddleware",
+    "TenantMiddleware",
+    "registered_commands"
+]
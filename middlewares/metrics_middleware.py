@@ -0,0 +1,117 @@
+"""
+Middleware для сбора метрик обработки обновлений
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable
+
+from aiogram import BaseMiddleware, Bot, Router
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.filters import Command
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from utils.callback_data import (
+    FavoritesCallback,
+    FilterCallback,
+    HistoryCallback,
+    ItemCallback,
+    MenuCallback,
+    NavigationCallback,
+    OrderCallback,
+    SearchCallback
+)
+from utils.metrics import UpdateScope, current_scope, metrics, track_section
+
+# Метка для callback и команд, которых бот не знает: данные кнопок и текст
+# команд присылает пользователь, и каждая новая метка — новый ряд метрик
+OTHER_LABEL = "other"
+
+_CALLBACK_PREFIXES = frozenset(cls.__prefix__ for cls in (
+    MenuCallback, ItemCallback, FavoritesCallback, OrderCallback,
+    HistoryCallback, FilterCallback, SearchCallback, NavigationCallback
+))
+
+def registered_commands(routers: Iterable[Router]) -> FrozenSet[str]:
+    """Команды из фильтров Command обработчиков сообщений"""
+    commands = set()
+    for router in routers:
+        for handler in router.message.handlers:
+            for handler_filter in handler.filters or ():
+                if isinstance(handler_filter.callback, Command):
+                    commands.update(command for command in handler_filter.callback.commands if isinstance(command, str))
+    return frozenset(commands)
+
+def callback_label(update: Update, handled: bool = True, commands: FrozenSet[str] = frozenset()) -> str:
+    """
+    Префикс и действие callback (menu:items), команда (/start) или тип сообщения
+
+    Действие callback попадает в метку, только если обновление обработано:
+    все обработчики callback ждут конкретное действие, так что число меток
+    ограничено кодом бота, а не тем, что прислал пользователь.
+    """
+    if update.callback_query is not None:
+        prefix, _, rest = (update.callback_query.data or "").partition(":")
+        if not handled or prefix not in _CALLBACK_PREFIXES:
+            return OTHER_LABEL
+        return f"{prefix}:{rest.split(':', 1)[0]}"
+    if update.message is not None:
+        text = update.message.text or ""
+        if not text.startswith("/"):
+            return "message"
+        command = text[1:].split(maxsplit=1)[0].split("@", 1)[0] if len(text) > 1 else ""
+        return f"/{command}" if command in commands else OTHER_LABEL
+    return update.event_type
+
+class MetricsMiddleware(BaseMiddleware):
+    """Внешний middleware диспетчера: время обработки каждого обновления"""
+
+    def __init__(self, commands: FrozenSet[str] = frozenset()):
+        self.commands = commands
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        scope = UpdateScope()
+        token = current_scope.set(scope)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            current_scope.reset(token)
+            label = callback_label(event, scope.handler != "unhandled", self.commands)
+            metrics.observe_update(scope.handler, label, elapsed, scope, failed)
+
+class HandlerLabelMiddleware(BaseMiddleware):
+    """Внутренний middleware роутера: запоминает, какой обработчик выбран"""
+
+    def __init__(self, router_name: str):
+        self.router_name = router_name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        scope = current_scope.get()
+        handler_object: HandlerObject = data.get("handler")
+        if scope is not None and handler_object is not None:
+            scope.handler = f"{self.router_name}.{handler_object.callback.__name__}"
+        return await handler(event, data)
+
+class ApiTimingMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время ожидания ответов Bot API"""
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        with track_section("telegram_api"):
+            return await make_request(bot, method)
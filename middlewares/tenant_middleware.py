@@ -0,0 +1,36 @@
+"""
+Middleware выбора заведения для обновления
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from utils.tenants import TenantResolver, current_tenant
+
+class TenantMiddleware(BaseMiddleware):
+    """
+    Внешний middleware диспетчера: выставляет current_tenant на время обработки
+
+    Чат берется из event_chat, который заполняет встроенный UserContextMiddleware.
+    """
+
+    def __init__(self, resolver: TenantResolver):
+        self.resolver = resolver
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        chat = data.get("event_chat")
+        bot = data.get("bot")
+        tenant = self.resolver.resolve(bot.id if bot else None, chat.id if chat else None)
+
+        token = current_tenant.set(tenant)
+        try:
+            return await handler(event, data)
+        finally:
+            current_tenant.reset(token)
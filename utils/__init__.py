@@ -1,21 +1,25 @@
 """
 Утилиты для ресторанного бота
+
+Импорт пакета ничего не загружает: data_manager и callback данные
+подтягиваются из своих модулей при первом обращении.
 """
 
-from .data_manager import data_manager
-from .callback_data import (
-    MenuCallback, 
-    ItemCallback, 
-    FavoritesCallback, 
-    OrderCallback,
-    NavigationCallback
-)
+import importlib
+
+_EXPORTS = {
+    "data_manager": ".data_manager",
+    "MenuCallback": ".callback_data",
+    "ItemCallback": ".callback_data",
+    "FavoritesCallback": ".callback_data",
+    "OrderCallback": ".callback_data",
+    "NavigationCallback": ".callback_data"
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    "data_manager",
-    "MenuCallback",
-    "ItemCallback", 
-    "FavoritesCallback",
-    "OrderCallback",
-    "NavigationCallback"
-]
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
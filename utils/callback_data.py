@@ -28,6 +28,26 @@ class OrderCallback(CallbackData, prefix="order"):
     action: str
     item_id: str = ""
 
+class HistoryCallback(CallbackData, prefix="hist"):
+    """Callback для истории заказов"""
+    action: str
+    order_id: int = 0
+    page: int = 0
+
+class FilterCallback(CallbackData, prefix="flt"):
+    """Callback для подбора блюд: выбранные фильтры целиком хранятся в кнопке"""
+    action: str
+    price: int = 0       # не дороже, 0 — любая цена
+    exclude: int = 0     # биты выбранных групп FILTER_EXCLUSIONS
+    desc: bool = False   # сначала дороже
+    page: int = 0
+
+class SearchCallback(CallbackData, prefix="srch"):
+    """Callback для перелистывания результатов поиска"""
+    action: str
+    token: str = ""      # ключ набора результатов в search_results
+    page: int = 0
+
 class NavigationCallback(CallbackData, prefix="nav"):
     """Callback для навигации"""
     action: str
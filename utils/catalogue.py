@@ -0,0 +1,156 @@
+"""
+Компактная модель каталога: кухни, категории и блюда
+
+Все строки каталога проходят через sys.intern: одинаковые названия,
+описания и составы в меню разных заведений хранятся в памяти один раз.
+"""
+
+import sys
+from typing import Dict, Optional, Tuple
+
+class _Frozen:
+    """Базовый класс неизменяемых объектов со __slots__"""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} нельзя изменять")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} нельзя изменять")
+
+    def __reduce__(self):
+        # Поля в __slots__ идут в порядке аргументов __init__
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+class MenuItem(_Frozen):
+    """Блюдо"""
+
+    __slots__ = ("id", "name", "description", "price", "image", "ingredients", "available")
+
+    def __init__(
+        self,
+        id: str,
+        name: str = "Блюдо",
+        description: str = "",
+        price: int = 0,
+        image: str = "🍽️",
+        ingredients: Tuple[str, ...] = (),
+        available: bool = True
+    ):
+        set_ = object.__setattr__
+        set_(self, "id", sys.intern(id))
+        set_(self, "name", sys.intern(name))
+        set_(self, "description", sys.intern(description))
+        set_(self, "price", price)
+        set_(self, "image", sys.intern(image))
+        set_(self, "ingredients", tuple(sys.intern(ingredient) for ingredient in ingredients))
+        set_(self, "available", available)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MenuItem":
+        return cls(
+            id=data["id"],
+            name=data.get("name", "Блюдо"),
+            description=data.get("description", ""),
+            price=data.get("price", 0),
+            image=data.get("image", "🍽️"),
+            ingredients=data.get("ingredients", ()),
+            available=data.get("available", True)
+        )
+
+    def replace(self, price: Optional[int] = None, available: Optional[bool] = None) -> "MenuItem":
+        """Копия блюда с другой ценой или наличием; строки остаются общими"""
+        if (price is None or price == self.price) and (available is None or available == self.available):
+            return self
+        return MenuItem(
+            self.id,
+            self.name,
+            self.description,
+            self.price if price is None else price,
+            self.image,
+            self.ingredients,
+            self.available if available is None else available
+        )
+
+    def __repr__(self) -> str:
+        return f"MenuItem({self.id!r}, {self.name!r}, price={self.price})"
+
+class Category(_Frozen):
+    """Категория блюд внутри кухни"""
+
+    __slots__ = ("id", "name", "emoji", "items")
+
+    def __init__(self, id: str, name: str = "Категория", emoji: str = "🍽️", items: Tuple[MenuItem, ...] = ()):
+        set_ = object.__setattr__
+        set_(self, "id", sys.intern(id))
+        set_(self, "name", sys.intern(name))
+        set_(self, "emoji", sys.intern(emoji))
+        set_(self, "items", tuple(items))
+
+    def __repr__(self) -> str:
+        return f"Category({self.id!r}, {self.name!r}, {len(self.items)} блюд)"
+
+class Cuisine(_Frozen):
+    """Кухня со своими категориями"""
+
+    __slots__ = ("id", "name", "emoji", "categories")
+
+    def __init__(self, id: str, name: str = "Кухня", emoji: str = "🍽️", categories: Dict[str, Category] = None):
+        set_ = object.__setattr__
+        set_(self, "id", sys.intern(id))
+        set_(self, "name", sys.intern(name))
+        set_(self, "emoji", sys.intern(emoji))
+        set_(self, "categories", categories or {})
+
+    def __repr__(self) -> str:
+        return f"Cuisine({self.id!r}, {self.name!r}, {len(self.categories)} категорий)"
+
+class CartLine:
+    """
+    Строка корзины: ссылка на блюдо, количество и цена на момент добавления
+
+    Не копирует данные блюда, поэтому отрисовка корзины не создает словарей.
+    """
+
+    __slots__ = ("item", "quantity", "price", "subtotal")
+
+    def __init__(self, item: MenuItem, quantity: int, price: int):
+        self.item = item
+        self.quantity = quantity
+        self.price = price
+        self.subtotal = price * quantity
+
+    @property
+    def id(self) -> str:
+        return self.item.id
+
+    @property
+    def name(self) -> str:
+        return self.item.name
+
+    @property
+    def image(self) -> str:
+        return self.item.image
+
+def build_catalogue(menu_data: Dict) -> Dict[str, Cuisine]:
+    """Построить каталог из проверенного словаря меню"""
+    cuisines: Dict[str, Cuisine] = {}
+
+    for cuisine_id, cuisine in menu_data.get("cuisines", {}).items():
+        categories: Dict[str, Category] = {}
+        for category_id, category in cuisine.get("categories", {}).items():
+            categories[sys.intern(category_id)] = Category(
+                id=category_id,
+                name=category.get("name", "Категория"),
+                emoji=category.get("emoji", "🍽️"),
+                items=tuple(MenuItem.from_dict(item) for item in category.get("items", []))
+            )
+        cuisines[sys.intern(cuisine_id)] = Cuisine(
+            id=cuisine_id,
+            name=cuisine.get("name", "Кухня"),
+            emoji=cuisine.get("emoji", "🍽️"),
+            categories=categories
+        )
+
+    return cuisines
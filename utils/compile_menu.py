@@ -0,0 +1,26 @@
+"""
+Сборка бинарного снимка меню
+
+    python -m utils.compile_menu [data/menu.json]
+
+Снимок с готовыми индексами записывается рядом с JSON (data/menu.snapshot)
+и используется при запуске, пока JSON не изменится.
+"""
+
+import os
+import sys
+
+from utils.menu_snapshot import compiled_path, load_snapshot, save_compiled
+
+def main():
+    json_path = sys.argv[1] if len(sys.argv) > 1 else "data/menu.json"
+    snapshot = load_snapshot(json_path)
+    if snapshot is None:
+        sys.exit(f"Файл меню {json_path} не найден")
+
+    path = compiled_path(json_path)
+    save_compiled(snapshot, path)
+    print(f"{path}: блюд {len(snapshot.items_by_id)}, {os.path.getsize(path)} байт")
+
+if __name__ == "__main__":
+    main()
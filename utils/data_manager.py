@@ -2,93 +2,326 @@
 Менеджер данных для работы с меню ресторана
 """
 
-import json
+import asyncio
+import functools
 import os
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from config import DEFAULT_TENANT, MAX_FAVORITES, MAX_ORDER_ITEMS, MENU_DIR, TENANT_BOTS, TENANT_CHATS
+from utils.catalogue import CartLine, Category, Cuisine, MenuItem
+from utils.facets import FacetResult
+from utils.menu_snapshot import MenuSnapshot, load_snapshot, validate_menu
+from utils.menu_updates import ItemUpdate, load_overrides, overrides_path, resolve_updates, save_overrides
+from utils.order_log import OrderLog, create_order_log
+from utils.search_cache import SearchResult, search_cache
+from utils.tenants import current_tenant, discover_menus
+from utils.user_state import Cart, FavoriteSet, ItemOrdinals, item_ordinals
+from utils.user_storage import UserStorage, MemoryUserStorage, create_user_storage
+
+T = TypeVar("T")
 
 class DataManager:
-    """Класс для управления данными меню"""
-
-    def __init__(self, data_file: str = "data/menu.json"):
+    """
+    Класс для управления данными меню
+
+    Меню, хранилище и журнал заказов создаются при первом обращении
+    (или явным вызовом load()), поэтому импорт модуля не читает файлы
+    и не открывает базы.
+    """
+
+    def __init__(
+        self,
+        data_file: str = "data/menu.json",
+        storage: Optional[UserStorage] = None,
+        ordinals: ItemOrdinals = item_ordinals,
+        storage_factory: Callable[[], UserStorage] = MemoryUserStorage,
+        order_log_factory: Callable[[], OrderLog] = create_order_log,
+        tenant: str = DEFAULT_TENANT
+    ):
         self.data_file = data_file
-        self.menu_data = self._load_menu()
-
-        # Данные пользователей (в продакшене использовать БД)
-        self.user_favorites = {}  # {user_id: [item_ids]}
-        self.user_orders = {}     # {user_id: {items: {item_id: quantity}, total: int}}
+        self.tenant = tenant
+        # Чтение, слияние и запись файла правок — по одному пакету за раз
+        self._overrides_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[MenuSnapshot], None]] = []
+
+        # Данные пользователей хранятся по номерам блюд из общего реестра
+        self.ordinals = ordinals
+        self._storage_factory = storage_factory
+        self._order_log_factory = order_log_factory
+        if storage is not None:
+            self.storage = storage
+
+    def __getattr__(self, name: str):
+        # Вызывается, только если атрибута еще нет: после первой загрузки
+        # обращения к снимку и хранилищу идут напрямую, без проверок
+        if name == "_snapshot":
+            self.load()
+            return self._snapshot
+        if name == "storage":
+            self.storage = self._storage_factory()
+            return self.storage
+        if name == "order_log":
+            self.order_log = self._order_log_factory()
+            return self.order_log
+        if name == "_overrides":
+            self._overrides = load_overrides(self.overrides_file)
+            return self._overrides
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def load(self):
+        """Загрузить меню из файла, если оно еще не загружено"""
+        if "_snapshot" in self.__dict__:
+            return
 
-    def _load_menu(self) -> Dict:
-        """Загрузка данных меню из JSON файла"""
-        try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {"cuisines": {}}
+        # Снимок меню с индексами заменяется целиком, поэтому обработчики
+        # никогда не видят наполовину загруженное меню
+        version = self._clock_version()
+        snapshot = load_snapshot(self.data_file, version=version) or MenuSnapshot({"cuisines": {}}, version=version)
+        self._snapshot = self.with_overrides(snapshot)
+
+    @property
+    def menu_version(self) -> int:
+        """Номер версии меню, растет при каждой замене"""
+        return self._snapshot.version
+
+    @property
+    def catalogue_version(self) -> int:
+        """Версия каталога: меняется при полной замене меню, но не при правке цен и наличия"""
+        return self._snapshot.catalogue_version
+
+    @property
+    def overrides_file(self) -> str:
+        """Файл правок цен и наличия рядом с файлом меню"""
+        return overrides_path(self.data_file)
+
+    @staticmethod
+    def _clock_version() -> int:
+        """
+        Версия меню из текущего времени в миллисекундах
+
+        Версии сохраняются вместе с заказами, поэтому после перезапуска
+        они не должны начинаться заново.
+        """
+        return time.time_ns() // 1_000_000
+
+    @property
+    def snapshot(self) -> MenuSnapshot:
+        """Текущий снимок меню"""
+        return self._snapshot
+
+    def add_reload_listener(self, callback: Callable[[MenuSnapshot], None]):
+        """Подписаться на замену меню"""
+        self._reload_listeners.append(callback)
+
+    def swap_snapshot(self, snapshot: MenuSnapshot):
+        """
+        Атомарно заменить снимок меню
+
+        Только замена и уведомление подписчиков: снимок строится заранее,
+        новое меню целиком — уже с сохраненными правками (with_overrides).
+        """
+        # Меню, которое еще не загружалось, заменяется без чтения файла
+        current = self.__dict__.get("_snapshot")
+        snapshot.version = max(current.version + 1 if current else 0, self._clock_version())
+        if snapshot.changed_categories is None:
+            snapshot.catalogue_version = snapshot.version
+        self._snapshot = snapshot
+
+        for callback in self._reload_listeners:
+            callback(snapshot)
+
+    def set_menu(self, menu_data: Dict):
+        """Заменить данные меню и перестроить индексы"""
+        validate_menu(menu_data)
+        self.swap_snapshot(self.with_overrides(MenuSnapshot(menu_data)))
+
+    def reload_menu(self) -> bool:
+        """Перечитать меню из файла, если оно изменилось"""
+        snapshot = load_snapshot(self.data_file, known_hash=self._snapshot.source_hash)
+        if snapshot is None:
+            return False
+        self.swap_snapshot(self.with_overrides(snapshot))
+        return True
+
+    def with_overrides(self, snapshot: MenuSnapshot) -> MenuSnapshot:
+        """
+        Новое меню с сохраненными правками; правки к блюдам, которых больше нет, пропускаются
+
+        Со сменой цен перестраиваются фасеты, поэтому вызывается там же,
+        где строится снимок (MenuWatcher — в потоке), а не при замене.
+        """
+        updates = self._overrides.for_menu(snapshot.source_hash)
+        changes = resolve_updates(snapshot.items_by_id, updates, strict=False) if updates else None
+        if not changes:
+            return snapshot
+        return snapshot.patched(changes, incremental=False)
+
+    def prepare_updates(self, updates: Iterable[ItemUpdate]) -> Tuple[MenuSnapshot, Optional[MenuSnapshot], List[MenuItem]]:
+        """
+        Сохранить пакет правок цен и наличия и построить снимок с ними, не подменяя текущий
+
+        Это запись файла и пересборка фасетов при смене цен: из асинхронного
+        кода ее выполняют в потоке, а снимок подменяют в цикле событий
+        через swap_patched. Возвращает (исходный снимок, новый снимок или
+        None, если меню не меняется, измененные блюда). Если какого-то
+        блюда нет в меню, выбрасывается MenuUpdateError и ничего не сохраняется.
+        """
+        updates = list(updates)
+        snapshot = self._snapshot
+        changes = resolve_updates(snapshot.items_by_id, updates)
+
+        with self._overrides_lock:
+            # Файл перечитывается: правки других процессов бота не затираются
+            overrides = load_overrides(self.overrides_file).merged(snapshot.source_hash, updates)
+            save_overrides(self.overrides_file, overrides)
+            self._overrides = overrides
+
+        patched = snapshot.patched(changes) if changes else None
+        return snapshot, patched, list(changes.values())
+
+    def prepare_overrides(self) -> Tuple[MenuSnapshot, Optional[MenuSnapshot], int]:
+        """
+        Перечитать файл правок (его мог записать другой процесс бота) и построить
+        снимок с тем, что отличается от текущего меню; подменяется он через swap_patched
+
+        Возвращает (исходный снимок, новый снимок или None, число измененных блюд).
+        """
+        with self._overrides_lock:
+            self._overrides = overrides = load_overrides(self.overrides_file)
+        snapshot = self._snapshot
+        updates = overrides.for_menu(snapshot.source_hash)
+        changes = resolve_updates(snapshot.items_by_id, updates, strict=False) if updates else None
+        if not changes:
+            return snapshot, None, 0
+        return snapshot, snapshot.patched(changes), len(changes)
+
+    def swap_patched(self, base: MenuSnapshot, patched: Optional[MenuSnapshot]):
+        """
+        Подменить снимок, построенный prepare_updates или prepare_overrides
+
+        Если пока он строился, меню успело смениться (другой пакет, перезагрузка
+        файла), сохраненные правки накладываются на текущее меню заново.
+        """
+        if patched is None:
+            return
+        current = self._snapshot
+        if current is base:
+            self.swap_snapshot(patched)
+            return
 
-    def get_cuisines(self) -> Dict[str, Dict]:
+        updates = self._overrides.for_menu(current.source_hash)
+        changes = resolve_updates(current.items_by_id, updates, strict=False) if updates else None
+        if changes:
+            self.swap_snapshot(current.patched(changes))
+
+    def apply_updates(self, updates: Iterable[ItemUpdate]) -> List[MenuItem]:
+        """
+        Применить пакет правок цен и наличия к текущему меню
+
+        Пакет применяется целиком одной заменой снимка или не применяется
+        вовсе: если какого-то блюда нет в меню, выбрасывается MenuUpdateError.
+        Правки сохраняются в overrides_file. Возвращает измененные блюда.
+        """
+        base, patched, changed = self.prepare_updates(updates)
+        self.swap_patched(base, patched)
+        return changed
+
+    def reload_overrides(self) -> int:
+        """
+        Перечитать файл правок и применить то, что отличается от текущего меню
+
+        Возвращает число измененных блюд.
+        """
+        base, patched, changed = self.prepare_overrides()
+        self.swap_patched(base, patched)
+        return changed
+
+    def get_cuisines(self) -> Dict[str, Cuisine]:
         """Получить список кухонь"""
-        return self.menu_data.get("cuisines", {})
+        return self._snapshot.cuisines
+
+    def get_cuisine(self, cuisine_id: str) -> Optional[Cuisine]:
+        """Получить кухню по ID"""
+        return self._snapshot.cuisines.get(cuisine_id)
 
-    def get_categories(self, cuisine_id: str) -> Dict[str, Dict]:
+    def get_categories(self, cuisine_id: str) -> Dict[str, Category]:
         """Получить категории для указанной кухни"""
-        cuisine = self.menu_data.get("cuisines", {}).get(cuisine_id, {})
-        return cuisine.get("categories", {})
+        cuisine = self.get_cuisine(cuisine_id)
+        return cuisine.categories if cuisine else {}
 
-    def get_items(self, cuisine_id: str, category_id: str) -> List[Dict]:
-        """Получить блюда в категории"""
-        categories = self.get_categories(cuisine_id)
-        category = categories.get(category_id, {})
-        return category.get("items", [])
+    def get_category(self, cuisine_id: str, category_id: str) -> Optional[Category]:
+        """Получить категорию по ID кухни и категории"""
+        return self.get_categories(cuisine_id).get(category_id)
 
-    def get_item(self, item_id: str) -> Optional[Dict]:
+    def get_items(self, cuisine_id: str, category_id: str) -> Tuple[MenuItem, ...]:
+        """Получить блюда в категории, которые есть в наличии"""
+        category = self.get_category(cuisine_id, category_id)
+        if category is None:
+            return ()
+        return self._snapshot.visible_items.get((cuisine_id, category_id), category.items)
+
+    def get_item(self, item_id: str) -> Optional[MenuItem]:
         """Найти блюдо по ID"""
-        for cuisine in self.menu_data.get("cuisines", {}).values():
-            for category in cuisine.get("categories", {}).values():
-                for item in category.get("items", []):
-                    if item.get("id") == item_id:
-                        return item
-        return None
-
-    def search_items(self, query: str) -> List[Dict]:
-        """Поиск блюд по названию"""
-        results = []
-        query_lower = query.lower()
-
-        for cuisine in self.menu_data.get("cuisines", {}).values():
-            for category in cuisine.get("categories", {}).values():
-                for item in category.get("items", []):
-                    item_name = item.get("name", "").lower()
-                    if query_lower in item_name:
-                        results.append(item)
-
-        return results
+        return self._snapshot.items_by_id.get(item_id)
+
+    def get_item_location(self, item_id: str) -> Optional[Tuple[str, str]]:
+        """Получить (cuisine_id, category_id) для блюда"""
+        return self._snapshot.item_locations.get(item_id)
+
+    def search_items(self, query: str) -> List[MenuItem]:
+        """Поиск блюд по названию, описанию и составу (лучшие совпадения первыми)"""
+        return search_cache.search(self._snapshot.search_index, query)
+
+    def search_result(self, query: str) -> SearchResult:
+        """Результат поиска для постраничного вывода: блюда достаются только для нужной страницы"""
+        return search_cache.result(self._snapshot.search_index, query)
+
+    def filter_items(
+        self,
+        max_price: Optional[float] = None,
+        exclude: Iterable[str] = (),
+        include: Iterable[str] = (),
+        min_price: Optional[float] = None,
+        cuisine_id: str = "",
+        descending: bool = False
+    ) -> FacetResult:
+        """Подбор блюд по цене, составу и кухне, отсортированных по цене"""
+        return self._snapshot.facets.filter(
+            min_price=min_price,
+            max_price=max_price,
+            include=include,
+            exclude=exclude,
+            cuisine_id=cuisine_id,
+            descending=descending
+        )
 
     # Управление избранным
     def add_to_favorites(self, user_id: int, item_id: str) -> bool:
-        """Добавить в избранное"""
-        if user_id not in self.user_favorites:
-            self.user_favorites[user_id] = []
+        """Добавить в избранное, False — если блюдо уже там или избранное заполнено"""
+        ordinal = self.ordinals.ordinal(item_id)
+
+        def add(favorites: FavoriteSet) -> bool:
+            if len(favorites) >= MAX_FAVORITES:
+                return False
+            return favorites.add(ordinal)
 
-        if item_id not in self.user_favorites[user_id]:
-            self.user_favorites[user_id].append(item_id)
-            return True
-        return False
+        return self.storage.update_favorites(user_id, add)
 
     def remove_from_favorites(self, user_id: int, item_id: str) -> bool:
         """Удалить из избранного"""
-        if user_id in self.user_favorites:
-            if item_id in self.user_favorites[user_id]:
-                self.user_favorites[user_id].remove(item_id)
-                return True
-        return False
+        ordinal = self.ordinals.find(item_id)
+        if ordinal is None:
+            return False
+        return self.storage.update_favorites(user_id, lambda favorites: favorites.discard(ordinal))
 
-    def get_user_favorites(self, user_id: int) -> List[Dict]:
+    def get_user_favorites(self, user_id: int) -> List[MenuItem]:
         """Получить избранные блюда пользователя"""
-        favorite_ids = self.user_favorites.get(user_id, [])
         favorites = []
 
-        for item_id in favorite_ids:
-            item = self.get_item(item_id)
+        for ordinal in self.storage.get_favorites(user_id):
+            item = self.get_item(self.ordinals.item_id(ordinal))
             if item:
                 favorites.append(item)
 
@@ -96,71 +329,267 @@ class DataManager:
 
     def is_in_favorites(self, user_id: int, item_id: str) -> bool:
         """Проверить, в избранном ли блюдо"""
-        return item_id in self.user_favorites.get(user_id, [])
+        ordinal = self.ordinals.find(item_id)
+        return ordinal is not None and ordinal in self.storage.get_favorites(user_id)
 
     # Управление заказом
+    def _empty_order(self) -> Cart:
+        """Пустой заказ: количества и цены на момент добавления"""
+        return Cart(self.menu_version)
+
     def create_order(self, user_id: int):
         """Создать новый заказ"""
-        self.user_orders[user_id] = {"items": {}, "total": 0}
-
-    def add_to_order(self, user_id: int, item_id: str, quantity: int = 1):
-        """Добавить товар в заказ"""
-        if user_id not in self.user_orders:
-            self.create_order(user_id)
-
-        if item_id in self.user_orders[user_id]["items"]:
-            self.user_orders[user_id]["items"][item_id] += quantity
-        else:
-            self.user_orders[user_id]["items"][item_id] = quantity
-
-        self._recalculate_total(user_id)
+        self.storage.set_order(user_id, self._empty_order())
+
+    def add_to_order(self, user_id: int, item_id: str, quantity: int = 1) -> bool:
+        """Добавить товар в заказ, False — если блюда нет, оно закончилось или заказ заполнен"""
+        item = self.get_item(item_id)
+        if item is None or not item.available:
+            return False
+        ordinal = self.ordinals.ordinal(item_id)
+
+        # Изменения заказа описаны функцией от текущего заказа: общее хранилище
+        # применяет ее заново, если заказ успел измениться в другом процессе
+        def add(order: Optional[Cart]) -> Tuple[Optional[Cart], bool]:
+            order = order or self._empty_order()
+            self._sync_prices(order)
+
+            index = order.find(ordinal)
+            if index >= 0:
+                order.quantities[index] += quantity
+            else:
+                if len(order) >= MAX_ORDER_ITEMS:
+                    return None, False
+                index = len(order)
+                order.append(ordinal, quantity, item.price)
+
+            order.total += order.price(index) * quantity
+            return order, True
+
+        return self.storage.update_order(user_id, add)
 
     def remove_from_order(self, user_id: int, item_id: str, quantity: int = 1):
         """Удалить товар из заказа"""
-        if user_id not in self.user_orders:
-            return
+        ordinal = self.ordinals.find(item_id)
+
+        def remove(order: Optional[Cart]) -> Tuple[Optional[Cart], None]:
+            if order is None:
+                return None, None
 
-        if item_id in self.user_orders[user_id]["items"]:
-            self.user_orders[user_id]["items"][item_id] -= quantity
-            if self.user_orders[user_id]["items"][item_id] <= 0:
-                del self.user_orders[user_id]["items"][item_id]
+            self._sync_prices(order)
 
-        self._recalculate_total(user_id)
+            index = order.find(ordinal) if ordinal is not None else -1
+            if index >= 0:
+                removed = min(quantity, order.quantities[index])
+                order.quantities[index] -= removed
+                order.total -= order.price(index) * removed
+                if order.quantities[index] <= 0:
+                    order.pop(index)
+            return order, None
 
-    def get_order(self, user_id: int) -> Dict:
+        self.storage.update_order(user_id, remove)
+
+    def get_order(self, user_id: int) -> Cart:
         """Получить текущий заказ"""
-        return self.user_orders.get(user_id, {"items": {}, "total": 0})
+        def sync(order: Optional[Cart]) -> Tuple[Optional[Cart], Cart]:
+            if order is None:
+                return None, self._empty_order()
+            # Сохраняется, только если после смены меню заказ пришлось пересчитать
+            return (order if self._sync_prices(order) is not None else None), order
+
+        return self.storage.update_order(user_id, sync)
 
     def clear_order(self, user_id: int):
         """Очистить заказ"""
-        self.user_orders[user_id] = {"items": {}, "total": 0}
-
-    def _recalculate_total(self, user_id: int):
-        """Пересчитать общую стоимость заказа"""
-        order = self.user_orders.get(user_id, {"items": {}, "total": 0})
+        self.storage.set_order(user_id, self._empty_order())
+
+    def sync_order_prices(self, user_id: int) -> List[str]:
+        """Привести цены заказа к текущему меню, вернуть ID блюд, цена которых изменилась"""
+        def sync(order: Optional[Cart]) -> Tuple[Optional[Cart], List[str]]:
+            if order is None:
+                return None, []
+            changed = self._sync_prices(order)
+            return (None, []) if changed is None else (order, changed)
+
+        return self.storage.update_order(user_id, sync)
+
+    def _sync_prices(self, order: Cart) -> Optional[List[str]]:
+        """
+        Пересчитать заказ, если меню сменилось с момента последнего изменения
+
+        Полный проход по заказу выполняется только один раз после замены меню.
+        Возвращает None, если меню не менялось, иначе список ID блюд с новой ценой.
+        Блюда, исчезнувшие из меню или закончившиеся, удаляются из заказа.
+        """
+        if order.menu_version == self.menu_version:
+            return None
+
+        changed = []
         total = 0
 
-        for item_id, quantity in order["items"].items():
+        # С конца, чтобы удаление позиции не сдвигало еще не просмотренные
+        for index in reversed(range(len(order))):
+            item_id = self.ordinals.item_id(order.ordinals[index])
             item = self.get_item(item_id)
-            if item:
-                total += item.get("price", 0) * quantity
-
-        self.user_orders[user_id]["total"] = total
-
-    def get_order_items_list(self, user_id: int) -> List[Dict]:
-        """Получить список товаров в заказе с деталями"""
+            if item is None or not item.available:
+                order.pop(index)
+                changed.append(item_id)
+                continue
+
+            if order.price(index) != item.price:
+                order.prices[index] = item.price
+                changed.append(item_id)
+            total += item.price * order.quantities[index]
+
+        changed.reverse()
+        order.total = total
+        order.menu_version = self.menu_version
+        return changed
+
+    def get_order_items_list(self, user_id: int) -> List[CartLine]:
+        """Получить строки заказа: блюдо, количество и цена на момент добавления"""
         order = self.get_order(user_id)
-        items_list = []
+        lines = []
 
-        for item_id, quantity in order["items"].items():
-            item = self.get_item(item_id)
+        for index, ordinal in enumerate(order.ordinals):
+            item = self.get_item(self.ordinals.item_id(ordinal))
             if item:
-                item_copy = item.copy()
-                item_copy["quantity"] = quantity
-                item_copy["subtotal"] = item["price"] * quantity
-                items_list.append(item_copy)
-
-        return items_list
+                lines.append(CartLine(item, order.quantities[index], order.price(index)))
+
+        return lines
+
+class TenantDataManager:
+    """
+    Данные всех заведений процесса
+
+    У каждого заведения свой DataManager: снимок меню, индексы и хранилище
+    пользователей. Обращения к методам DataManager через этот объект идут
+    в менеджер заведения текущего обновления (current_tenant), так что
+    обработчики работают с data_manager так же, как с одним меню.
+    """
+
+    def __init__(
+        self,
+        default_file: str = "data/menu.json",
+        menu_dir: str = MENU_DIR,
+        tenants: Iterable[str] = (),
+        storage_factory: Callable[[str], UserStorage] = create_user_storage,
+        order_log_factory: Callable[[str], OrderLog] = create_order_log
+    ):
+        self.default_file = default_file
+        self.menu_dir = menu_dir
+        self.storage_factory = storage_factory
+        self.order_log_factory = order_log_factory
+        self._extra_tenants = tuple(tenants)
+        self._menu_files: Optional[Dict[str, str]] = None
+        self._managers: Dict[str, DataManager] = {}
+        self._manager_callbacks: List[Callable[[DataManager], None]] = []
+
+    def __getattr__(self, name: str):
+        # Атрибуты экземпляра DataManager (storage, data_file...); методы
+        # DataManager проброшены явно ниже, так быстрее
+        return getattr(self.current(), name)
+
+    def current(self) -> DataManager:
+        """Менеджер данных заведения текущего обновления"""
+        tenant = current_tenant.get()
+        return self._managers.get(tenant) or self.for_tenant(tenant)
+
+    @property
+    def menu_files(self) -> Dict[str, str]:
+        """Файл меню каждого заведения"""
+        if self._menu_files is None:
+            menus = discover_menus(self.menu_dir, self.default_file)
+            # Заведения из настроек без своего файла получают пустое меню до его появления
+            for tenant in self._extra_tenants:
+                menus.setdefault(tenant, os.path.join(self.menu_dir, f"{tenant}.json"))
+            self._menu_files = menus
+        return self._menu_files
+
+    @property
+    def tenants(self) -> List[str]:
+        """Все известные заведения"""
+        return list(self.menu_files)
+
+    def for_tenant(self, tenant: str) -> DataManager:
+        """Менеджер данных заведения; создается при первом обращении без загрузки меню"""
+        manager = self._managers.get(tenant)
+        if manager is None:
+            data_file = self.menu_files.get(tenant) or os.path.join(self.menu_dir, f"{tenant}.json")
+            manager = self._managers[tenant] = DataManager(
+                data_file=data_file,
+                storage_factory=functools.partial(self.storage_factory, tenant),
+                order_log_factory=functools.partial(self.order_log_factory, tenant),
+                tenant=tenant
+            )
+            for callback in self._manager_callbacks:
+                callback(manager)
+        return manager
+
+    async def offload(self, func: Callable[..., T], *args) -> T:
+        """
+        Выполнить func, которая читает или меняет данные пользователей
+
+        Если хранилище заведения ходит по сети (Redis), func выполняется
+        в потоке и не останавливает цикл событий на время ответа сервера;
+        заведение текущего обновления поток видит тем же (контекст копируется).
+        Память и SQLite с кэшем отвечают сразу — для них func вызывается на месте.
+        """
+        if self.current().storage.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def each_manager(self, callback: Callable[[DataManager], None]):
+        """Применить callback к менеджерам всех заведений, в том числе будущим"""
+        self._manager_callbacks.append(callback)
+        for manager in list(self._managers.values()):
+            callback(manager)
+
+    def add_reload_listener(self, callback: Callable[[str, MenuSnapshot], None]):
+        """
+        Подписаться на замену меню любого заведения: callback(заведение, снимок)
+
+        Меню заменяет и фоновая задача (MenuWatcher), у которой заведение
+        обновления не выставлено, поэтому оно передается явно.
+        """
+        self.each_manager(lambda manager: manager.add_reload_listener(functools.partial(callback, manager.tenant)))
+
+    def load(self):
+        """Загрузить меню всех заведений"""
+        for tenant in self.tenants:
+            self.for_tenant(tenant).load()
+
+    def open_order_logs(self):
+        """Открыть журналы заказов всех заведений: при большом журнале это чтение индекса"""
+        for tenant in self.tenants:
+            self.for_tenant(tenant).order_log
+
+    def flush(self):
+        """Сбросить хранилища всех заведений"""
+        for manager in list(self._managers.values()):
+            manager.storage.flush()
+
+    def close(self):
+        """Закрыть хранилища и журналы заказов всех заведений"""
+        for manager in list(self._managers.values()):
+            manager.storage.close()
+            order_log = manager.__dict__.get("order_log")
+            if order_log is not None:
+                order_log.close()
+
+def _forward(name: str, attr):
+    """Метод или свойство TenantDataManager, вызывающее то же у менеджера текущего заведения"""
+    if isinstance(attr, property):
+        return property(lambda self: getattr(self.current(), name), doc=attr.__doc__)
+
+    @functools.wraps(attr)
+    def method(self, *args, **kwargs):
+        return getattr(self.current(), name)(*args, **kwargs)
+    return method
+
+for _name, _attr in list(vars(DataManager).items()):
+    if not _name.startswith("_") and _name not in vars(TenantDataManager):
+        setattr(TenantDataManager, _name, _forward(_name, _attr))
 
 # Глобальный экземпляр менеджера данных
-data_manager = DataManager()
+data_manager = TenantDataManager(tenants=set(TENANT_BOTS.values()) | set(TENANT_CHATS.values()))
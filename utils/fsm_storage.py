@@ -0,0 +1,214 @@
+"""
+Хранилище FSM на SQLite с истечением неактивных состояний
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import FSM_STORAGE, FSM_STORAGE_PATH, FSM_REDIS_URL, FSM_STATE_TTL, FSM_BATCH_SIZE, FSM_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Сколько ключей сверх лишних просматривает вытеснение в поисках чистых
+_EVICT_SCAN = 32
+
+class _FSMRecord:
+    """Состояние и данные одного ключа FSM"""
+
+    __slots__ = ("state", "data", "touched")
+
+    def __init__(self, state: Optional[str] = None, data: Optional[Dict[str, Any]] = None, touched: float = 0.0):
+        self.state = state
+        self.data = data if data is not None else {}
+        self.touched = touched
+
+    def is_empty(self) -> bool:
+        return self.state is None and not self.data
+
+class SqliteFSMStorage(BaseStorage):
+    """
+    FSM-хранилище на SQLite с отложенной записью
+
+    Изменения применяются к кэшу в памяти и сбрасываются в базу пачкой
+    методом flush() в отдельном потоке. Состояния, которые не менялись
+    дольше ttl секунд, считаются сброшенными и удаляются методом expire().
+    """
+
+    _SELECT = "SELECT state, data, touched FROM fsm WHERE key = ?"
+    _UPSERT = "INSERT OR REPLACE INTO fsm (key, state, data, touched) VALUES (?, ?, ?, ?)"
+    _DELETE = "DELETE FROM fsm WHERE key = ?"
+    _DELETE_EXPIRED = "DELETE FROM fsm WHERE touched < ?"
+
+    def __init__(self, path: str, ttl: float = 86400, batch_size: int = 500, cache_size: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fsm (key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL, touched REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS fsm_touched ON fsm (touched)")
+        self._conn.commit()
+
+        self._records: "OrderedDict[str, _FSMRecord]" = OrderedDict()
+        self._dirty = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def _record(self, key: StorageKey) -> Tuple[str, _FSMRecord]:
+        """Получить запись из кэша или базы"""
+        db_key = self.key_builder.build(key)
+
+        record = self._records.get(db_key)
+        if record is None:
+            with self._db_lock:
+                row = self._conn.execute(self._SELECT, (db_key,)).fetchone()
+            record = _FSMRecord(row[0], json.loads(row[1]), row[2]) if row else _FSMRecord()
+            self._records[db_key] = record
+            self._evict(db_key)
+        else:
+            self._records.move_to_end(db_key)
+
+        if record.touched and time.time() - record.touched > self.ttl:
+            # Состояние слишком долго не менялось, начинаем с чистого листа
+            record.state = None
+            record.data = {}
+            self._dirty.add(db_key)
+
+        return db_key, record
+
+    def _evict(self, current: str):
+        """
+        Вытеснить из кэша самые старые чистые записи, кроме только что прочитанной
+
+        Просматривается только начало кэша. Если там одни несохраненные
+        записи, запускается flush(): после него они станут чистыми,
+        и следующий промах вытеснит лишнее.
+        """
+        excess = len(self._records) - self.cache_size
+        if excess <= 0:
+            return
+
+        oldest = islice(iter(self._records), excess + _EVICT_SCAN)
+        clean = [db_key for db_key in oldest if db_key not in self._dirty and db_key != current][:excess]
+        for db_key in clean:
+            del self._records[db_key]
+        if len(clean) < excess:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    def _mark_dirty(self, db_key: str, record: _FSMRecord):
+        record.touched = time.time()
+        self._dirty.add(db_key)
+        if len(self._dirty) >= self.batch_size:
+            self._schedule_flush()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        db_key, record = self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(db_key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return self._record(key)[1].state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        db_key, record = self._record(key)
+        record.data = data.copy()
+        self._mark_dirty(db_key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return self._record(key)[1].data.copy()
+
+    def _collect_dirty(self) -> Tuple[List[tuple], List[tuple]]:
+        """Снять снимок грязных записей для записи в базу"""
+        upserts, deletes = [], []
+        for db_key in self._dirty:
+            record = self._records.get(db_key)
+            if record is None or record.is_empty():
+                deletes.append((db_key,))
+            else:
+                try:
+                    data = json.dumps(record.data, ensure_ascii=False)
+                except (TypeError, ValueError) as e:
+                    # Одна запись с несериализуемыми данными не должна останавливать запись остальных
+                    logger.error(f"Данные FSM {db_key} не сохранены: {e}")
+                    continue
+                upserts.append((db_key, record.state, data, record.touched))
+        self._dirty.clear()
+        return upserts, deletes
+
+    def _write(self, upserts: List[tuple], deletes: List[tuple]):
+        with self._db_lock, self._conn:
+            self._conn.executemany(self._UPSERT, upserts)
+            self._conn.executemany(self._DELETE, deletes)
+
+    async def flush(self):
+        """Сбросить накопленные изменения в базу, не блокируя цикл событий"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        # Пачки пишутся строго по очереди, чтобы старый снимок не перезаписал новый
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            upserts, deletes = self._collect_dirty()
+            await asyncio.to_thread(self._write, upserts, deletes)
+
+    async def expire(self):
+        """Удалить состояния, не менявшиеся дольше ttl"""
+        deadline = time.time() - self.ttl
+
+        expired = [db_key for db_key, record in self._records.items() if record.touched < deadline]
+        for db_key in expired:
+            del self._records[db_key]
+            self._dirty.discard(db_key)
+
+        def delete_expired():
+            with self._db_lock, self._conn:
+                self._conn.execute(self._DELETE_EXPIRED, (deadline,))
+
+        await asyncio.to_thread(delete_expired)
+
+    async def close(self) -> None:
+        await self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+def create_fsm_storage() -> BaseStorage:
+    """Создать FSM-хранилище согласно настройкам из config.py"""
+    if FSM_STORAGE == "sqlite":
+        return SqliteFSMStorage(FSM_STORAGE_PATH, ttl=FSM_STATE_TTL, batch_size=FSM_BATCH_SIZE, cache_size=FSM_CACHE_SIZE)
+    if FSM_STORAGE == "redis":
+        # Общее хранилище для нескольких процессов; нужен пакет redis
+        from aiogram.fsm.storage.redis import RedisStorage
+        return RedisStorage.from_url(
+            FSM_REDIS_URL,
+            key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True),
+            state_ttl=FSM_STATE_TTL,
+            data_ttl=FSM_STATE_TTL
+        )
+    return MemoryStorage()
@@ -0,0 +1,107 @@
+"""
+Внешнее key-value хранилище для общего состояния нескольких процессов бота
+
+Значение хранится вместе с номером версии: запись проходит, только если
+версия не изменилась с момента чтения (compare-and-set). Так несколько
+реплик бота могут менять одну корзину без блокировок.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Версия отсутствующего ключа
+MISSING_VERSION = 0
+
+class KeyValueStore:
+    """Базовый класс хранилища строк с версиями"""
+
+    # Вызовы ходят по сети: из асинхронного кода их выполняют в потоке
+    blocking = False
+
+    def get(self, key: str) -> Tuple[Optional[str], int]:
+        """Значение и его версия; (None, MISSING_VERSION), если ключа нет"""
+        raise NotImplementedError
+
+    def compare_and_set(self, key: str, value: str, version: int) -> Optional[int]:
+        """Записать значение, если версия ключа все еще version; новая версия или None при конфликте"""
+        raise NotImplementedError
+
+    def close(self):
+        """Закрыть соединения"""
+
+class LocalKeyValueStore(KeyValueStore):
+    """Хранилище в памяти процесса: замена внешнего хранилища для тестов и одной реплики"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[str], int]:
+        return self._values.get(key, (None, MISSING_VERSION))
+
+    def compare_and_set(self, key: str, value: str, version: int) -> Optional[int]:
+        with self._lock:
+            current = self._values.get(key)
+            if (current[1] if current else MISSING_VERSION) != version:
+                return None
+            self._values[key] = (value, version + 1)
+            return version + 1
+
+class RedisKeyValueStore(KeyValueStore):
+    """
+    Хранилище в Redis: ключ — хэш с полями v (значение) и ver (версия)
+
+    Проверка версии и запись выполняются одним Lua-скриптом на сервере,
+    поэтому compare-and-set — один сетевой вызов.
+    """
+
+    blocking = True
+
+    _CAS = """
+    local current = redis.call('HGET', KEYS[1], 'ver') or '0'
+    if current ~= ARGV[2] then
+        return 0
+    end
+    local version = tonumber(ARGV[2]) + 1
+    redis.call('HSET', KEYS[1], 'v', ARGV[1], 'ver', version)
+    return version
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Для общего состояния в Redis установите пакет redis: pip install redis") from e
+
+        self.url = url
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._cas = self._client.register_script(self._CAS)
+
+    def get(self, key: str) -> Tuple[Optional[str], int]:
+        value, version = self._client.hmget(key, "v", "ver")
+        return value, int(version) if version is not None else MISSING_VERSION
+
+    def compare_and_set(self, key: str, value: str, version: int) -> Optional[int]:
+        version = int(self._cas(keys=[key], args=[value, version]))
+        return version or None
+
+    def close(self):
+        self._client.close()
+
+# Хранилища по адресу: все заведения процесса используют одни соединения
+_stores: Dict[str, KeyValueStore] = {}
+_stores_lock = threading.Lock()
+
+def connect_store(url: str) -> KeyValueStore:
+    """Хранилище по адресу: "local" — в памяти процесса, redis://... — Redis"""
+    with _stores_lock:
+        store = _stores.get(url)
+        if store is None:
+            store = _stores[url] = LocalKeyValueStore() if url == "local" else RedisKeyValueStore(url)
+        return store
+
+def connect_shards(urls: List[str]) -> List[KeyValueStore]:
+    """Шарды общего состояния; пользователь всегда попадает в один и тот же шард"""
+    if not urls:
+        raise ValueError("Нужен хотя бы один адрес общего хранилища")
+    return [connect_store(url) for url in urls]
@@ -0,0 +1,288 @@
+"""
+Неизменяемый снимок меню вместе с индексами
+
+Снимок можно заранее скомпилировать в бинарный файл рядом с menu.json:
+
+    python -m utils.compile_menu [data/menu.json]
+
+Бинарный снимок — pickle, и его загрузка выполняет код из файла. Поэтому
+данные подписываются HMAC с ключом из конфигурации (MENU_SNAPSHOT_KEY или,
+если он не задан, производным от BOT_TOKEN), а подпись проверяется до
+распаковки: запись в каталог data/ без знания ключа не дает выполнить код.
+"""
+
+import gc
+import hashlib
+import hmac
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from utils.catalogue import Category, Cuisine, MenuItem, build_catalogue
+from utils.facets import FacetIndex
+from utils.search_index import SearchIndex
+from config import BOT_TOKEN, MENU_SNAPSHOT_KEY
+
+logger = logging.getLogger(__name__)
+
+# Заголовок бинарного снимка: сигнатура, версия формата, sha256 исходного JSON,
+# HMAC-SHA256 данных, длина данных
+COMPILED_MAGIC = b"MENUSNAP"
+COMPILED_FORMAT = 6  # 2: общий текстовый индекс заведений, 3: фасеты, 4: наличие блюд, 5: биграммы, 6: подпись
+_HEADER = struct.Struct("<8sH32s32sQ")
+
+def _signing_key() -> bytes:
+    """Ключ подписи бинарных снимков"""
+    secret = MENU_SNAPSHOT_KEY or BOT_TOKEN
+    return hashlib.sha256(b"menu-snapshot\x00" + secret.encode("utf-8")).digest()
+
+def _sign(payload, key: bytes) -> bytes:
+    return hmac.new(key, payload, hashlib.sha256).digest()
+
+class MenuValidationError(ValueError):
+    """Файл меню имеет неверную структуру"""
+
+def validate_menu(menu_data: Dict):
+    """Проверить структуру меню, при ошибке выбросить MenuValidationError"""
+    if not isinstance(menu_data, dict) or not isinstance(menu_data.get("cuisines"), dict):
+        raise MenuValidationError("в меню нет словаря 'cuisines'")
+
+    for cuisine_id, cuisine in menu_data["cuisines"].items():
+        if not isinstance(cuisine, dict) or not isinstance(cuisine.get("categories", {}), dict):
+            raise MenuValidationError(f"кухня '{cuisine_id}': неверный формат категорий")
+
+        for category_id, category in cuisine.get("categories", {}).items():
+            items = category.get("items", []) if isinstance(category, dict) else None
+            if not isinstance(items, list):
+                raise MenuValidationError(f"категория '{category_id}': 'items' должен быть списком")
+
+            for item in items:
+                if not isinstance(item, dict) or not item.get("id"):
+                    raise MenuValidationError(f"категория '{category_id}': блюдо без 'id'")
+                if not isinstance(item.get("price", 0), (int, float)):
+                    raise MenuValidationError(f"блюдо '{item['id']}': цена должна быть числом")
+                if not isinstance(item.get("available", True), bool):
+                    raise MenuValidationError(f"блюдо '{item['id']}': 'available' должен быть true или false")
+
+def _visible(items: Tuple[MenuItem, ...]) -> Optional[Tuple[MenuItem, ...]]:
+    """Блюда в наличии или None, если в наличии все"""
+    if all(item.available for item in items):
+        return None
+    return tuple(item for item in items if item.available)
+
+class MenuSnapshot:
+    """Каталог меню и построенные по нему индексы; после создания не изменяется"""
+
+    def __init__(self, menu_data: Dict, version: int = 0, source_hash: str = ""):
+        self.version = version
+        self.source_hash = source_hash
+
+        # Версия каталога меняется только при полной загрузке меню, а не при
+        # правке цен и наличия: по ней кэшируются клавиатуры, которые от них
+        # не зависят. changed_categories — категории, затронутые правкой,
+        # или None для полностью загруженного меню
+        self.catalogue_version = version
+        self.changed_categories: Optional[FrozenSet[Tuple[str, str]]] = None
+
+        # Исходный словарь не сохраняется: все данные переносятся в компактные объекты
+        self.cuisines: Dict[str, Cuisine] = build_catalogue(menu_data)
+
+        # Индексы item_id → блюдо и item_id → (кухня, категория)
+        self.items_by_id: Dict[str, MenuItem] = {}
+        self.item_locations: Dict[str, Tuple[str, str]] = {}
+
+        for cuisine_id, cuisine in self.cuisines.items():
+            for category_id, category in cuisine.categories.items():
+                for item in category.items:
+                    # При дублировании ID побеждает первое вхождение, как и при линейном поиске
+                    if item.id in self.items_by_id:
+                        continue
+                    self.items_by_id[item.id] = item
+                    self.item_locations[item.id] = (cuisine_id, category_id)
+
+        # Блюда в наличии для категорий, где часть блюд закончилась
+        self.visible_items: Dict[Tuple[str, str], Tuple[MenuItem, ...]] = {}
+        for cuisine_id, cuisine in self.cuisines.items():
+            for category_id, category in cuisine.categories.items():
+                visible = _visible(category.items)
+                if visible is not None:
+                    self.visible_items[(cuisine_id, category_id)] = visible
+
+        self.search_index = SearchIndex(self.items_by_id.values())
+        self.facets = FacetIndex(self.items_by_id.values(), self.item_locations)
+
+    def patched(self, changes: Dict[str, MenuItem], incremental: bool = True) -> "MenuSnapshot":
+        """
+        Новый снимок, в котором блюда заменены на changes (item_id → блюдо)
+
+        Меняются только цены и наличие, поэтому пересобираются лишь кухни
+        и категории с измененными блюдами, а остальные объекты, текстовая
+        часть поискового индекса и маски фасетов общие со старым снимком.
+        Фасеты строятся заново, только если поменялась цена: от нее зависит
+        порядок блюд. Все ID в changes должны быть в меню.
+
+        incremental=False — снимок считается полностью загруженным
+        (changed_categories=None), например при наложении сохраненных правок.
+        """
+        snapshot = object.__new__(MenuSnapshot)
+        snapshot.__dict__.update(self.__dict__)
+
+        by_category: Dict[Tuple[str, str], Dict[str, MenuItem]] = {}
+        for item_id, item in changes.items():
+            by_category.setdefault(self.item_locations[item_id], {})[item_id] = item
+
+        cuisines = dict(self.cuisines)
+        visible_items = dict(self.visible_items)
+        for (cuisine_id, category_id), replaced in by_category.items():
+            cuisine = cuisines[cuisine_id]
+            category = cuisine.categories[category_id]
+            items = tuple(replaced.get(item.id, item) for item in category.items)
+
+            categories = dict(cuisine.categories)
+            categories[category_id] = Category(category.id, category.name, category.emoji, items)
+            cuisines[cuisine_id] = Cuisine(cuisine.id, cuisine.name, cuisine.emoji, categories)
+
+            visible = _visible(items)
+            if visible is None:
+                visible_items.pop((cuisine_id, category_id), None)
+            else:
+                visible_items[(cuisine_id, category_id)] = visible
+
+        snapshot.cuisines = cuisines
+        snapshot.visible_items = visible_items
+        snapshot.items_by_id = dict(self.items_by_id)
+        snapshot.items_by_id.update(changes)
+
+        # Порядок items_by_id не меняется, поэтому номера блюд в индексах прежние
+        snapshot.search_index = self.search_index.with_items(list(snapshot.items_by_id.values()))
+        if any(item.price != self.items_by_id[item_id].price for item_id, item in changes.items()):
+            snapshot.facets = FacetIndex(snapshot.items_by_id.values(), self.item_locations)
+        else:
+            snapshot.facets = self.facets.with_items(changes)
+
+        snapshot.changed_categories = frozenset(by_category) if incremental else None
+        return snapshot
+
+def compiled_path(json_path: str) -> str:
+    """Путь к бинарному снимку для файла меню: data/menu.json → data/menu.snapshot"""
+    return os.path.splitext(json_path)[0] + ".snapshot"
+
+def save_compiled(snapshot: MenuSnapshot, path: str, key: Optional[bytes] = None):
+    """
+    Записать снимок с готовыми индексами в бинарный файл
+
+    Файл заменяется атомарно, поэтому процессы, читающие его в этот момент,
+    видят либо старую, либо новую версию целиком.
+    """
+    payload = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    signature = _sign(payload, key or _signing_key())
+    header = _HEADER.pack(COMPILED_MAGIC, COMPILED_FORMAT, bytes.fromhex(snapshot.source_hash), signature, len(payload))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def _verified(mapped, source_hash: str, key: Optional[bytes]) -> bool:
+    """Снимок собран из JSON с хэшем source_hash этой версией формата и подписан ключом key"""
+    if len(mapped) < _HEADER.size:
+        return False
+    magic, fmt, digest, signature, length = _HEADER.unpack_from(mapped)
+    if magic != COMPILED_MAGIC or fmt != COMPILED_FORMAT or digest.hex() != source_hash:
+        return False
+    if len(mapped) != _HEADER.size + length:
+        return False
+    with memoryview(mapped) as view:
+        return hmac.compare_digest(_sign(view[_HEADER.size:], key or _signing_key()), signature)
+
+def load_compiled(path: str, source_hash: str, key: Optional[bytes] = None) -> Optional[MenuSnapshot]:
+    """
+    Загрузить бинарный снимок, если он собран из JSON с хэшем source_hash
+
+    Файл отображается в память, а страницы данных берутся из общего кэша
+    ОС, так что воркеры на одной машине не читают его с диска каждый
+    заново. Возвращает None, если снимка нет, он устарел, собран другой
+    версией формата или его подпись не сходится (тогда меню разбирается
+    из JSON). Подпись проверяется до pickle.loads.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if not _verified(mapped, source_hash, key):
+                return None
+
+            # Сборщик мусора на время загрузки отключаем: он многократно обходит
+            # сотни тысяч только что созданных объектов, которые все равно живые
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                with memoryview(mapped) as view:
+                    snapshot = pickle.loads(view[_HEADER.size:])
+            finally:
+                if gc_enabled:
+                    gc.enable()
+    except (OSError, ValueError):
+        return None
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать снимок меню {path}: {e}")
+        return None
+
+    return snapshot if isinstance(snapshot, MenuSnapshot) else None
+
+def load_snapshot(path: str, version: int = 0, known_hash: str = "") -> Optional[MenuSnapshot]:
+    """
+    Прочитать, проверить и проиндексировать меню из JSON файла
+
+    Если рядом лежит актуальный бинарный снимок, индексы берутся из него,
+    иначе меню разбирается из JSON.
+    Возвращает None, если файла нет или его содержимое совпадает с known_hash.
+    Не трогает состояние бота, поэтому может выполняться в отдельном потоке.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+
+    source_hash = hashlib.sha256(raw).hexdigest()
+    if source_hash == known_hash:
+        return None
+
+    snapshot = load_compiled(compiled_path(path), source_hash)
+    if snapshot is not None:
+        snapshot.version = snapshot.catalogue_version = version
+        return snapshot
+
+    menu_data = json.loads(raw.decode("utf-8"))
+    validate_menu(menu_data)
+    return MenuSnapshot(menu_data, version=version, source_hash=source_hash)
+
+def _compiled_valid(path: str, source_hash: str) -> bool:
+    """Бинарный снимок актуален и подписан текущим ключом"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _verified(mapped, source_hash, None)
+    except (OSError, ValueError):
+        return False
+
+def ensure_compiled(json_path: str) -> bool:
+    """Собрать бинарный снимок для json_path, если готового нет, он устарел или подписан другим ключом"""
+    try:
+        with open(json_path, "rb") as f:
+            source_hash = hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return False
+
+    path = compiled_path(json_path)
+    if _compiled_valid(path, source_hash):
+        return False
+
+    snapshot = load_snapshot(json_path)
+    if snapshot is None:
+        return False
+    save_compiled(snapshot, path)
+    return True
@@ -0,0 +1,242 @@
+"""
+Правки цен и наличия блюд поверх файла меню
+
+Пакет правок приходит от администратора командой или файлом CSV/JSON
+и применяется к меню целиком одной заменой снимка (DataManager.apply_updates).
+Применённые правки хранятся рядом с файлом меню (data/menu.overrides)
+вместе с хэшем меню, к которому они сделаны: после перезапуска и
+перезагрузки того же меню они накладываются снова, а после изменения
+menu.json теряют силу — новое меню считается источником истины.
+
+CSV — заголовок и строки с колонками id, price, available (разделитель
+запятая или точка с запятой), JSON — список объектов с теми же полями
+или {"items": [...]}. Пустая цена или наличие — не менять.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from utils.catalogue import MenuItem
+
+logger = logging.getLogger(__name__)
+
+_TRUE = {"1", "true", "yes", "да", "+", "есть"}
+_FALSE = {"0", "false", "no", "нет", "-"}
+
+class MenuUpdateError(ValueError):
+    """Пакет правок не разобран или не может быть применен; меню не изменено"""
+
+class ItemUpdate:
+    """Правка блюда: новая цена и/или наличие, None — оставить как есть"""
+
+    __slots__ = ("item_id", "price", "available")
+
+    def __init__(self, item_id: str, price: Optional[int] = None, available: Optional[bool] = None):
+        self.item_id = item_id
+        self.price = price
+        self.available = available
+
+    def apply(self, item: MenuItem) -> MenuItem:
+        """Блюдо с правкой; то же блюдо, если правка ничего не меняет"""
+        return item.replace(price=self.price, available=self.available)
+
+    def merged(self, later: "ItemUpdate") -> "ItemUpdate":
+        """Правка с учетом более поздней: ее заданные поля побеждают"""
+        return ItemUpdate(
+            self.item_id,
+            self.price if later.price is None else later.price,
+            self.available if later.available is None else later.available
+        )
+
+    def to_dict(self) -> Dict:
+        data = {}
+        if self.price is not None:
+            data["price"] = self.price
+        if self.available is not None:
+            data["available"] = self.available
+        return data
+
+    def __repr__(self) -> str:
+        return f"ItemUpdate({self.item_id!r}, price={self.price}, available={self.available})"
+
+def parse_price(value) -> Optional[int]:
+    """Цена из строки или числа; пустое значение — None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"неверная цена {value!r}")
+    try:
+        price = float(str(value).strip().replace(",", "."))
+    except ValueError:
+        raise ValueError(f"неверная цена {value!r}") from None
+    if price < 0 or price != price:
+        raise ValueError(f"неверная цена {value!r}")
+    return int(price) if price.is_integer() else price
+
+def parse_available(value) -> Optional[bool]:
+    """Наличие из строки или bool; пустое значение — None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"неверное наличие {value!r}")
+
+def _update(row: Mapping, where: str) -> ItemUpdate:
+    item_id = str(row.get("id") or "").strip()
+    if not item_id:
+        raise MenuUpdateError(f"{where}: нет id блюда")
+    try:
+        update = ItemUpdate(item_id, parse_price(row.get("price")), parse_available(row.get("available")))
+    except ValueError as e:
+        raise MenuUpdateError(f"{where}: {e}") from None
+    if update.price is None and update.available is None:
+        raise MenuUpdateError(f"{where}: не указаны ни цена, ни наличие")
+    return update
+
+def _parse_json(text: str) -> List[ItemUpdate]:
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise MenuUpdateError(f"неверный JSON: {e}") from None
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise MenuUpdateError("JSON должен быть списком правок или объектом с ключом 'items'")
+
+    updates = []
+    for number, row in enumerate(data, 1):
+        if not isinstance(row, dict):
+            raise MenuUpdateError(f"правка {number}: ожидается объект")
+        updates.append(_update(row, f"правка {number}"))
+    return updates
+
+def _parse_csv(text: str) -> List[ItemUpdate]:
+    header = text.split("\n", 1)[0]
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
+
+    fields = {name.strip().lower() for name in reader.fieldnames or ()}
+    if "id" not in fields or not fields & {"price", "available"}:
+        raise MenuUpdateError("в CSV нужен заголовок с колонками id и price и/или available")
+
+    updates = []
+    for row in reader:
+        row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+        if not any(row.values()):
+            continue
+        updates.append(_update(row, f"строка {reader.line_num}"))
+    return updates
+
+def parse_updates(raw: bytes, filename: str = "") -> List[ItemUpdate]:
+    """Разобрать пакет правок из CSV или JSON; формат определяется по расширению или содержимому"""
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise MenuUpdateError("файл должен быть в кодировке UTF-8") from None
+
+    if filename.lower().endswith(".json") or text.lstrip()[:1] in ("[", "{"):
+        updates = _parse_json(text)
+    else:
+        updates = _parse_csv(text)
+
+    if not updates:
+        raise MenuUpdateError("в файле нет правок")
+    return updates
+
+def resolve_updates(
+    items_by_id: Mapping[str, MenuItem],
+    updates: Iterable[ItemUpdate],
+    strict: bool = True
+) -> Dict[str, MenuItem]:
+    """
+    Измененные блюда по правкам: item_id → новое блюдо
+
+    Блюда, которые правка не меняет, в результат не попадают. При strict
+    правка для блюда, которого нет в меню, отменяет весь пакет
+    (MenuUpdateError), иначе такая правка пропускается.
+    """
+    updates = list(updates)
+    if strict:
+        unknown = [update.item_id for update in updates if update.item_id not in items_by_id]
+        if unknown:
+            more = f" и еще {len(unknown) - 10}" if len(unknown) > 10 else ""
+            raise MenuUpdateError(f"нет в меню: {', '.join(unknown[:10])}{more}")
+
+    changes: Dict[str, MenuItem] = {}
+    for update in updates:
+        item = changes.get(update.item_id) or items_by_id.get(update.item_id)
+        if item is None:
+            continue
+        new_item = update.apply(item)
+        if new_item is not item:
+            changes[update.item_id] = new_item
+
+    # Правки, вернувшие блюдо к исходному виду, не меняют ничего
+    for item_id, item in list(changes.items()):
+        original = items_by_id[item_id]
+        if item.price == original.price and item.available == original.available:
+            del changes[item_id]
+    return changes
+
+class MenuOverrides:
+    """Накопленные правки к меню с хэшем menu_hash"""
+
+    __slots__ = ("menu_hash", "updates")
+
+    def __init__(self, menu_hash: str = "", updates: Optional[Dict[str, ItemUpdate]] = None):
+        self.menu_hash = menu_hash
+        self.updates: Dict[str, ItemUpdate] = updates or {}
+
+    def for_menu(self, menu_hash: str) -> List[ItemUpdate]:
+        """Правки, действующие для меню с этим хэшем"""
+        return list(self.updates.values()) if menu_hash == self.menu_hash else []
+
+    def merged(self, menu_hash: str, updates: Iterable[ItemUpdate]) -> "MenuOverrides":
+        """Правки с добавленным пакетом; правки к другому меню отбрасываются"""
+        merged = dict(self.updates) if menu_hash == self.menu_hash else {}
+        for update in updates:
+            current = merged.get(update.item_id)
+            merged[update.item_id] = current.merged(update) if current else update
+        return MenuOverrides(menu_hash, merged)
+
+def overrides_path(menu_path: str) -> str:
+    """Файл правок для файла меню: data/menu.json → data/menu.overrides"""
+    return os.path.splitext(menu_path)[0] + ".overrides"
+
+def load_overrides(path: str) -> MenuOverrides:
+    """Прочитать правки; пустые, если файла нет или он поврежден"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return MenuOverrides(
+            data["menu"],
+            {
+                item_id: ItemUpdate(item_id, fields.get("price"), fields.get("available"))
+                for item_id, fields in data["items"].items()
+            }
+        )
+    except FileNotFoundError:
+        return MenuOverrides()
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning(f"Не удалось прочитать правки меню {path}: {e}")
+        return MenuOverrides()
+
+def save_overrides(path: str, overrides: MenuOverrides):
+    """Записать правки; файл заменяется атомарно, как и бинарный снимок меню"""
+    data = {
+        "menu": overrides.menu_hash,
+        "items": {item_id: update.to_dict() for item_id, update in overrides.updates.items()}
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
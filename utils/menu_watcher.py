@@ -0,0 +1,96 @@
+"""
+Горячая перезагрузка меню при изменении data/menu.json
+и правок цен и наличия (data/menu.overrides)
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional, Tuple
+
+from utils.data_manager import DataManager
+from utils.menu_snapshot import load_snapshot
+from utils.menu_updates import overrides_path
+
+logger = logging.getLogger(__name__)
+
+class MenuWatcher:
+    """
+    Следит за файлом меню и подменяет снимок в DataManager
+
+    check() вызывается периодически (например, планировщиком). Дешевая
+    проверка mtime/размера выполняется каждый раз, а чтение, проверка
+    и индексация нового меню — в отдельном потоке.
+
+    Файл правок записывает процесс, в котором администратор их применил;
+    остальные процессы бота подхватывают их здесь же.
+    """
+
+    def __init__(self, manager: DataManager, path: Optional[str] = None):
+        self.manager = manager
+        self.path = path or manager.data_file
+        self.overrides_path = overrides_path(self.path)
+        self._stat = self._file_stat(self.path)
+        self._overrides_stat = self._file_stat(self.overrides_path)
+        self._running = False
+
+    @staticmethod
+    def _file_stat(path: str) -> Optional[Tuple[float, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    async def check(self) -> bool:
+        """Проверить файлы и перезагрузить меню или правки, если они изменились"""
+        reloaded = await self._check_menu()
+        return await self._check_overrides() or reloaded
+
+    async def _check_overrides(self) -> bool:
+        stat = self._file_stat(self.overrides_path)
+        if stat is None or stat == self._overrides_stat or self._running:
+            return False
+
+        self._overrides_stat = stat
+        self._running = True
+        try:
+            base, patched, changed = await asyncio.to_thread(self.manager.prepare_overrides)
+        finally:
+            self._running = False
+
+        if patched is None:
+            return False
+        self.manager.swap_patched(base, patched)
+        logger.info(f"Применены правки меню из {self.overrides_path}, блюд: {changed}")
+        return True
+
+    def _load(self, known_hash: str):
+        """Прочитать и проиндексировать новое меню и наложить на него правки; выполняется в потоке"""
+        snapshot = load_snapshot(self.path, 0, known_hash)
+        return self.manager.with_overrides(snapshot) if snapshot is not None else None
+
+    async def _check_menu(self) -> bool:
+        stat = self._file_stat(self.path)
+        if stat is None or stat == self._stat or self._running:
+            return False
+
+        self._running = True
+        try:
+            known_hash = self.manager.snapshot.source_hash
+            snapshot = await asyncio.to_thread(self._load, known_hash)
+        except Exception as e:
+            # Битый файл не должен ронять бота: остаемся на старом меню до следующего изменения
+            logger.error(f"Не удалось загрузить меню {self.path}: {e}")
+            self._stat = stat
+            return False
+        finally:
+            self._running = False
+
+        self._stat = stat
+        if snapshot is None:
+            return False
+
+        self.manager.swap_snapshot(snapshot)
+        logger.info(f"Меню перезагружено, версия {snapshot.version}, блюд: {len(snapshot.items_by_id)}")
+        return True
@@ -0,0 +1,181 @@
+"""
+Метрики задержек и пропускной способности обработчиков
+"""
+
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм, секунды
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами в формате Prometheus"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return BUCKETS[-1]
+
+class UpdateScope:
+    """Учет времени в рамках обработки одного обновления"""
+
+    __slots__ = ("handler", "sections", "_depth")
+
+    def __init__(self):
+        self.handler = "unhandled"
+        self.sections: Dict[str, float] = {}
+        self._depth: Dict[str, int] = {}
+
+current_scope: ContextVar[Optional[UpdateScope]] = ContextVar("current_scope", default=None)
+
+class MetricsRegistry:
+    """Все метрики бота"""
+
+    def __init__(self):
+        # (handler, callback) → гистограмма
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        # (section, handler) → гистограмма
+        self.sections: Dict[Tuple[str, str], Histogram] = {}
+        self.updates_total = 0
+        self.errors_total = 0
+        self._last_summary = (time.monotonic(), 0)
+
+    def observe_update(self, handler: str, callback: str, elapsed: float, scope: UpdateScope, failed: bool = False):
+        """Записать результат обработки одного обновления"""
+        self.updates_total += 1
+        if failed:
+            self.errors_total += 1
+
+        key = (handler, callback)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(elapsed)
+
+        for section, spent in scope.sections.items():
+            key = (section, handler)
+            histogram = self.sections.get(key)
+            if histogram is None:
+                histogram = self.sections[key] = Histogram()
+            histogram.observe(spent)
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines: List[str] = [
+            "# TYPE bot_updates_total counter",
+            f"bot_updates_total {self.updates_total}",
+            "# TYPE bot_update_errors_total counter",
+            f"bot_update_errors_total {self.errors_total}",
+            "# TYPE bot_handler_seconds histogram",
+        ]
+        for (handler, callback), histogram in sorted(self.latency.items()):
+            lines += _histogram_lines("bot_handler_seconds", f'handler="{handler}",callback="{callback}"', histogram)
+
+        lines.append("# TYPE bot_section_seconds histogram")
+        for (section, handler), histogram in sorted(self.sections.items()):
+            lines += _histogram_lines("bot_section_seconds", f'section="{section}",handler="{handler}"', histogram)
+
+        return "\n".join(lines) + "\n"
+
+    async def log_summary(self):
+        """
+        Записать в лог пропускную способность и самые медленные обработчики
+
+        Корутина, чтобы планировщик выполнял ее в цикле событий: обработчики
+        добавляют гистограммы без блокировок, из потока их читать нельзя.
+        """
+        now = time.monotonic()
+        started, updates = self._last_summary
+        self._last_summary = (now, self.updates_total)
+        rate = (self.updates_total - updates) / max(now - started, 1e-9)
+
+        logger.info(f"Обновлений: {self.updates_total} всего, {rate:.1f}/с за период, ошибок: {self.errors_total}")
+
+        slowest = sorted(self.latency.items(), key=lambda pair: pair[1].quantile(0.95), reverse=True)[:5]
+        for (handler, callback), histogram in slowest:
+            logger.info(
+                f"{handler} [{callback}]: {histogram.count} шт., среднее {histogram.total / histogram.count * 1e3:.1f} мс, "
+                f"p95 ≤ {histogram.quantile(0.95) * 1e3:.1f} мс"
+            )
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(BUCKETS, histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+class track_section:
+    """Контекстный менеджер: добавить время блока к разделу текущего обновления"""
+
+    __slots__ = ("section", "scope", "started")
+
+    def __init__(self, section: str):
+        self.section = section
+
+    def __enter__(self):
+        self.scope = current_scope.get()
+        if self.scope is not None:
+            depth = self.scope._depth.get(self.section, 0)
+            self.scope._depth[self.section] = depth + 1
+            # Вложенные вызовы одного раздела учитываются один раз
+            self.started = time.perf_counter() if depth == 0 else None
+        return self
+
+    def __exit__(self, *exc):
+        scope = self.scope
+        if scope is not None:
+            scope._depth[self.section] -= 1
+            if self.started is not None:
+                scope.sections[self.section] = scope.sections.get(self.section, 0.0) + time.perf_counter() - self.started
+        return False
+
+def instrument_methods(obj: Any, section: str):
+    """Обернуть публичные методы объекта учетом времени в разделе section"""
+    for name in dir(type(obj)):
+        if name.startswith("_") or isinstance(getattr(type(obj), name), property):
+            continue
+        method = getattr(obj, name)
+        # Уже обернутые методы пропускаем, чтобы повторный вызов ничего не менял
+        if callable(method) and not hasattr(method, "__wrapped__"):
+            setattr(obj, name, _timed(method, section))
+
+def _timed(method: Callable, section: str) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with track_section(section):
+            return method(*args, **kwargs)
+    return wrapper
+
+metrics = MetricsRegistry()
@@ -0,0 +1,386 @@
+"""
+Журнал оформленных заказов
+
+Заказы дописываются в конец файла (JSON на строку) отдельным потоком:
+все заказы, накопившиеся за время предыдущей записи, уходят на диск
+одной записью с одним fsync. Обработчик получает подтверждение только
+после fsync, поэтому корзина очищается, когда заказ уже сохранен.
+
+Рядом лежит индекс <журнал>.idx с записями фиксированной длины
+(пользователь, номер заказа, смещение, длина). По нему в памяти строится
+список заказов каждого пользователя, так что страница истории — несколько
+чтений по известным смещениям независимо от размера журнала.
+Журнал — источник истины: индекс после сбоя достраивается по хвосту журнала.
+Несколько процессов пишут в один журнал по очереди под flock (см. OrderLog).
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировки файлов нет, журнал пишет один процесс
+    fcntl = None
+
+from config import DEFAULT_TENANT, ORDER_LOG_PATH, ORDER_LOG_BATCH_SIZE
+from utils.catalogue import CartLine
+
+logger = logging.getLogger(__name__)
+
+# Запись индекса: user_id, номер заказа, смещение строки в журнале, ее длина
+_INDEX_RECORD = struct.Struct("<qQQI")
+
+class OrderLine:
+    """Строка сохраненного заказа: название и цена на момент оформления"""
+
+    __slots__ = ("item_id", "name", "image", "quantity", "price", "subtotal")
+
+    def __init__(self, item_id: str, name: str, image: str, quantity: int, price, subtotal):
+        self.item_id = item_id
+        self.name = name
+        self.image = image
+        self.quantity = quantity
+        self.price = price
+        self.subtotal = subtotal
+
+class OrderRecord:
+    """Оформленный заказ"""
+
+    __slots__ = ("id", "user_id", "created", "lines", "total")
+
+    def __init__(self, id: int, user_id: int, created: float, lines: List[OrderLine], total):
+        self.id = id
+        self.user_id = user_id
+        self.created = created
+        self.lines = lines
+        self.total = total
+
+    def to_json(self) -> bytes:
+        return json.dumps({
+            "id": self.id,
+            "user_id": self.user_id,
+            "created": self.created,
+            "total": self.total,
+            "items": [
+                [line.item_id, line.name, line.image, line.quantity, line.price, line.subtotal]
+                for line in self.lines
+            ]
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "OrderRecord":
+        data = json.loads(raw)
+        lines = [OrderLine(*fields) for fields in data["items"]]
+        return cls(data["id"], data["user_id"], data["created"], lines, data["total"])
+
+class _UserOrders:
+    """Заказы пользователя в журнале по возрастанию номера"""
+
+    __slots__ = ("ids", "offsets", "lengths")
+
+    def __init__(self):
+        self.ids = array("Q")
+        self.offsets = array("Q")
+        self.lengths = array("I")
+
+    def append(self, order_id: int, offset: int, length: int):
+        self.ids.append(order_id)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+
+class OrderLog:
+    """
+    Журнал заказов одного заведения
+
+    В журнал могут писать несколько процессов бота (WEBHOOK_WORKERS):
+    запись идет под блокировкой файла журнала (flock), и перед ней процесс
+    дочитывает индекс, дописанный другими. Номер заказа — следующий после
+    последнего в файлах, смещение — текущий размер журнала, поэтому номера
+    не повторяются, а индекс указывает на свои строки. Чтение истории тоже
+    сначала подхватывает новые записи индекса.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: List[Tuple[OrderRecord, Future]] = []
+        self._users: Dict[int, _UserOrders] = {}
+        self._last_id = 0
+        # Сколько байт индекса уже в памяти и где в журнале кончается последний проиндексированный заказ
+        self._index_size = 0
+        self._indexed_end = 0
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._log = open(path, "ab")
+        self._index = open(self.index_path, "ab")
+        self._reader = os.open(path, os.O_RDONLY)
+        self._index_reader = os.open(self.index_path, os.O_RDONLY)
+        with self._exclusive():
+            self._recover()
+
+        self._writer = threading.Thread(target=self._run, name="order-log", daemon=True)
+        self._writer.start()
+
+    @property
+    def last_id(self) -> int:
+        """Номер последнего известного процессу заказа"""
+        return self._last_id
+
+    def __len__(self) -> int:
+        """Сколько заказов в журнале"""
+        with self._lock:
+            self._load_index()
+            return sum(len(orders.ids) for orders in self._users.values())
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Блокировка журнала от других процессов: запись и восстановление идут по одному"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._log.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_UN)
+
+    def _recover(self):
+        """
+        Дочитать индекс и достроить его по хвосту журнала
+
+        Вызывается под _exclusive: хвосты, которые не сходятся с журналом,
+        оставлены процессом, упавшим посреди записи, и отбрасываются.
+        """
+        log_size = os.fstat(self._log.fileno()).st_size
+        with self._lock:
+            self._load_index(log_size)
+        if self._indexed_end < log_size:
+            self._index_tail(self._indexed_end, log_size)
+            with self._lock:
+                self._load_index()
+
+    def _load_index(self, log_size: Optional[int] = None):
+        """
+        Поднять в память записи индекса, дописанные после прошлого чтения
+
+        Читаются только целые записи. С log_size (под _exclusive) записи,
+        выходящие за журнал, и недописанный хвост индекса обрезаются.
+        Вызывается под self._lock.
+        """
+        index_size = os.fstat(self._index_reader).st_size
+        usable = index_size - (index_size - self._index_size) % _INDEX_RECORD.size
+        if usable > self._index_size:
+            raw = os.pread(self._index_reader, usable - self._index_size, self._index_size)
+
+            loaded = 0
+            users = self._users
+            # Миллионы записей при открытии: цикл без вызовов методов на каждую
+            for user_id, order_id, offset, length in _INDEX_RECORD.iter_unpack(raw):
+                if log_size is not None and offset + length > log_size:
+                    break
+                orders = users.get(user_id)
+                if orders is None:
+                    orders = users[user_id] = _UserOrders()
+                orders.ids.append(order_id)
+                orders.offsets.append(offset)
+                orders.lengths.append(length)
+                self._indexed_end = offset + length
+                # Номера в журнале растут, последний — наибольший
+                self._last_id = order_id
+                loaded += 1
+            self._index_size += loaded * _INDEX_RECORD.size
+
+        if log_size is not None and index_size > self._index_size:
+            # Недописанная при сбое запись индекса отбрасывается
+            os.ftruncate(self._index.fileno(), self._index_size)
+
+    def _index_tail(self, start: int, log_size: int):
+        """Проиндексировать заказы, которые попали в журнал, но не в индекс"""
+        entries = []
+        offset = start
+        error = None
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    record = OrderRecord.from_json(raw)
+                except (ValueError, KeyError, TypeError) as e:
+                    # Испорченная строка: индекс обрывается на последнем целом заказе,
+                    # а остаток журнала сохраняется рядом, чтобы его можно было разобрать
+                    error = e
+                    f.seek(offset)
+                    with open(self.path + ".damaged", "ab") as out:
+                        out.write(f.read(log_size - offset))
+                    break
+                entries.append(_INDEX_RECORD.pack(record.user_id, record.id, offset, len(raw)))
+                offset += len(raw)
+
+        if offset < log_size:
+            if error is not None:
+                logger.error(
+                    f"Журнал заказов {self.path}: испорчена запись на смещении {offset} ({error}), "
+                    f"{log_size - offset} байт перенесены в {self.path}.damaged"
+                )
+            else:
+                # Строка, которую не успели дописать до сбоя: заказ не был подтвержден
+                logger.warning(f"Журнал заказов {self.path}: отброшено {log_size - offset} байт недописанной записи")
+            os.ftruncate(self._log.fileno(), offset)
+
+        if entries:
+            self._index.write(b"".join(entries))
+            self._index.flush()
+            logger.info(f"Журнал заказов {self.path}: в индекс добавлено заказов: {len(entries)}")
+
+    def append(self, user_id: int, lines: List[CartLine], total) -> Future:
+        """
+        Поставить заказ в очередь на запись
+
+        Future завершается записью заказа после fsync; номер заказу
+        выдается при записи, когда известны заказы других процессов.
+        """
+        order_lines = [
+            OrderLine(line.id, line.name, line.image, line.quantity, line.price, line.subtotal)
+            for line in lines
+        ]
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Журнал заказов {self.path} закрыт")
+            record = OrderRecord(0, user_id, time.time(), order_lines, total)
+            self._pending.append((record, future))
+            self._wakeup.notify()
+        return future
+
+    async def write(self, user_id: int, lines: List[CartLine], total) -> OrderRecord:
+        """Сохранить заказ и дождаться, пока он окажется на диске"""
+        return await asyncio.wrap_future(self.append(user_id, lines, total))
+
+    def _run(self):
+        """Поток записи: пачка заказов → write → fsync → индекс"""
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if not self._pending:
+                    return
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.exception(f"Не удалось записать заказы в {self.path}")
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for record, future in batch:
+                    future.set_result(record)
+
+    def _write_batch(self, batch: List[Tuple[OrderRecord, Future]]):
+        with self._exclusive():
+            # Другие процессы могли дописать журнал: номера и смещение берутся из файлов
+            self._recover()
+            offset = batch_start = os.fstat(self._log.fileno()).st_size
+
+            chunks, entries = [], []
+            order_id = self._last_id
+            for record, _ in batch:
+                order_id += 1
+                record.id = order_id
+                raw = record.to_json()
+                chunks.append(raw)
+                entries.append(_INDEX_RECORD.pack(record.user_id, record.id, offset, len(raw)))
+                offset += len(raw)
+
+            try:
+                self._log.write(b"".join(chunks))
+                self._log.flush()
+                os.fsync(self._log.fileno())
+            except OSError:
+                # Заказы пачки не подтверждены: их обрывок не должен остаться в журнале
+                os.ftruncate(self._log.fileno(), batch_start)
+                raise
+
+            # Индекс производный: после сбоя он достраивается по журналу, fsync не нужен
+            self._index.write(b"".join(entries))
+            self._index.flush()
+
+            with self._lock:
+                self._load_index()
+
+    def _read(self, offset: int, length: int) -> OrderRecord:
+        return OrderRecord.from_json(os.pread(self._reader, length, offset))
+
+    def count(self, user_id: int) -> int:
+        """Сколько заказов у пользователя"""
+        with self._lock:
+            self._load_index()
+            orders = self._users.get(user_id)
+            return len(orders.ids) if orders else 0
+
+    def history(self, user_id: int, page: int = 0, per_page: int = 5) -> List[OrderRecord]:
+        """Страница заказов пользователя, новые первыми"""
+        with self._lock:
+            self._load_index()
+            orders = self._users.get(user_id)
+            if orders is None:
+                return []
+            end = len(orders.ids) - page * per_page
+            start = max(0, end - per_page)
+            positions = [(orders.offsets[i], orders.lengths[i]) for i in range(end - 1, start - 1, -1)]
+        return [self._read(offset, length) for offset, length in positions]
+
+    def get(self, user_id: int, order_id: int) -> Optional[OrderRecord]:
+        """Заказ пользователя по номеру; чужие заказы не находятся"""
+        with self._lock:
+            self._load_index()
+            orders = self._users.get(user_id)
+            if orders is None:
+                return None
+            i = bisect.bisect_left(orders.ids, order_id)
+            if i == len(orders.ids) or orders.ids[i] != order_id:
+                return None
+            offset, length = orders.offsets[i], orders.lengths[i]
+        return self._read(offset, length)
+
+    def close(self):
+        """Дописать очередь и закрыть файлы"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        self._log.close()
+        self._index.close()
+        os.close(self._reader)
+        os.close(self._index_reader)
+
+def create_order_log(tenant: str = DEFAULT_TENANT) -> OrderLog:
+    """Журнал заказов заведения: data/orders.log для основного, data/orders_<заведение>.log для остальных"""
+    path = ORDER_LOG_PATH
+    if tenant != DEFAULT_TENANT:
+        root, ext = os.path.splitext(ORDER_LOG_PATH)
+        path = f"{root}_{tenant}{ext}"
+    return OrderLog(path, batch_size=ORDER_LOG_BATCH_SIZE)
@@ -0,0 +1,185 @@
+"""
+Планировщик исходящих запросов к Bot API с учетом лимитов Telegram
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import (
+    AnswerCallbackQuery,
+    AnswerInlineQuery,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    TelegramMethod
+)
+
+logger = logging.getLogger(__name__)
+
+# Запросы, которые не являются сообщениями в чат и не попадают под лимит чата
+CHAT_EXEMPT_METHODS = (AnswerCallbackQuery, AnswerInlineQuery)
+
+# Правки, каждая из которых целиком заменяет предыдущую того же типа
+COALESCED_METHODS = (EditMessageText, EditMessageReplyMarkup)
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity про запас"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Забрать токен и вернуть, сколько секунд нужно подождать до отправки"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+class _PendingEdit:
+    """Правка сообщения, ожидающая своей очереди на отправку"""
+
+    __slots__ = ("method", "future")
+
+    def __init__(self, method: TelegramMethod, future: asyncio.Future):
+        self.method = method
+        self.future = future
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: лимиты на чат и общий лимит, склейка правок, повторы
+
+    - каждый запрос ждет токен из общего ведра и ведра своего чата;
+    - пока правка сообщения ждет очереди, более новая правка того же
+      сообщения подменяет ее, и оба вызова получают один результат;
+    - правки одного сообщения уходят по одной: следующая ждет ответа
+      на предыдущую, иначе Telegram может применить их в обратном порядке;
+    - при 429 запрос повторяется через retry_after, при сетевых
+      и 5xx ошибках — с экспоненциальной задержкой.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_chats: int = 10000
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_chats = max_chats
+
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self._pending_edits: Dict[Hashable, _PendingEdit] = {}
+        # Результат правки каждого сообщения, которая сейчас отправляется
+        self._sending_edits: Dict[Hashable, asyncio.Future] = {}
+
+        self.stats = {"sent": 0, "coalesced": 0, "retried": 0, "throttled": 0}
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            if len(self._chats) > self.max_chats:
+                # Вытесняем ведро чата, к которому дольше всего не обращались
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def _wait_turn(self, method: TelegramMethod):
+        """Дождаться токенов общего лимита и лимита чата"""
+        delay = self._global.reserve()
+
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None and not isinstance(method, CHAT_EXEMPT_METHODS):
+            delay = max(delay, self._chat_bucket(chat_id).reserve())
+
+        if delay > 0:
+            self.stats["throttled"] += 1
+            await asyncio.sleep(delay)
+
+    async def _send(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        """Отправить запрос с повторами"""
+        attempt = 0
+        while True:
+            try:
+                result = await make_request(bot, method)
+                self.stats["sent"] += 1
+                return result
+            except TelegramRetryAfter as e:
+                error, delay = e, e.retry_after
+            except (TelegramNetworkError, TelegramServerError) as e:
+                error, delay = e, self.backoff * 2 ** attempt
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise error
+            logger.warning(f"Ошибка Bot API в {type(method).__name__}: {error}, повтор через {delay:.1f} с")
+            self.stats["retried"] += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _edit_key(method: TelegramMethod) -> Optional[Hashable]:
+        if not isinstance(method, COALESCED_METHODS):
+            return None
+        if method.inline_message_id:
+            return type(method), method.inline_message_id
+        return type(method), method.chat_id, method.message_id
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        key = self._edit_key(method)
+        if key is None:
+            await self._wait_turn(method)
+            return await self._send(make_request, bot, method)
+
+        pending = self._pending_edits.get(key)
+        if pending is not None:
+            # Предыдущая правка еще не ушла — отправим вместо нее эту
+            pending.method = method
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending.future)
+
+        pending = self._pending_edits[key] = _PendingEdit(method, asyncio.get_running_loop().create_future())
+        future = pending.future
+        try:
+            try:
+                await self._wait_turn(method)
+                sending = self._sending_edits.get(key)
+                if sending is not None:
+                    # Пока ждем ответа на предыдущую правку, новые продолжают подменять эту
+                    await asyncio.wait((sending,))
+            finally:
+                # С этого момента новые правки образуют следующую очередь
+                del self._pending_edits[key]
+            self._sending_edits[key] = future
+            result = await self._send(make_request, bot, pending.method)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Ошибку получат ожидающие вызовы; помечаем ее полученной, чтобы asyncio не ругался
+            future.exception()
+            raise
+        finally:
+            if self._sending_edits.get(key) is future:
+                del self._sending_edits[key]
+
+        future.set_result(result)
+        return result
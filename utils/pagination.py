@@ -0,0 +1,142 @@
+"""
+Постраничный вывод списков
+
+Источник страниц — любой объект с __len__ и page(offset, limit): отрезок
+кортежа блюд категории, результат фасетного подбора, заказы из журнала.
+paginate достает из источника только запрошенную страницу, так что
+длинный список не копируется и не перебирается при каждом перелистывании.
+
+Наборы результатов, которые дорого считать заново (поиск), хранятся
+в ResultCache под коротким ключом, который помещается в callback кнопки.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+from utils.data_manager import data_manager
+from utils.search_index import normalize
+from utils.tenants import current_tenant
+from config import MAX_ITEMS_PER_PAGE, RESULT_CACHE_SIZE
+
+T = TypeVar("T")
+
+class SequenceSource(Generic[T]):
+    """Источник поверх готового списка или кортежа"""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: Sequence[T]):
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def page(self, offset: int, limit: int) -> List[T]:
+        return list(self.items[offset:offset + limit])
+
+class LazySource(Generic[T]):
+    """Источник, который знает число элементов и достает отрезок по запросу"""
+
+    __slots__ = ("length", "fetch")
+
+    def __init__(self, length: int, fetch: Callable[[int, int], List[T]]):
+        self.length = length
+        self.fetch = fetch
+
+    def __len__(self) -> int:
+        return self.length
+
+    def page(self, offset: int, limit: int) -> List[T]:
+        return self.fetch(offset, limit)
+
+class Page(Generic[T]):
+    """Страница списка: элементы, ее номер и общее число элементов"""
+
+    __slots__ = ("items", "number", "total", "per_page")
+
+    def __init__(self, items: List[T], number: int, total: int, per_page: int):
+        self.items = items
+        self.number = number
+        self.total = total
+        self.per_page = per_page
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, (self.total + self.per_page - 1) // self.per_page)
+
+    @property
+    def start(self) -> int:
+        """Порядковый номер первого элемента страницы, с единицы"""
+        return self.number * self.per_page + 1
+
+    @property
+    def has_prev(self) -> bool:
+        return self.number > 0
+
+    @property
+    def has_next(self) -> bool:
+        return self.number < self.total_pages - 1
+
+def paginate(source, number: int, per_page: int = MAX_ITEMS_PER_PAGE) -> Page:
+    """
+    Страница number источника
+
+    Номер за пределами списка (список сократился, пока кнопка висела
+    в чате) сдвигается на последнюю страницу.
+    """
+    total = len(source)
+    last = max(0, (total + per_page - 1) // per_page - 1)
+    number = min(max(number, 0), last)
+    items = source.page(number * per_page, per_page) if total else []
+    return Page(items, number, total, per_page)
+
+def result_token(query: str) -> str:
+    """
+    Короткий ключ набора результатов для callback кнопки
+
+    Считается по нормализованному запросу, как в SearchCache: «Борщ»,
+    «борщ » и «БОРЩ» находят одно и то же и делят один набор.
+    """
+    key = normalize(query).strip()
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
+
+class ResultCache:
+    """
+    LRU-кэш наборов результатов по ключу, заведению и версии меню
+
+    Перелистывание результатов не пересчитывает их: набор считается
+    один раз и общий для всех пользователей с тем же запросом.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, token: str) -> tuple:
+        return token, current_tenant.get(), data_manager.menu_version
+
+    def get(self, token: str) -> Optional[tuple]:
+        """(запрос, результаты) или None, если набора нет или меню с тех пор менялось"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, token: str, query: str, results: Any) -> Any:
+        """Сохранить набор результатов (источник страниц) и вернуть его"""
+        self._entries[self._key(token)] = (query, results)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return results
+
+    def clear(self, *_):
+        self._entries.clear()
+
+search_results = ResultCache(RESULT_CACHE_SIZE)
@@ -0,0 +1,112 @@
+"""
+Отрисовка сообщений без лишних правок
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from config import RENDER_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+def markup_fingerprint(markup: Optional[InlineKeyboardMarkup]) -> Hashable:
+    """Отпечаток клавиатуры по тексту и данным кнопок"""
+    if markup is None:
+        return None
+    return hash(tuple(
+        tuple((button.text, button.callback_data, button.url) for button in row)
+        for row in markup.inline_keyboard
+    ))
+
+class MessageRenderer:
+    """
+    Помнит, что было отправлено в каждое сообщение, и пропускает
+    правки, которые ничего не меняют
+
+    Отпечатки хранятся в ограниченном LRU по (bot_id, chat_id, message_id):
+    у разных ботов в одном чате номера сообщений могут совпадать.
+    """
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = maxsize
+        self._fingerprints: "OrderedDict[Tuple[int, int, int], Tuple[int, Hashable]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"sent": 0, "suppressed": 0, "not_modified": 0}
+        self._logged_stats = dict(self.stats)
+
+    def _remember(self, key: Tuple[int, int, int], fingerprint: Tuple[int, Hashable]):
+        self._fingerprints[key] = fingerprint
+        self._fingerprints.move_to_end(key)
+        if len(self._fingerprints) > self.maxsize:
+            self._fingerprints.popitem(last=False)
+
+    async def _edit(self, key: Tuple[int, int, int], fingerprint: Tuple[int, Hashable], edit) -> bool:
+        """
+        Выполнить правку
+
+        Отпечаток запоминается до отправки: если несколько правок одного
+        сообщения склеятся в исходящей очереди, в сообщении окажется последняя
+        из них, и именно она останется в кэше. При ошибке отпечаток забывается.
+        """
+        self._remember(key, fingerprint)
+        try:
+            await edit
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                # Содержимое уже такое, просто мы о нем не знали (например, после перезапуска)
+                self.stats["not_modified"] += 1
+                return False
+            self._forget(key, fingerprint)
+            raise
+        except Exception:
+            self._forget(key, fingerprint)
+            raise
+
+        self.stats["sent"] += 1
+        return True
+
+    def _forget(self, key: Tuple[int, int, int], fingerprint: Tuple[int, Hashable]):
+        """Забыть отпечаток, если его не успела заменить более новая правка"""
+        if self._fingerprints.get(key) == fingerprint:
+            del self._fingerprints[key]
+
+    async def edit_text(self, message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> bool:
+        """Изменить текст и клавиатуру сообщения; False, если правка не понадобилась"""
+        key = (message.bot.id if message.bot else 0, message.chat.id, message.message_id)
+        fingerprint = (hash(text), markup_fingerprint(reply_markup))
+
+        if self._fingerprints.get(key) == fingerprint:
+            self.stats["suppressed"] += 1
+            return False
+        return await self._edit(key, fingerprint, message.edit_text(text, reply_markup=reply_markup))
+
+    async def edit_reply_markup(self, message: Message, reply_markup: Optional[InlineKeyboardMarkup] = None) -> bool:
+        """Изменить только клавиатуру сообщения; False, если правка не понадобилась"""
+        key = (message.bot.id if message.bot else 0, message.chat.id, message.message_id)
+        previous = self._fingerprints.get(key)
+        # Если текст неизвестен, запоминаем пустой: следующая правка текста точно уйдет
+        text_hash = previous[0] if previous else 0
+        fingerprint = (text_hash, markup_fingerprint(reply_markup))
+
+        if previous == fingerprint:
+            self.stats["suppressed"] += 1
+            return False
+        return await self._edit(key, fingerprint, message.edit_reply_markup(reply_markup=reply_markup))
+
+    async def log_stats(self):
+        """
+        Записать в лог, сколько правок отправлено и сэкономлено с прошлой записи
+
+        Корутина: планировщик выполнит ее в цикле событий, там же, где идут правки.
+        """
+        delta = {name: value - self._logged_stats[name] for name, value in self.stats.items()}
+        self._logged_stats = dict(self.stats)
+        logger.info(
+            f"Правки сообщений: отправлено {delta['sent']}, пропущено без изменений {delta['suppressed']}, "
+            f"«message is not modified» {delta['not_modified']}"
+        )
+
+renderer = MessageRenderer(RENDER_CACHE_SIZE)
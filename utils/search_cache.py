@@ -0,0 +1,148 @@
+"""
+Кэш результатов поиска
+
+Хранит номера найденных блюд по нормализованному запросу. Ключ включает
+отпечаток текстов меню (SearchIndex.key): после замены меню с другими
+блюдами старые результаты не находятся, а заведения с одинаковыми
+блюдами и перезагрузка меню, в которой поменялись только цены, пользуются
+одними и теми же записями.
+
+Запрос, для которого в кэше есть результат по его началу («пиц» →
+«пицца»), ищется только среди этих блюд: подстрока «пицца» есть лишь
+там, где есть «пиц». Так поиск по мере набора не проходит по индексу
+на каждую букву.
+
+В кэше лежат все найденные блюда, включая те, которых нет в наличии:
+они отбрасываются при выдаче, поэтому смена наличия кэш не сбрасывает.
+"""
+
+import logging
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.catalogue import MenuItem
+from utils.search_index import SearchIndex, normalize
+from config import SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+class SearchResult:
+    """Найденные блюда: номера из кэша, сами блюда достаются постранично"""
+
+    __slots__ = ("items", "ids")
+
+    def __init__(self, items: List[MenuItem], ids: Sequence[int]):
+        self.items = items
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def page(self, offset: int, limit: int) -> List[MenuItem]:
+        """Блюда с offset-го по релевантности, не больше limit"""
+        items = self.items
+        return [items[idx] for idx in self.ids[offset:offset + limit]]
+
+class SearchCache:
+    """
+    LRU-кэш номеров найденных блюд с временем жизни записи
+
+    Размер ограничен суммарным числом номеров, а не запросов: короткий
+    запрос в большом меню находит десятки тысяч блюд.
+    """
+
+    def __init__(self, maxsize: int = 1_000_000, ttl: float = 30 * 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # (отпечаток меню, запрос) → (истекает, номера блюд, точное совпадение)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, array, bool]]" = OrderedDict()
+        self._size = 0
+        self.stats: Dict[str, int] = {"hits": 0, "narrowed": 0, "misses": 0}
+        self._logged_stats = dict(self.stats)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: Tuple[str, str], now: float) -> Optional[Tuple[float, array, bool]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._entries[key]
+            self._size -= len(entry[1])
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _prefix_entry(self, index_key: str, query: str, now: float) -> Optional[Tuple[float, array, bool]]:
+        """Запись для самого длинного начала запроса, которое есть в кэше"""
+        for end in range(len(query) - 1, 0, -1):
+            entry = self._get((index_key, query[:end]), now)
+            if entry is not None:
+                return entry
+        return None
+
+    def search_ids(self, index: SearchIndex, query: str) -> Sequence[int]:
+        """Номера найденных блюд в index, лучшие первыми"""
+        query = normalize(query).strip()
+        if not query:
+            return ()
+
+        now = time.monotonic()
+        key = (index.key, query)
+        entry = self._get(key, now)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry[1]
+
+        prefix = self._prefix_entry(index.key, query, now)
+        if prefix is not None:
+            self.stats["narrowed"] += 1
+            # Без точных совпадений по началу запроса их нет и у запроса
+            within = prefix[1] if prefix[2] else ()
+            ids, exact = index.search_ids(query, within)
+        else:
+            self.stats["misses"] += 1
+            ids, exact = index.search_ids(query)
+
+        result = array("I", ids)
+        self._entries[key] = (now + self.ttl, result, exact)
+        self._size += len(result)
+        while self._size > self.maxsize and len(self._entries) > 1:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+        return result
+
+    def search(self, index: SearchIndex, query: str) -> List[MenuItem]:
+        """Найти блюда по запросу, лучшие совпадения первыми"""
+        items = index.items
+        return [items[idx] for idx in index.visible(self.search_ids(index, query))]
+
+    def result(self, index: SearchIndex, query: str) -> SearchResult:
+        """Результат поиска, из которого берутся только нужные страницы"""
+        return SearchResult(index.items, index.visible(self.search_ids(index, query)))
+
+    def clear(self, *_):
+        self._entries.clear()
+        self._size = 0
+
+    async def log_stats(self):
+        """
+        Записать в лог попадания и промахи с прошлой записи
+
+        Корутина, чтобы планировщик не читал счетчики и len(self) из
+        своего пула потоков, пока поиск меняет их.
+        """
+        delta = {name: value - self._logged_stats[name] for name, value in self.stats.items()}
+        self._logged_stats = dict(self.stats)
+        total = sum(delta.values())
+        if not total:
+            return
+        logger.info(
+            f"Кэш поиска: попаданий {delta['hits']}, по началу запроса {delta['narrowed']}, "
+            f"промахов {delta['misses']}, hit rate {delta['hits'] / total:.1%}, записей {len(self)}"
+        )
+
+search_cache = SearchCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
@@ -0,0 +1,335 @@
+"""
+Поисковый индекс по блюдам меню
+"""
+
+import hashlib
+import re
+import sys
+import weakref
+from array import array
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from utils.catalogue import MenuItem
+
+# Веса совпадений при ранжировании
+SCORE_NAME_EXACT = 100
+SCORE_NAME_PREFIX = 60
+SCORE_NAME_WORD_PREFIX = 40
+SCORE_NAME_SUBSTRING = 30
+SCORE_INGREDIENTS = 15
+SCORE_DESCRIPTION = 10
+SCORE_FUZZY_NAME = 8
+SCORE_FUZZY_OTHER = 3
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def normalize(text: str) -> str:
+    """Привести строку к виду для поиска: нижний регистр, ё → е"""
+    return text.lower().replace("ё", "е")
+
+def tokenize(text: str) -> List[str]:
+    """Разбить нормализованную строку на слова"""
+    return _TOKEN_RE.findall(text)
+
+def trigrams(text: str) -> Set[str]:
+    """Множество триграмм строки"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def bigrams(text: str) -> Set[str]:
+    """Множество биграмм строки: кандидаты для запросов из двух букв"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Проверить, что строки отличаются не более чем на одну правку"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        # Замена или перестановка соседних символов
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    # Вставка символа
+    return a[i:] == b[i + 1:]
+
+class _IndexData:
+    """Текстовая часть индекса: от цен не зависит, поэтому общая для меню с одинаковыми блюдами"""
+
+    __slots__ = ("names", "ingredients", "descriptions", "postings", "words", "word_grams", "__weakref__")
+
+# Текстовые индексы по отпечатку содержимого; живут, пока ими пользуется хотя бы одно меню
+_shared: "weakref.WeakValueDictionary[str, _IndexData]" = weakref.WeakValueDictionary()
+
+def _text_key(items: List[MenuItem]) -> str:
+    """Отпечаток текстов блюд в порядке их следования"""
+    digest = hashlib.blake2b(digest_size=16)
+    for item in items:
+        digest.update("\x1f".join((item.name, "\x1e".join(item.ingredients), item.description)).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class SearchIndex:
+    """
+    Инвертированный триграммный индекс по названию, описанию и составу блюд
+
+    Заведения одной сети часто отличаются только ценами: если тексты блюд
+    совпадают, их индексы используют одни и те же структуры.
+
+    Блюда, которых нет в наличии, остаются в индексе и отбрасываются
+    из найденного (visible): так результаты в кэше поиска не зависят
+    от наличия и не устаревают, когда блюдо заканчивается.
+    """
+
+    def __init__(self, items: Iterable[MenuItem]):
+        self.items: List[MenuItem] = list(items)
+        self._key = _text_key(self.items)
+        self._find_hidden()
+
+        data = _shared.get(self._key)
+        if data is None:
+            data = self._build()
+        self._use(data)
+
+    def with_items(self, items: List[MenuItem]) -> "SearchIndex":
+        """
+        Индекс по тем же блюдам с другими ценами или наличием
+
+        Тексты блюд не менялись, поэтому текстовая часть и отпечаток общие
+        со старым индексом, а записи кэша поиска остаются действительными.
+        """
+        index = object.__new__(SearchIndex)
+        index.items = items
+        index._key = self._key
+        index._find_hidden()
+        index._use(self._data)
+        return index
+
+    def _find_hidden(self):
+        self.hidden: FrozenSet[int] = frozenset(idx for idx, item in enumerate(self.items) if not item.available)
+
+    def _build(self) -> _IndexData:
+        """Построить текстовую часть индекса и сделать ее общей"""
+        self._names: List[str] = []
+        self._ingredients: List[str] = []
+        self._descriptions: List[str] = []
+
+        # триграмма или биграмма → номера блюд (по всем полям)
+        self._postings: Dict[str, Set[int]] = {}
+        # слово → номера блюд с признаком «слово из названия»
+        self._words: Dict[str, Dict[int, bool]] = {}
+        # триграмма слова с границами → слова словаря
+        self._word_grams: Dict[str, Set[str]] = {}
+
+        for item in self.items:
+            self._add(item)
+
+        data = _IndexData()
+        data.names, data.ingredients, data.descriptions = self._names, self._ingredients, self._descriptions
+        data.postings, data.words, data.word_grams = self._postings, self._words, self._word_grams
+        _shared[self._key] = data
+        return data
+
+    def _use(self, data: _IndexData):
+        self._data = data
+        self._names, self._ingredients, self._descriptions = data.names, data.ingredients, data.descriptions
+        self._postings, self._words, self._word_grams = data.postings, data.words, data.word_grams
+
+    def __getstate__(self) -> Dict:
+        # В бинарном снимке списки номеров хранятся массивами: множества int
+        # медленно восстанавливаются из pickle и занимают в разы больше памяти
+        return {
+            "items": self.items,
+            "key": self._key,
+            "names": self._names,
+            "ingredients": self._ingredients,
+            "descriptions": self._descriptions,
+            "postings": {gram: array("I", sorted(ids)) for gram, ids in self._postings.items()},
+            "words": self._words,
+            "word_grams": self._word_grams
+        }
+
+    def __setstate__(self, state: Dict):
+        self.items = state["items"]
+        self._key = state["key"]
+        self._find_hidden()
+
+        data = _shared.get(self._key)
+        if data is None:
+            data = _IndexData()
+            for name in ("names", "ingredients", "descriptions", "postings", "words", "word_grams"):
+                setattr(data, name, state[name])
+            _shared[self._key] = data
+        self._use(data)
+
+    def _posting(self, gram: str) -> Optional[Set[int]]:
+        """Номера блюд с триграммой; массив из снимка превращается в множество при первом обращении"""
+        ids = self._postings.get(gram)
+        if ids is not None and not isinstance(ids, set):
+            ids = self._postings[gram] = set(ids)
+        return ids
+
+    def _add(self, item: MenuItem):
+        """Добавить блюдо в индекс"""
+        idx = len(self._names)
+        # Нормализованные строки общие для индексов всех заведений
+        name = sys.intern(normalize(item.name))
+        ingredients = sys.intern(normalize(" ".join(item.ingredients)))
+        description = sys.intern(normalize(item.description))
+
+        self._names.append(name)
+        self._ingredients.append(ingredients)
+        self._descriptions.append(description)
+
+        for field in (name, ingredients, description):
+            for gram in trigrams(field) | bigrams(field):
+                self._postings.setdefault(gram, set()).add(idx)
+
+        for field, in_name in ((name, True), (ingredients, False), (description, False)):
+            for word in tokenize(field):
+                postings = self._words.get(word)
+                if postings is None:
+                    postings = self._words[word] = {}
+                    for gram in trigrams(f"^{word}$"):
+                        self._word_grams.setdefault(gram, set()).add(word)
+                postings[idx] = postings.get(idx, False) or in_name
+
+    @property
+    def key(self) -> str:
+        """Отпечаток текстов блюд: совпадает у индексов с одинаковыми результатами поиска"""
+        return self._key
+
+    def search(self, query: str) -> List[MenuItem]:
+        """Найти блюда по запросу, лучшие совпадения первыми"""
+        ids, _ = self.search_ids(query)
+        return [self.items[idx] for idx in self.visible(ids)]
+
+    def visible(self, ids: Sequence[int]) -> Sequence[int]:
+        """Номера найденных блюд без тех, которых нет в наличии"""
+        if not self.hidden:
+            return ids
+        hidden = self.hidden
+        return [idx for idx in ids if idx not in hidden]
+
+    def search_ids(self, query: str, within: Optional[Sequence[int]] = None) -> Tuple[List[int], bool]:
+        """
+        Номера найденных блюд, лучшие первыми, и признак точного совпадения
+
+        within — кандидаты на точное совпадение вместо триграмм, например
+        результаты по началу запроса: подстрока запроса есть во всех полях,
+        где есть сам запрос. Если признак False, точных совпадений нет
+        и номера найдены с опечатками.
+        """
+        query = normalize(query).strip()
+        if not query:
+            return [], False
+
+        scores = self._search_exact(query, within)
+        exact = bool(scores)
+        if not exact:
+            scores = self._search_fuzzy(query)
+
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [idx for idx, _ in ranked], exact
+
+    def _candidates(self, query: str, within: Optional[Sequence[int]] = None) -> Iterable[int]:
+        """
+        Кандидаты на точное совпадение подстроки
+
+        Из within и пересечения триграмм берется то, что заведомо короче:
+        within короче самого редкого списка триграммы — проверяем его.
+        """
+        # Запрос из двух букв ищется по биграмме, а не перебором всего меню
+        grams = trigrams(query) or bigrams(query)
+        if not grams:
+            # Запрос из одной буквы — проверяем все блюда
+            return range(len(self.items)) if within is None else within
+
+        postings = []
+        for gram in grams:
+            ids = self._posting(gram)
+            if not ids:
+                return ()
+            postings.append(ids)
+
+        postings.sort(key=len)
+        if within is not None and len(within) <= len(postings[0]):
+            return within
+        if len(postings) == 1:
+            # Единственный список (запрос из двух-трех букв) только читается, копия не нужна
+            return postings[0]
+
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def _search_exact(self, query: str, within: Optional[Sequence[int]] = None) -> Dict[int, int]:
+        """Совпадения запроса как подстроки одного из полей"""
+        scores = {}
+
+        for idx in self._candidates(query, within):
+            name = self._names[idx]
+            score = 0
+            if query in name:
+                if name == query:
+                    score = SCORE_NAME_EXACT
+                elif name.startswith(query):
+                    score = SCORE_NAME_PREFIX
+                elif f" {query}" in name:
+                    score = SCORE_NAME_WORD_PREFIX
+                else:
+                    score = SCORE_NAME_SUBSTRING
+            if query in self._ingredients[idx]:
+                score += SCORE_INGREDIENTS
+            if query in self._descriptions[idx]:
+                score += SCORE_DESCRIPTION
+            if score:
+                scores[idx] = score
+
+        return scores
+
+    def _similar_words(self, word: str) -> List[str]:
+        """Слова словаря на расстоянии не более одной правки"""
+        if word in self._words:
+            return [word]
+
+        candidates = set()
+        for gram in trigrams(f"^{word}$"):
+            candidates |= self._word_grams.get(gram, set())
+        return [candidate for candidate in candidates if within_one_edit(word, candidate)]
+
+    def _search_fuzzy(self, query: str) -> Dict[int, int]:
+        """Совпадения с опечатками: каждое слово запроса должно найтись с точностью до одной правки"""
+        scores: Dict[int, int] = {}
+        first = True
+
+        for word in tokenize(query):
+            if len(word) < 3:
+                continue
+
+            word_scores: Dict[int, int] = {}
+            for similar in self._similar_words(word):
+                for idx, in_name in self._words[similar].items():
+                    score = SCORE_FUZZY_NAME if in_name else SCORE_FUZZY_OTHER
+                    if score > word_scores.get(idx, 0):
+                        word_scores[idx] = score
+
+            if first:
+                scores = word_scores
+                first = False
+            else:
+                scores = {idx: score + word_scores[idx] for idx, score in scores.items() if idx in word_scores}
+            if not scores:
+                break
+
+        return scores
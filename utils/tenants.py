@@ -0,0 +1,41 @@
+"""
+Заведения (тенанты): чье меню показывать в текущем обновлении
+"""
+
+import os
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from config import DEFAULT_TENANT
+
+# Заведение текущего обновления; выставляется TenantMiddleware
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default=DEFAULT_TENANT)
+
+def discover_menus(menu_dir: str, default_file: str) -> Dict[str, str]:
+    """Файлы меню по заведениям: MENU_DIR/<заведение>.json и основное меню"""
+    menus = {DEFAULT_TENANT: default_file}
+    try:
+        names = sorted(os.listdir(menu_dir))
+    except FileNotFoundError:
+        return menus
+
+    for name in names:
+        tenant, ext = os.path.splitext(name)
+        if ext == ".json" and tenant != DEFAULT_TENANT:
+            menus[tenant] = os.path.join(menu_dir, name)
+    return menus
+
+class TenantResolver:
+    """Определяет заведение по чату или боту, в котором пришло обновление"""
+
+    def __init__(self, bots: Dict[str, str], chats: Dict[int, str]):
+        # ID бота — часть токена до двоеточия, так что токены не нужно держать в памяти
+        self.bots: Dict[int, str] = {int(token.split(":", 1)[0]): tenant for token, tenant in bots.items()}
+        self.chats: Dict[int, str] = dict(chats)
+
+    def resolve(self, bot_id: Optional[int], chat_id: Optional[int]) -> str:
+        """Заведение чата, иначе заведение бота, иначе основное"""
+        tenant = self.chats.get(chat_id)
+        if tenant is None:
+            tenant = self.bots.get(bot_id, DEFAULT_TENANT)
+        return tenant
@@ -0,0 +1,80 @@
+"""
+Асинхронные блокировки по пользователям
+
+Обработчик корзины или избранного держит блокировку пользователя на время
+изменения данных и чтения состояния, из которого строится ответ, поэтому
+быстрые повторные нажатия одного пользователя меняют корзину по очереди:
+чек строится из той же корзины, которую потом очищает оформление заказа.
+
+Правка сообщения и ответ на нажатие идут уже без блокировки: они ждут
+лимита Telegram, и следующее нажатие за это время успевает изменить
+корзину, а его правка подменяет еще не отправленную (OutboundScheduler).
+Правка ставится в очередь сразу после чтения, без переключения задач,
+так что последним на экране остается последнее состояние корзины.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncContextManager, AsyncIterator, Dict, Hashable, List
+
+from config import USER_LOCK_SHARDS
+from utils.tenants import current_tenant
+
+class _UserLock:
+    """Блокировка и число обработчиков, которые держат ее или ждут"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+class UserLocks:
+    """
+    Таблица блокировок, разбитая на шарды по хэшу ключа
+
+    Блокировка существует, только пока ее кто-то держит или ждет: последний
+    вышедший обработчик удаляет ее из таблицы. Словарь Python не уменьшается
+    после удаления ключей, поэтому опустевший шард заменяется новым —
+    память после пика нажатий возвращается.
+    """
+
+    def __init__(self, shards: int = 64):
+        self._shards: List[Dict[Hashable, _UserLock]] = [{} for _ in range(shards)]
+        # Сколько раз обработчику пришлось ждать другой обработчик того же пользователя
+        self.contended = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        """Выполнить блок, удерживая блокировку ключа"""
+        index = hash(key) % len(self._shards)
+        shard = self._shards[index]
+
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = _UserLock()
+        elif entry.lock.locked():
+            self.contended += 1
+
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                del shard[key]
+                if not shard:
+                    self._shards[index] = {}
+
+# Блокировки пользователей всех заведений процесса
+user_locks = UserLocks(USER_LOCK_SHARDS or 1)
+
+def user_lock(user_id: int) -> AsyncContextManager[None]:
+    """Блокировка данных пользователя в заведении текущего обновления; без нее при USER_LOCK_SHARDS = 0"""
+    if not USER_LOCK_SHARDS:
+        return nullcontext()
+    return user_locks.hold((current_tenant.get(), user_id))
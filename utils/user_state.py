@@ -0,0 +1,153 @@
+"""
+Компактное представление данных пользователя: избранное и корзина
+"""
+
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Union
+
+Number = Union[int, float]
+
+class ItemOrdinals:
+    """
+    Реестр номеров блюд: item_id ↔ целое число
+
+    Только дописывается, поэтому номер блюда не меняется при перезагрузке меню,
+    даже если блюдо пропало из меню и потом вернулось.
+    """
+
+    def __init__(self):
+        self._ordinals: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def ordinal(self, item_id: str) -> int:
+        """Номер блюда, при первом обращении назначается новый"""
+        ordinal = self._ordinals.get(item_id)
+        if ordinal is None:
+            # Хранилище может читать записи из потока планировщика
+            with self._lock:
+                ordinal = self._ordinals.get(item_id)
+                if ordinal is None:
+                    ordinal = self._ordinals[item_id] = len(self._ids)
+                    self._ids.append(item_id)
+        return ordinal
+
+    def find(self, item_id: str) -> Optional[int]:
+        """Номер блюда или None, если номер еще не назначен"""
+        return self._ordinals.get(item_id)
+
+    def item_id(self, ordinal: int) -> str:
+        """ID блюда по номеру"""
+        return self._ids[ordinal]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+def _number(value: float) -> Number:
+    """Цена из массива: целые значения возвращаются как int"""
+    return int(value) if value.is_integer() else value
+
+class FavoriteSet:
+    """
+    Избранное: множество номеров блюд в порядке добавления
+
+    Хранится массивом беззнаковых чисел. Размер ограничен MAX_FAVORITES,
+    так что проверка вхождения — короткий проход по массиву на C.
+    """
+
+    __slots__ = ("ordinals",)
+
+    def __init__(self, ordinals=()):
+        self.ordinals = array("I", ordinals)
+
+    def __contains__(self, ordinal: int) -> bool:
+        return ordinal in self.ordinals
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ordinals)
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def add(self, ordinal: int) -> bool:
+        """Добавить номер, False — если он уже есть"""
+        if ordinal in self.ordinals:
+            return False
+        self.ordinals.append(ordinal)
+        return True
+
+    def discard(self, ordinal: int) -> bool:
+        """Удалить номер, False — если его не было"""
+        if ordinal not in self.ordinals:
+            return False
+        self.ordinals.remove(ordinal)
+        return True
+
+    def to_ids(self, registry: ItemOrdinals) -> List[str]:
+        return [registry.item_id(ordinal) for ordinal in self.ordinals]
+
+    @classmethod
+    def from_ids(cls, item_ids: List[str], registry: ItemOrdinals) -> "FavoriteSet":
+        return cls(registry.ordinal(item_id) for item_id in item_ids)
+
+class Cart:
+    """
+    Корзина: параллельные массивы номеров блюд, количеств и цен на момент добавления
+
+    Позиций не больше MAX_ORDER_ITEMS, поэтому поиск позиции — проход по массиву.
+    """
+
+    __slots__ = ("ordinals", "quantities", "prices", "total", "menu_version")
+
+    def __init__(self, menu_version: int = 0):
+        self.ordinals = array("I")
+        self.quantities = array("I")
+        self.prices = array("d")
+        self.total: Number = 0
+        self.menu_version = menu_version
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def find(self, ordinal: int) -> int:
+        """Индекс позиции с этим блюдом или -1"""
+        try:
+            return self.ordinals.index(ordinal)
+        except ValueError:
+            return -1
+
+    def price(self, index: int) -> Number:
+        return _number(self.prices[index])
+
+    def append(self, ordinal: int, quantity: int, price: Number):
+        self.ordinals.append(ordinal)
+        self.quantities.append(quantity)
+        self.prices.append(price)
+
+    def pop(self, index: int):
+        self.ordinals.pop(index)
+        self.quantities.pop(index)
+        self.prices.pop(index)
+
+    def to_dict(self, registry: ItemOrdinals) -> Dict:
+        """Прежний формат заказа: {items, prices, total, menu_version} по item_id"""
+        item_ids = [registry.item_id(ordinal) for ordinal in self.ordinals]
+        return {
+            "items": dict(zip(item_ids, self.quantities)),
+            "prices": {item_id: self.price(i) for i, item_id in enumerate(item_ids)},
+            "total": self.total,
+            "menu_version": self.menu_version
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, registry: ItemOrdinals) -> "Cart":
+        cart = cls(data.get("menu_version", 0))
+        prices = data.get("prices", {})
+        for item_id, quantity in data.get("items", {}).items():
+            cart.append(registry.ordinal(item_id), quantity, prices.get(item_id, 0))
+        cart.total = data.get("total", 0)
+        return cart
+
+# Общий реестр номеров блюд
+item_ordinals = ItemOrdinals()
@@ -0,0 +1,365 @@
+"""
+Хранилища пользовательских данных: избранное и корзины
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from config import (
+    DEFAULT_TENANT, STORAGE_BACKEND, STORAGE_PATH, STORAGE_BATCH_SIZE, STORAGE_CACHE_SIZE,
+    SHARED_STATE_URLS, SHARED_STATE_PREFIX, SHARED_CAS_RETRIES, SHARED_CACHE_TTL, SHARED_CACHE_SIZE
+)
+from utils.kv_store import KeyValueStore, connect_shards
+from utils.user_state import Cart, FavoriteSet, ItemOrdinals, item_ordinals
+
+T = TypeVar("T")
+
+class UserStorage:
+    """Базовый класс хранилища избранного и корзин"""
+
+    # Методы ждут сеть, и обработчики вызывают их в потоке (TenantDataManager.offload)
+    blocking = False
+
+    def get_favorites(self, user_id: int) -> FavoriteSet:
+        """Получить номера избранных блюд пользователя"""
+        raise NotImplementedError
+
+    def set_favorites(self, user_id: int, favorites: FavoriteSet):
+        """Сохранить номера избранных блюд пользователя"""
+        raise NotImplementedError
+
+    def get_order(self, user_id: int) -> Optional[Cart]:
+        """Получить заказ пользователя или None"""
+        raise NotImplementedError
+
+    def set_order(self, user_id: int, order: Cart):
+        """Сохранить заказ пользователя"""
+        raise NotImplementedError
+
+    def update_favorites(self, user_id: int, mutate: Callable[[FavoriteSet], bool]) -> bool:
+        """
+        Изменить избранное: mutate меняет его на месте и возвращает True,
+        если есть что сохранять. Результат mutate возвращается.
+        """
+        favorites = self.get_favorites(user_id)
+        changed = mutate(favorites)
+        if changed:
+            self.set_favorites(user_id, favorites)
+        return changed
+
+    def update_order(self, user_id: int, mutate: Callable[[Optional[Cart]], Tuple[Optional[Cart], T]]) -> T:
+        """
+        Изменить заказ: mutate получает текущий заказ (или None)
+        и возвращает (заказ для сохранения или None, результат)
+        """
+        order, result = mutate(self.get_order(user_id))
+        if order is not None:
+            self.set_order(user_id, order)
+        return result
+
+    def flush(self):
+        """Записать накопленные изменения"""
+
+    def close(self):
+        """Закрыть хранилище"""
+        self.flush()
+
+class MemoryUserStorage(UserStorage):
+    """Хранилище в памяти процесса, данные теряются при перезапуске"""
+
+    def __init__(self):
+        self.favorites: Dict[int, FavoriteSet] = {}
+        self.orders: Dict[int, Cart] = {}
+
+    def get_favorites(self, user_id: int) -> FavoriteSet:
+        favorites = self.favorites.get(user_id)
+        return favorites if favorites is not None else FavoriteSet()
+
+    def set_favorites(self, user_id: int, favorites: FavoriteSet):
+        self.favorites[user_id] = favorites
+
+    def get_order(self, user_id: int) -> Optional[Cart]:
+        return self.orders.get(user_id)
+
+    def set_order(self, user_id: int, order: Cart):
+        self.orders[user_id] = order
+
+class SqliteUserStorage(UserStorage):
+    """
+    Хранилище в SQLite (режим WAL)
+
+    Изменения попадают в ограниченный LRU-кэш и помечаются «грязными»,
+    а в базу уходят пачкой одной транзакцией при flush().
+    В базе записи лежат в JSON по item_id, в кэше — в компактном виде.
+    """
+
+    _SELECT_FAVORITES = "SELECT data FROM favorites WHERE user_id = ?"
+    _SELECT_ORDER = "SELECT data FROM orders WHERE user_id = ?"
+    _UPSERT_FAVORITES = "INSERT OR REPLACE INTO favorites (user_id, data) VALUES (?, ?)"
+    _UPSERT_ORDER = "INSERT OR REPLACE INTO orders (user_id, data) VALUES (?, ?)"
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 500,
+        cache_size: int = 10000,
+        registry: ItemOrdinals = item_ordinals
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.registry = registry
+
+        # Соединение используется и из потоков планировщика, доступ сериализуется блокировкой
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=16)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS favorites (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS orders (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+        self._conn.commit()
+
+        self._favorites: "OrderedDict[int, FavoriteSet]" = OrderedDict()
+        self._orders: "OrderedDict[int, Optional[Cart]]" = OrderedDict()
+        self._dirty_favorites = set()
+        self._dirty_orders = set()
+
+    def _load(self, cache: OrderedDict, sql: str, user_id: int, decode, default):
+        """Прочитать запись через кэш"""
+        if user_id in cache:
+            cache.move_to_end(user_id)
+            return cache[user_id]
+
+        row = self._conn.execute(sql, (user_id,)).fetchone()
+        value = decode(json.loads(row[0]), self.registry) if row else default
+        self._remember(cache, user_id, value)
+        return value
+
+    def _remember(self, cache: OrderedDict, user_id: int, value):
+        """Положить запись в кэш, вытеснив самые старые"""
+        cache[user_id] = value
+        cache.move_to_end(user_id)
+
+        if len(cache) > self.cache_size:
+            # Перед вытеснением несохраненные изменения должны попасть в базу
+            if self._dirty_favorites or self._dirty_orders:
+                self.flush()
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def _mark_dirty(self, dirty: set, user_id: int):
+        dirty.add(user_id)
+        if len(self._dirty_favorites) + len(self._dirty_orders) >= self.batch_size:
+            self.flush()
+
+    def get_favorites(self, user_id: int) -> FavoriteSet:
+        with self._lock:
+            return self._load(self._favorites, self._SELECT_FAVORITES, user_id, FavoriteSet.from_ids, FavoriteSet())
+
+    def set_favorites(self, user_id: int, favorites: FavoriteSet):
+        with self._lock:
+            self._remember(self._favorites, user_id, favorites)
+            self._mark_dirty(self._dirty_favorites, user_id)
+
+    def get_order(self, user_id: int) -> Optional[Cart]:
+        with self._lock:
+            return self._load(self._orders, self._SELECT_ORDER, user_id, Cart.from_dict, None)
+
+    def set_order(self, user_id: int, order: Cart):
+        with self._lock:
+            self._remember(self._orders, user_id, order)
+            self._mark_dirty(self._dirty_orders, user_id)
+
+    # Записи в кэше меняются на месте, а flush() сериализует их из потока
+    # планировщика: чтение, изменение и сохранение идут под одной блокировкой
+
+    def update_favorites(self, user_id: int, mutate: Callable[[FavoriteSet], bool]) -> bool:
+        with self._lock:
+            return super().update_favorites(user_id, mutate)
+
+    def update_order(self, user_id: int, mutate: Callable[[Optional[Cart]], Tuple[Optional[Cart], T]]) -> T:
+        with self._lock:
+            return super().update_order(user_id, mutate)
+
+    def flush(self):
+        """Записать все грязные записи одной транзакцией"""
+        with self._lock:
+            if not self._dirty_favorites and not self._dirty_orders:
+                return
+
+            favorites = [
+                (user_id, json.dumps(self._favorites[user_id].to_ids(self.registry), ensure_ascii=False))
+                for user_id in self._dirty_favorites
+            ]
+            orders = [
+                (user_id, json.dumps(self._orders[user_id].to_dict(self.registry), ensure_ascii=False))
+                for user_id in self._dirty_orders
+            ]
+
+            with self._conn:
+                self._conn.executemany(self._UPSERT_FAVORITES, favorites)
+                self._conn.executemany(self._UPSERT_ORDER, orders)
+
+            self._dirty_favorites.clear()
+            self._dirty_orders.clear()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+class ConcurrentUpdateError(RuntimeError):
+    """Запись так и не удалась: другие процессы каждый раз успевали изменить ее раньше"""
+
+class SharedUserStorage(UserStorage):
+    """
+    Общее хранилище для нескольких процессов бота во внешнем key-value хранилище
+
+    - пользователь всегда попадает в шард user_id % числа шардов;
+    - изменения идут через compare-and-set: при конфликте запись перечитывается
+      и изменение применяется заново, не больше cas_retries раз;
+    - избранное читается через небольшой локальный кэш: is_in_favorites
+      на каждом экране меню не ходит по сети. Свои изменения сразу видны
+      в кэше, чужие — не позже чем через cache_ttl секунд. Заказы всегда
+      читаются из хранилища.
+
+    Записи хранятся в JSON по item_id, как в SQLite.
+    """
+
+    def __init__(
+        self,
+        shards: List[KeyValueStore],
+        prefix: str = "culrest",
+        cas_retries: int = 10,
+        cache_ttl: float = 2.0,
+        cache_size: int = 10000,
+        registry: ItemOrdinals = item_ordinals
+    ):
+        self.shards = shards
+        self.blocking = any(shard.blocking for shard in shards)
+        self.prefix = prefix
+        self.cas_retries = cas_retries
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.registry = registry
+
+        # user_id → (избранное, версия, до какого момента можно не перечитывать)
+        self._favorites: "OrderedDict[int, Tuple[FavoriteSet, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.conflicts = 0
+
+    def _shard(self, user_id: int) -> KeyValueStore:
+        return self.shards[user_id % len(self.shards)]
+
+    def _favorites_key(self, user_id: int) -> str:
+        return f"{self.prefix}:fav:{user_id}"
+
+    def _order_key(self, user_id: int) -> str:
+        return f"{self.prefix}:order:{user_id}"
+
+    def _read_favorites(self, user_id: int, cached: bool = True) -> Tuple[FavoriteSet, int]:
+        """Избранное и его версия, из кэша, пока он свежий"""
+        now = time.monotonic()
+        if cached:
+            with self._lock:
+                entry = self._favorites.get(user_id)
+            if entry is not None and entry[2] > now:
+                return FavoriteSet(entry[0].ordinals), entry[1]
+
+        value, version = self._shard(user_id).get(self._favorites_key(user_id))
+        favorites = FavoriteSet.from_ids(json.loads(value), self.registry) if value else FavoriteSet()
+        self._remember_favorites(user_id, favorites, version, now)
+        return FavoriteSet(favorites.ordinals), version
+
+    def _remember_favorites(self, user_id: int, favorites: FavoriteSet, version: int, now: float):
+        with self._lock:
+            self._favorites[user_id] = (favorites, version, now + self.cache_ttl)
+            self._favorites.move_to_end(user_id)
+            while len(self._favorites) > self.cache_size:
+                self._favorites.popitem(last=False)
+
+    def get_favorites(self, user_id: int) -> FavoriteSet:
+        return self._read_favorites(user_id)[0]
+
+    def set_favorites(self, user_id: int, favorites: FavoriteSet):
+        def replace(current: FavoriteSet) -> bool:
+            current.ordinals = favorites.ordinals
+            return True
+
+        self.update_favorites(user_id, replace)
+
+    def update_favorites(self, user_id: int, mutate: Callable[[FavoriteSet], bool]) -> bool:
+        key = self._favorites_key(user_id)
+        shard = self._shard(user_id)
+
+        # Первая попытка — по кэшу; если он устарел, compare-and-set не пройдет
+        cached = True
+        for _ in range(self.cas_retries):
+            favorites, version = self._read_favorites(user_id, cached)
+            changed = mutate(favorites)
+            if not changed:
+                return changed
+
+            value = json.dumps(favorites.to_ids(self.registry), ensure_ascii=False)
+            new_version = shard.compare_and_set(key, value, version)
+            if new_version is not None:
+                self._remember_favorites(user_id, FavoriteSet(favorites.ordinals), new_version, time.monotonic())
+                return changed
+
+            self.conflicts += 1
+            cached = False
+        raise ConcurrentUpdateError(key)
+
+    def get_order(self, user_id: int) -> Optional[Cart]:
+        value, _ = self._shard(user_id).get(self._order_key(user_id))
+        return Cart.from_dict(json.loads(value), self.registry) if value else None
+
+    def set_order(self, user_id: int, order: Cart):
+        self.update_order(user_id, lambda current: (order, None))
+
+    def update_order(self, user_id: int, mutate: Callable[[Optional[Cart]], Tuple[Optional[Cart], T]]) -> T:
+        key = self._order_key(user_id)
+        shard = self._shard(user_id)
+
+        for _ in range(self.cas_retries):
+            value, version = shard.get(key)
+            order, result = mutate(Cart.from_dict(json.loads(value), self.registry) if value else None)
+            if order is None:
+                return result
+
+            value = json.dumps(order.to_dict(self.registry), ensure_ascii=False)
+            if shard.compare_and_set(key, value, version) is not None:
+                return result
+
+            self.conflicts += 1
+        raise ConcurrentUpdateError(key)
+
+def create_user_storage(tenant: str = DEFAULT_TENANT) -> UserStorage:
+    """
+    Создать хранилище согласно настройкам из config.py
+
+    У каждого заведения свой файл: data/users.db для основного,
+    data/users_<заведение>.db для остальных; в общем хранилище —
+    свой префикс ключей.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        path = STORAGE_PATH
+        if tenant != DEFAULT_TENANT:
+            root, ext = os.path.splitext(STORAGE_PATH)
+            path = f"{root}_{tenant}{ext}"
+        return SqliteUserStorage(path, batch_size=STORAGE_BATCH_SIZE, cache_size=STORAGE_CACHE_SIZE)
+    if STORAGE_BACKEND == "shared":
+        prefix = SHARED_STATE_PREFIX if tenant == DEFAULT_TENANT else f"{SHARED_STATE_PREFIX}:{tenant}"
+        return SharedUserStorage(
+            connect_shards(SHARED_STATE_URLS),
+            prefix=prefix,
+            cas_retries=SHARED_CAS_RETRIES,
+            cache_ttl=SHARED_CACHE_TTL,
+            cache_size=SHARED_CACHE_SIZE
+        )
+    return MemoryUserStorage()